@@ -1,11 +1,15 @@
 # api/crud/expenses.py
+from datetime import date
+from typing import Optional
+import numpy as np
+import pandas as pd
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
 from api.db import models
 from api.models.schemas import ExpenseCreate
 
 def get_expenses(db: Session):
-    """Return all expenses (used by forecast_service)."""
+    """Return all expenses."""
     return db.query(models.Expense).all()
 
 def get_expenses_grouped_by_date(db: Session):
@@ -14,3 +18,60 @@ def get_expenses_grouped_by_date(db: Session):
         .group_by(models.Expense.date)
         .all()
     )
+
+# SQLite expressions that map a date onto the label pandas gives its period
+# (W = week ending Sunday, MS = month start, ME = month end)
+_SQLITE_BUCKETS = {
+    "W": lambda col: func.date(col, "weekday 0"),
+    "MS": lambda col: func.date(col, "start of month"),
+    "ME": lambda col: func.date(col, "start of month", "+1 month", "-1 day"),
+}
+
+def get_category_totals(db: Session, start_date: Optional[date] = None, end_date: Optional[date] = None):
+    """(category, total, count) per category from the daily_totals rollup, largest total first."""
+    stmt = select(models.DailyTotal.category, func.sum(models.DailyTotal.total), func.sum(models.DailyTotal.count))
+    if start_date:
+        stmt = stmt.where(models.DailyTotal.date >= start_date)
+    if end_date:
+        stmt = stmt.where(models.DailyTotal.date <= end_date)
+    stmt = stmt.group_by(models.DailyTotal.category).order_by(func.sum(models.DailyTotal.total).desc())
+    return db.execute(stmt).all()
+
+def get_period_totals(db: Session, freq: str = "D") -> pd.DataFrame:
+    """
+    Per-period expense totals computed by the database, as a DataFrame with columns
+    'date' (datetime64) and 'amount' (float64), sorted by date.
+    Reads the daily_totals rollup, so the cost depends on the number of days and
+    categories, not on the number of expense rows. Frequencies the dialect cannot
+    bucket natively are grouped per day; callers resample to `freq` anyway.
+    """
+    col = models.DailyTotal.date
+    bucket_fn = _SQLITE_BUCKETS.get(freq) if db.get_bind().dialect.name == "sqlite" else None
+    bucket = bucket_fn(col) if bucket_fn else col
+    stmt = select(bucket.label("period"), func.sum(models.DailyTotal.total)).group_by(bucket).order_by(bucket)
+    rows = db.execute(stmt).all()
+    if not rows:
+        return pd.DataFrame({"date": pd.to_datetime([]), "amount": np.array([], dtype=float)})
+    periods, totals = zip(*rows)
+    return pd.DataFrame({"date": pd.to_datetime(list(periods)), "amount": np.asarray(totals, dtype=float)})
+
+def get_period_category_totals(db: Session, freq: str = "D") -> pd.DataFrame:
+    """
+    Like get_period_totals, but one row per (period, category): columns 'date',
+    'category' ("" for uncategorized) and 'amount'.
+    """
+    col = models.DailyTotal.date
+    bucket_fn = _SQLITE_BUCKETS.get(freq) if db.get_bind().dialect.name == "sqlite" else None
+    bucket = bucket_fn(col) if bucket_fn else col
+    stmt = (
+        select(bucket.label("period"), models.DailyTotal.category, func.sum(models.DailyTotal.total))
+        .group_by(bucket, models.DailyTotal.category)
+        .order_by(bucket)
+    )
+    rows = db.execute(stmt).all()
+    if not rows:
+        return pd.DataFrame({"date": pd.to_datetime([]), "category": pd.Series([], dtype=object),
+                             "amount": np.array([], dtype=float)})
+    periods, categories, totals = zip(*rows)
+    return pd.DataFrame({"date": pd.to_datetime(list(periods)), "category": list(categories),
+                         "amount": np.asarray(totals, dtype=float)})
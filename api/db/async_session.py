@@ -0,0 +1,45 @@
+# api/db/async_session.py
+# Async counterpart of api/db/session.py, used when config.DB_ASYNC is enabled.
+# Requires an async driver (aiosqlite for SQLite).
+import os
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+from . import config
+from .config import ASYNC_DATABASE_URL
+from .session import _apply_sqlite_pragmas, _is_memory_sqlite
+
+
+def make_async_engine(url: str = ASYNC_DATABASE_URL, **kwargs):
+    sa_url = make_url(url)
+    if sa_url.get_backend_name() != "sqlite":
+        kwargs.setdefault("pool_size", config.DB_POOL_SIZE)
+        kwargs.setdefault("max_overflow", config.DB_MAX_OVERFLOW)
+        kwargs.setdefault("pool_timeout", config.DB_POOL_TIMEOUT)
+        return create_async_engine(url, **kwargs)
+
+    if _is_memory_sqlite(sa_url):
+        return create_async_engine(url, poolclass=StaticPool, **kwargs)
+
+    os.makedirs(os.path.dirname(os.path.abspath(sa_url.database)), exist_ok=True)
+    kwargs.setdefault("pool_size", config.DB_POOL_SIZE)
+    kwargs.setdefault("max_overflow", config.DB_MAX_OVERFLOW)
+    kwargs.setdefault("pool_timeout", config.DB_POOL_TIMEOUT)
+    new_engine = create_async_engine(url, **kwargs)
+
+    # same per-connection pragmas as the sync engine (the listener runs on the adapted DBAPI connection)
+    @event.listens_for(new_engine.sync_engine, "connect")
+    def _on_connect(dbapi_conn, _record):
+        _apply_sqlite_pragmas(dbapi_conn)
+
+    return new_engine
+
+
+async_engine = make_async_engine(ASYNC_DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# Dependency for async FastAPI routes
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
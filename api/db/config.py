@@ -6,3 +6,26 @@ load_dotenv()
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{os.path.join(BASE_DIR, '..', 'data', 'expenses.db')}")
+
+# Connection pool (applies to file databases; in-memory SQLite uses a single shared connection).
+# pool_size + max_overflow should cover FastAPI's 40-thread pool: sync routes hold a connection until
+# get_db's teardown runs, which itself needs a free thread.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+# SQLite pragmas applied to every new connection
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))  # 64 MiB page cache per connection
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+# Serve the expense routes from the async engine/session stack (api/db/async_session.py)
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes")
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or next(
+    (SQLALCHEMY_DATABASE_URL.replace(f"{sync}:", f"{drv}:", 1) for sync, drv in _ASYNC_DRIVERS.items()
+     if SQLALCHEMY_DATABASE_URL.startswith(f"{sync}:")),
+    SQLALCHEMY_DATABASE_URL,
+)
@@ -1,5 +1,5 @@
 # api/db/models.py
-from sqlalchemy import Column, Integer, String, Date, Float
+from sqlalchemy import Column, Integer, String, Date, Float, Index
 from .session import Base
 import datetime
 
@@ -11,3 +11,32 @@ class Expense(Base):
     description = Column(String(512), nullable=False)
     amount = Column(Float, nullable=False)
     category = Column(String(128), nullable=True)
+
+    __table_args__ = (
+        # backs ORDER BY date DESC, id DESC and the (date, id) keyset cursor
+        Index("ix_expenses_date_id", "date", "id"),
+    )
+
+
+class DailyTotal(Base):
+    """
+    Rollup of expenses per (date, category), kept in sync by api/services/rollup_service.py.
+    Uncategorized expenses are counted under category "".
+    """
+    __tablename__ = "daily_totals"
+
+    date = Column(Date, primary_key=True)
+    category = Column(String(128), primary_key=True, default="")
+    total = Column(Float, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class LedgerVersion(Base):
+    """
+    Single-row counter bumped in the same transaction as every write to expenses.
+    A cheap, cross-process fingerprint of the ledger used to key derived caches.
+    """
+    __tablename__ = "ledger_version"
+
+    id = Column(Integer, primary_key=True, default=1)
+    version = Column(Integer, nullable=False, default=0)
@@ -1,12 +1,80 @@
 # api/db/session.py
-from sqlalchemy import create_engine
+import os
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import StaticPool
+from . import config
 from .config import SQLALCHEMY_DATABASE_URL
 
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def _apply_sqlite_pragmas(dbapi_conn, read_only: bool = False):
+    cur = dbapi_conn.cursor()
+    if not read_only:
+        # journal_mode is persistent in the file; read-only connections just inherit it
+        cur.execute(f"PRAGMA journal_mode={config.SQLITE_JOURNAL_MODE}")
+    cur.execute(f"PRAGMA synchronous={config.SQLITE_SYNCHRONOUS}")
+    cur.execute(f"PRAGMA cache_size=-{config.SQLITE_CACHE_SIZE_KB}")
+    cur.execute(f"PRAGMA mmap_size={config.SQLITE_MMAP_SIZE}")
+    cur.execute(f"PRAGMA busy_timeout={config.SQLITE_BUSY_TIMEOUT_MS}")
+    cur.execute("PRAGMA temp_store=MEMORY")
+    cur.close()
+
+
+def make_engine(url: str = SQLALCHEMY_DATABASE_URL, read_only: bool = False, tuned: bool = True, **kwargs) -> Engine:
+    """
+    Build an engine for `url`. For SQLite files every pooled connection gets the
+    pragmas from api/db/config.py (tuned=False skips them, used by the benchmark),
+    and read_only=True opens the file with mode=ro so the connection can never write.
+    """
+    sa_url = make_url(url)
+    if sa_url.get_backend_name() != "sqlite":
+        kwargs.setdefault("pool_size", config.DB_POOL_SIZE)
+        kwargs.setdefault("max_overflow", config.DB_MAX_OVERFLOW)
+        kwargs.setdefault("pool_timeout", config.DB_POOL_TIMEOUT)
+        kwargs.setdefault("pool_pre_ping", True)
+        return create_engine(url, **kwargs)
+
+    connect_args = {"check_same_thread": False}
+    if _is_memory_sqlite(sa_url):
+        # every connection to :memory: is a new empty database, so share one
+        return create_engine(url, connect_args=connect_args, poolclass=StaticPool, **kwargs)
+
+    db_path = os.path.abspath(sa_url.database)
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    if read_only:
+        sa_url = sa_url.set(database=f"file:{db_path}?mode=ro", query={**sa_url.query, "uri": "true"})
+
+    kwargs.setdefault("pool_size", config.DB_POOL_SIZE)
+    kwargs.setdefault("max_overflow", config.DB_MAX_OVERFLOW)
+    kwargs.setdefault("pool_timeout", config.DB_POOL_TIMEOUT)
+    new_engine = create_engine(sa_url, connect_args=connect_args, **kwargs)
+
+    if tuned:
+        @event.listens_for(new_engine, "connect")
+        def _on_connect(dbapi_conn, _record):
+            _apply_sqlite_pragmas(dbapi_conn, read_only=read_only)
+
+    return new_engine
+
+
 # echo=True for debug SQL logs
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False} if "sqlite" in SQLALCHEMY_DATABASE_URL else {})
+engine = make_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Read-only engine for reporting paths (forecast, exports). For in-memory or
+# non-SQLite databases it is simply the main engine.
+_url = make_url(SQLALCHEMY_DATABASE_URL)
+if _url.get_backend_name() == "sqlite" and not _is_memory_sqlite(_url):
+    read_engine = make_engine(SQLALCHEMY_DATABASE_URL, read_only=True)
+else:
+    read_engine = engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
 Base = declarative_base()
 
 # Dependency for FastAPI routes
@@ -16,3 +84,11 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Dependency for routes that only read
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
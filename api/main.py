@@ -1,28 +1,70 @@
 
 # api/main.py
+import os
 import uvicorn
 from fastapi import FastAPI
 
+# DB
+from api.db.session import engine, SessionLocal
+from api.db import models
+from api.services import rollup_service
+from api.db.config import DB_ASYNC
+from api.ml.classifier import classifier_provider, ONLINE
+
 # Routers
-from api.routers import expenses
+from api.routers import expense_bulk
 from api.routers import ml_routes 
 from api.routers import forecast   
-
-# DB
-from api.db.session import engine
-from api.db import models
+from api.routers import summary
+if DB_ASYNC:
+    from api.routers import async_expenses as expenses
+else:
+    from api.routers import expenses
 
 app = FastAPI(title="AI Expense Assistant - API")
 
-# Include routers
+# load the classifier at startup rather than on the first /ml request
+CLASSIFIER_WARMUP = os.getenv("CLASSIFIER_WARMUP", "true").lower() in ("1", "true", "yes")
+
+# Include routers (bulk first: /expenses/import|export must win over /expenses/{expense_id})
+app.include_router(expense_bulk.router)
 app.include_router(expenses.router)
 app.include_router(ml_routes.router)
 app.include_router(forecast.router)   
+app.include_router(summary.router)
 
 
 @app.on_event("startup")
 def startup():
     models.Base.metadata.create_all(bind=engine)
+    # create_all skips existing tables, so add indexes introduced after a table was created
+    for index in models.Expense.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+    # backfill the daily_totals rollup for databases created before it existed
+    with SessionLocal() as db:
+        rollup_service.ensure_built(db)
+    if CLASSIFIER_WARMUP:
+        classifier_provider.warmup()
+    if ONLINE:
+        # fold new corrections from the misclassification log into the served model
+        from api.services.online_learning import online_updater
+        online_updater.start()
+
+if DB_ASYNC:
+    @app.on_event("startup")
+    async def async_startup():
+        # no-op for file databases already created above; needed for in-memory SQLite
+        from api.db.async_session import async_engine
+        async with async_engine.begin() as conn:
+            await conn.run_sync(models.Base.metadata.create_all)
+
+@app.on_event("shutdown")
+def shutdown():
+    from api.services.training_jobs import job_manager
+    job_manager.shutdown(wait=False)
+    if ONLINE:
+        from api.services.online_learning import online_updater
+        online_updater.stop(timeout=5)
 
 @app.get("/", tags=["root"])
 def root():
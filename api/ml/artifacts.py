@@ -0,0 +1,131 @@
+# api/ml/artifacts.py
+"""
+Memory-mappable classifier bundle for the TF-IDF + MultinomialNB pipeline.
+
+A pickled Pipeline is unpickled privately by every worker, including the
+vocabulary dict (one Python str + dict slot per term). The bundle instead stores
+only NumPy arrays in one uncompressed joblib file:
+
+    terms             sorted vocabulary as fixed-width UTF-8 bytes (lookup: searchsorted)
+    idf               idf weight per term
+    feature_log_prob  (n_terms, n_classes), one contiguous row per term
+    class_log_prior   (n_classes,)
+
+plus the classes and the analyzer settings. load_bundle() opens it with
+joblib mmap_mode="r", so the arrays live in the OS page cache and are shared by
+every worker process that maps the same file. BundleScorer reproduces
+pipeline.predict_proba on top of it.
+
+Mapped files must never be rewritten in place (readers would fault on the
+truncated pages); new versions are written to a temp file and renamed over the
+old path, which leaves existing mappings on the old inode intact.
+"""
+import os
+from typing import Any, Dict, List, Sequence
+
+import joblib
+import numpy as np
+from scipy.special import logsumexp
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from api.ml.registry import atomic_joblib_dump
+
+BUNDLE_FORMAT = "expense-classifier-bundle/1"
+# TfidfVectorizer settings that decide how text becomes terms
+ANALYZER_PARAMS = ("lowercase", "ngram_range", "token_pattern", "strip_accents", "stop_words", "analyzer")
+
+
+def is_bundle(obj: Any) -> bool:
+    return isinstance(obj, dict) and obj.get("format") == BUNDLE_FORMAT
+
+
+def export_bundle(pipeline, path: str) -> Dict[str, Any]:
+    """Write the bundle for a fitted Pipeline([("tfidf", TfidfVectorizer), ("clf", MultinomialNB)])."""
+    vectorizer, nb = pipeline[0], pipeline[-1]
+    params = vectorizer.get_params()
+    if callable(params["analyzer"]) or params["tokenizer"] is not None or params["preprocessor"] is not None:
+        raise ValueError("custom analyzers / tokenizers cannot be exported to a bundle")
+    if params["norm"] not in ("l2", None) or params["binary"]:
+        raise ValueError(f"unsupported vectorizer settings: norm={params['norm']!r} binary={params['binary']}")
+
+    terms = sorted(vectorizer.vocabulary_, key=lambda t: t.encode("utf-8"))
+    columns = np.fromiter((vectorizer.vocabulary_[t] for t in terms), dtype=np.int64, count=len(terms))
+    idf = vectorizer.idf_[columns] if params["use_idf"] else np.ones(len(terms))
+    bundle = {
+        "format": BUNDLE_FORMAT,
+        "classes": [str(c) for c in nb.classes_],
+        "analyzer": {k: params[k] for k in ANALYZER_PARAMS},
+        "norm": params["norm"],
+        "sublinear_tf": params["sublinear_tf"],
+        "terms": np.array([t.encode("utf-8") for t in terms], dtype=bytes),
+        "idf": np.ascontiguousarray(idf, dtype=np.float64),
+        "feature_log_prob": np.ascontiguousarray(nb.feature_log_prob_[:, columns].T, dtype=np.float64),
+        "class_log_prior": np.asarray(nb.class_log_prior_, dtype=np.float64),
+    }
+    # uncompressed, so load_bundle can memory-map the arrays
+    atomic_joblib_dump(bundle, path)
+    return {"terms": len(terms), "classes": len(bundle["classes"]), "bytes": os.path.getsize(path)}
+
+
+def load_bundle(path: str, mmap: bool = True) -> Dict[str, Any]:
+    bundle = joblib.load(path, mmap_mode="r" if mmap else None)
+    if not is_bundle(bundle):
+        raise ValueError(f"{path} is not a classifier bundle")
+    return bundle
+
+
+class BundleScorer:
+    """predict_proba of the exported pipeline, computed from (memory-mapped) bundle arrays."""
+
+    def __init__(self, bundle: Dict[str, Any]):
+        self.classes_ = np.array(bundle["classes"], dtype=object)
+        self.terms = bundle["terms"]
+        self.idf = bundle["idf"]
+        self.feature_log_prob = bundle["feature_log_prob"]
+        self.class_log_prior = bundle["class_log_prior"]
+        self.norm = bundle["norm"]
+        self.sublinear_tf = bundle["sublinear_tf"]
+        # sklearn's own analyzer, so tokenization and n-grams match the trained vectorizer exactly
+        self.analyze = TfidfVectorizer(**bundle["analyzer"]).build_analyzer()
+
+    def _term_ids(self, tokens: List[str]) -> np.ndarray:
+        """Vocabulary index per token, -1 for unknown tokens."""
+        if not tokens or len(self.terms) == 0:
+            return np.full(len(tokens), -1, dtype=np.int64)
+        encoded = [t.encode("utf-8") for t in tokens]
+        width = self.terms.dtype.itemsize
+        probe = np.array(encoded, dtype=self.terms.dtype)  # truncates tokens longer than any term
+        idx = np.minimum(np.searchsorted(self.terms, probe), len(self.terms) - 1)
+        fits = np.fromiter((len(e) <= width for e in encoded), dtype=bool, count=len(encoded))
+        return np.where((self.terms[idx] == probe) & fits, idx, -1)
+
+    def _weights(self, texts: Sequence[str]):
+        """
+        TF-IDF entries as (doc, term, value) arrays, like one row per text of the
+        vectorizer output. Only the idf / feature_log_prob rows of terms that occur
+        are read, so a mapped bundle stays mostly on disk / in the shared page cache.
+        """
+        doc_ids: List[int] = []
+        tokens: List[str] = []
+        for i, text in enumerate(texts):
+            toks = self.analyze(text)
+            tokens.extend(toks)
+            doc_ids.extend([i] * len(toks))
+        ids = self._term_ids(tokens)
+        known = ids >= 0
+        keys, tf = np.unique(np.asarray(doc_ids, dtype=np.int64)[known] * len(self.terms) + ids[known], return_counts=True)
+        doc, term = np.divmod(keys, len(self.terms)) if len(self.terms) else (keys, keys)
+        values = tf.astype(np.float64)
+        if self.sublinear_tf:
+            values = np.log(values) + 1
+        values *= self.idf[term]
+        if self.norm == "l2":
+            norms = np.sqrt(np.bincount(doc, weights=values ** 2, minlength=len(texts)))
+            values /= norms[doc]
+        return doc, term, values
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        doc, term, values = self._weights(texts)
+        jll = np.tile(np.asarray(self.class_log_prior), (len(texts), 1))
+        np.add.at(jll, doc, values[:, None] * self.feature_log_prob[term])
+        return np.exp(jll - logsumexp(jll, axis=1, keepdims=True))
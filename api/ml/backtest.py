@@ -0,0 +1,94 @@
+# api/ml/backtest.py
+"""
+Rolling-origin backtesting of the forecast models.
+
+The expense series is aggregated once; each fold trains on everything before a
+cutoff and forecasts the next `horizon` periods, which are compared with what
+actually happened. Folds (for every model type) run in parallel on a joblib
+process pool. Reports MAE / MAPE per horizon step plus mean fit and predict time.
+"""
+from __future__ import annotations
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+from api.ml import forecast as ml
+
+# Worker processes for backtest folds (-1 = one per core)
+BACKTEST_JOBS = int(os.getenv("FORECAST_BACKTEST_JOBS", "-1"))
+
+
+def rolling_origin_cutoffs(n: int, horizon: int, n_folds: int, min_train: int) -> List[int]:
+    """
+    Training lengths for up to n_folds folds, evenly spaced and ending so the last
+    fold's horizon reaches the end of the series. Each fold trains on >= min_train periods.
+    """
+    last = n - horizon
+    if last < min_train:
+        return []
+    step = max(1, (last - min_train) // max(n_folds - 1, 1))
+    return sorted({c for c in (last - i * step for i in range(n_folds)) if c >= min_train})
+
+
+def _run_fold(agg: pd.DataFrame, cutoff: int, horizon: int, freq: str, model_type: str) -> Dict[str, Any]:
+    # executed in a worker process
+    train_df = ml._detect_and_handle_outliers(agg.iloc[:cutoff])
+    actual = agg["y"].to_numpy(dtype=float)[cutoff:cutoff + horizon]
+    t0 = time.perf_counter()
+    model = ml._fit(train_df, model_type, freq=freq)
+    t1 = time.perf_counter()
+    # lr / prophet return history plus horizon, hw the horizon only
+    predicted = ml._predict(model, model_type, periods=horizon, freq=freq)["yhat"].to_numpy(dtype=float)[-horizon:]
+    t2 = time.perf_counter()
+    return {"model_type": model_type, "cutoff": cutoff, "error": predicted - actual, "actual": actual,
+            "fit_seconds": t1 - t0, "predict_seconds": t2 - t1}
+
+
+def _summarize(folds: List[Dict[str, Any]], horizon: int) -> Dict[str, Any]:
+    errors = np.abs(np.stack([f["error"] for f in folds]))  # (folds, horizon)
+    actual = np.abs(np.stack([f["actual"] for f in folds]))
+    # MAPE is undefined on periods without spending; those are left out
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = np.where(actual > 0, errors / actual, np.nan)
+    mape_h = [None if np.isnan(pct[:, h]).all() else float(np.nanmean(pct[:, h]) * 100) for h in range(horizon)]
+    return {
+        "mae": float(errors.mean()),
+        "mape": None if np.isnan(pct).all() else float(np.nanmean(pct) * 100),
+        "by_horizon": [{"h": h + 1, "mae": float(errors[:, h].mean()), "mape": mape_h[h]} for h in range(horizon)],
+        "fit_seconds": float(np.mean([f["fit_seconds"] for f in folds])),
+        "predict_seconds": float(np.mean([f["predict_seconds"] for f in folds])),
+    }
+
+
+def backtest(expenses_df: pd.DataFrame, model_types: Sequence[str] = ("lr", "hw", "prophet"), freq: str = "D",
+             horizon: int = 14, n_folds: int = 5, min_train: Optional[int] = None,
+             n_jobs: int = BACKTEST_JOBS) -> Dict[str, Any]:
+    """
+    Rolling-origin cross-validation of every model type on expenses_df ('date', 'amount').
+    Model types that are unavailable here (prophet without the package) are skipped.
+    Raises ValueError if the series is too short for a single fold.
+    """
+    agg = ml._aggregate_expenses(expenses_df, freq=freq)
+    if min_train is None:
+        min_train = max(2 * ml.HW_SEASON_LENGTHS.get(freq, 1), horizon, 2)
+    cutoffs = rolling_origin_cutoffs(len(agg), horizon, n_folds, min_train)
+    if not cutoffs:
+        raise ValueError(f"need at least {min_train + horizon} periods for a backtest, have {len(agg)}")
+    # dedupe while keeping order, e.g. prophet -> lr when Prophet is missing
+    models = [m for m in dict.fromkeys(model_types) if ml._effective_model_type(m) == m]
+
+    started = time.perf_counter()
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_run_fold)(agg, c, horizon, freq, m) for m in models for c in cutoffs
+    )
+    return {
+        "freq": freq,
+        "horizon": horizon,
+        "cutoffs": [str(agg["ds"].iloc[c].date()) for c in cutoffs],
+        "models": {m: _summarize([r for r in results if r["model_type"] == m], horizon) for m in models},
+        "wall_seconds": round(time.perf_counter() - started, 4),
+    }
@@ -1,26 +1,363 @@
 # api/ml/classifier.py
+import hashlib
+import logging
 import os
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
 import joblib
-from typing import Optional
+import numpy as np
+from typing import Optional, List, Sequence, Tuple, Dict, Any, Callable
+
+from api.ml import artifacts, compiled, online
+from api.ml.preprocessing import clean_text
+from api.ml.rules import RuleEngine, merchant_rules
+
+logger = logging.getLogger(__name__)
 
 BASE_DIR = Path(__file__).resolve().parent
-MODEL_PATH = BASE_DIR.parent.parent / "ml" / "expense_classifier.pkl"
+PICKLE_PATH = BASE_DIR.parent.parent / "ml" / "expense_classifier.pkl"
+# memory-mappable export of the same model (see api/ml/artifacts.py), shared by all workers
+BUNDLE_PATH = BASE_DIR.parent.parent / "ml" / "expense_classifier.bundle"
+# lookup-table export scored without sklearn (see api/ml/compiled.py), lowest latency
+COMPILED_PATH = BASE_DIR.parent.parent / "ml" / "expense_classifier.compiled"
+# incrementally updated model (see api/ml/online.py); served instead when CLASSIFIER_ONLINE is on
+ONLINE_PATH = BASE_DIR.parent.parent / "ml" / "expense_classifier.online"
+ONLINE = os.getenv("CLASSIFIER_ONLINE", "false").lower() in ("1", "true", "yes")
+# Which offline export to serve: compiled | bundle | pickle. The bundle is the default because its
+# vocabulary is memory-mapped and shared by every worker; the compiled table is faster per call but
+# each worker unpickles a private copy of it, which for large vocabularies costs more memory than
+# the pickle, so it is opt-in (single-worker or small-vocabulary deployments).
+CLASSIFIER_FORMAT = os.getenv("CLASSIFIER_FORMAT", "bundle").lower()
+
+
+def _default_model_path() -> Path:
+    if ONLINE:
+        if ONLINE_PATH.exists():
+            return ONLINE_PATH
+        logger.warning("CLASSIFIER_ONLINE is set but %s does not exist (bootstrap it with "
+                       "scripts/train_classifier.py --online-out); serving the offline model", ONLINE_PATH)
+    paths = {"compiled": COMPILED_PATH, "bundle": BUNDLE_PATH, "pickle": PICKLE_PATH}
+    if CLASSIFIER_FORMAT not in paths:
+        logger.warning("Unknown CLASSIFIER_FORMAT %r (expected one of %s); using bundle",
+                       CLASSIFIER_FORMAT, ", ".join(paths))
+    requested = paths.get(CLASSIFIER_FORMAT, BUNDLE_PATH)
+    if requested.exists():
+        return requested
+    if requested == COMPILED_PATH:
+        logger.warning("CLASSIFIER_FORMAT=compiled but %s does not exist; serving the bundle or pickle", requested)
+    # the bundle is optional; the pickle is always written by training
+    return BUNDLE_PATH if BUNDLE_PATH.exists() else PICKLE_PATH
+
+
+# CLASSIFIER_MODEL_PATH overrides the CLASSIFIER_ONLINE / CLASSIFIER_FORMAT choice above
+MODEL_PATH = Path(os.getenv("CLASSIFIER_MODEL_PATH") or _default_model_path())
+CACHE_SIZE = int(os.getenv("CLASSIFIER_CACHE_SIZE", "4096"))
+# How often (seconds) the shared provider stats the model file for a new version
+RELOAD_CHECK_SECONDS = float(os.getenv("CLASSIFIER_RELOAD_CHECK_SECONDS", "2"))
+# Merchant rules (api/ml/rules.py) answer before the model for the shared classifier
+MERCHANT_RULES = os.getenv("MERCHANT_RULES", "true").lower() in ("1", "true", "yes")
 
 class ExpenseClassifier:
-    def __init__(self, model_path: Optional[str] = None):
+    def __init__(self, model_path: Optional[str] = None, cache_size: int = CACHE_SIZE, auto_reload: bool = True,
+                 rules: Optional[RuleEngine] = None):
         path = model_path or MODEL_PATH
         if not Path(path).exists():
             raise FileNotFoundError(f"Model not found at {path}. Train it with scripts/train_classifier.py")
-        self.pipeline = joblib.load(path)
+        self.model_path = Path(path)
+        self.cache_size = cache_size
+        # ClassifierProvider swaps whole instances instead, so it turns in-place reloads off
+        self.auto_reload = auto_reload
+        # texts a rule matches get that category with probability 1 and skip the model
+        self.rules = rules
+        # normalized description -> row of class probabilities, most recently used last
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "reloads": 0}
+        self._load()
+
+    def _file_signature(self):
+        st = os.stat(self.model_path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def _load(self):
+        self._signature = self._file_signature()
+        # arrays of uncompressed artifacts are memory-mapped read-only instead of copied into the process
+        model = joblib.load(self.model_path, mmap_mode="r")
+        if compiled.is_compiled(model):
+            self.pipeline = None
+            self.scorer = compiled.CompiledScorer(model)
+        elif online.is_online(model):
+            self.pipeline = None
+            self.scorer = online.OnlineScorer(model)
+        elif artifacts.is_bundle(model):
+            self.pipeline = None
+            self.scorer = artifacts.BundleScorer(model)
+        else:
+            self.pipeline = model
+            self.scorer = None
+        self.classes_ = self.scorer.classes_ if self.scorer is not None else self.pipeline.classes_
+
+    def _check_model_file(self):
+        """
+        Reload the pipeline and drop every cached prediction when the model file
+        on disk has been replaced (different mtime or size).
+        """
+        if not self.auto_reload or self._file_signature() == self._signature:
+            return
+        with self._lock:
+            if self._file_signature() != self._signature:
+                self._load()
+                self._cache.clear()
+                self._stats["reloads"] += 1
+
+    def _proba_matrix(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Score already-normalized texts: run the vectorizer once over all of them and
+        feed the whole sparse matrix to the final estimator. Returns (n_texts, n_classes).
+        """
+        if self.scorer is not None:
+            return self.scorer.predict_proba(list(texts))
+        features = self.pipeline[:-1].transform(list(texts))
+        return self.pipeline[-1].predict_proba(features)
+
+    def _cached_proba(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Probability rows for raw texts. Cache hits are served directly, all misses
+        are scored together in one vectorized pass and then cached.
+        """
+        self._check_model_file()
+        keys = [clean_text(t) for t in texts]
+        rows: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for key in keys:
+                if key in rows:
+                    continue
+                row = self._cache.get(key)
+                if row is not None:
+                    self._cache.move_to_end(key)
+                    self._stats["hits"] += 1
+                    rows[key] = row
+        missing = [k for k in dict.fromkeys(keys) if k not in rows]
+        if missing:
+            probs = self._proba_matrix(missing)
+            with self._lock:
+                for key, row in zip(missing, probs):
+                    rows[key] = row
+                    self._stats["misses"] += 1
+                    if self.cache_size <= 0:
+                        continue
+                    self._cache[key] = row
+                    self._cache.move_to_end(key)
+                    if len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+                        self._stats["evictions"] += 1
+        return np.vstack([rows[k] for k in keys])
+
+    def _with_rules(self, texts: Sequence[str], model_fn: Callable[[Sequence[str]], list],
+                    rule_result: Callable[[str], Any]) -> list:
+        """model_fn(texts) for the texts no rule matches, rule_result(category) for the others, in input order."""
+        categories = self.rules.match_batch(texts) if self.rules is not None else None
+        if categories is None or all(c is None for c in categories):
+            return model_fn(texts)
+        misses = [t for t, c in zip(texts, categories) if c is None]
+        from_model = iter(model_fn(misses) if misses else [])
+        return [rule_result(c) if c is not None else next(from_model) for c in categories]
+
+    def _rule_row(self, category: str, top_k: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        Probability row for a rule hit, shaped like the model's: every class with the
+        rule's category at 1.0 and the rest at 0.0 (a category the model does not know
+        is appended). With top_k set the rule's category comes first.
+        """
+        labels = [str(l) for l in self.classes_]
+        if category not in labels:
+            labels.append(category)
+        row = [(label, 1.0 if label == category else 0.0) for label in labels]
+        if top_k is None:
+            return row
+        return sorted(row, key=lambda lp: -lp[1])[:top_k]
+
+    def classify(self, text: str) -> Tuple[str, List[Tuple[str, float]]]:
+        # one inference -> (predicted label, list of (label, probability))
+        return self.classify_batch([text])[0]
+
+    def classify_batch(self, texts: Sequence[str]) -> List[Tuple[str, List[Tuple[str, float]]]]:
+        # classify() for many texts with one vectorized pass over the cache misses
+        if len(texts) == 0:
+            return []
+        return self._with_rules(texts, self._classify_model, lambda c: (c, self._rule_row(c)))
+
+    def _classify_model(self, texts: Sequence[str]) -> List[Tuple[str, List[Tuple[str, float]]]]:
+        probs = self._cached_proba(texts)
+        labels = [str(l) for l in self.classes_]
+        best = probs.argmax(axis=1)
+        return [(labels[b], list(zip(labels, row))) for b, row in zip(best, probs.tolist())]
 
     def predict(self, text: str) -> str:
         # text -> single predicted category label (string)
-        pred = self.pipeline.predict([text])[0]
-        return str(pred)
+        return self.classify(text)[0]
 
     def predict_proba(self, text: str):
         # returns list of (label, probability)
-        probs = self.pipeline.predict_proba([text])[0]
-        labels = self.pipeline.classes_
-        return list(zip(labels, probs))
+        return self.classify(text)[1]
+
+    def predict_batch(self, texts: Sequence[str]) -> List[str]:
+        # texts -> list of predicted category labels, same order as input
+        if len(texts) == 0:
+            return []
+        return self._with_rules(texts, self._predict_model, lambda c: c)
+
+    def _predict_model(self, texts: Sequence[str]) -> List[str]:
+        probs = self._cached_proba(texts)
+        labels = self.classes_
+        return [str(label) for label in labels[probs.argmax(axis=1)]]
+
+    def predict_proba_batch(self, texts: Sequence[str], top_k: Optional[int] = None) -> List[List[Tuple[str, float]]]:
+        """
+        Returns one list of (label, probability) per text. With top_k set, only the
+        k most likely labels are kept, sorted by probability (highest first).
+        """
+        if len(texts) == 0:
+            return []
+        return self._with_rules(texts, lambda misses: self._proba_rows(misses, top_k),
+                                lambda c: self._rule_row(c, top_k))
+
+    def _proba_rows(self, texts: Sequence[str], top_k: Optional[int]) -> List[List[Tuple[str, float]]]:
+        probs = self._cached_proba(texts)
+        labels = self.classes_
+        n_classes = probs.shape[1]
+        if top_k is None:
+            # same label order as predict_proba
+            order = np.tile(np.arange(n_classes), (len(probs), 1))
+        elif top_k >= n_classes:
+            order = np.argsort(-probs, axis=1, kind="stable")
+        else:
+            # argpartition is O(n_classes) per row; only the k survivors get sorted
+            # (sorted by class index first so ties break the same way as argmax)
+            part = np.sort(np.argpartition(-probs, top_k - 1, axis=1)[:, :top_k], axis=1)
+            part_probs = np.take_along_axis(probs, part, axis=1)
+            order = np.take_along_axis(part, np.argsort(-part_probs, axis=1, kind="stable"), axis=1)
+        top_probs = np.take_along_axis(probs, order, axis=1)
+        return [
+            [(str(labels[j]), float(p)) for j, p in zip(row_idx, row_probs)]
+            for row_idx, row_probs in zip(order, top_probs)
+        ]
+
+    def cache_info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "size": len(self._cache), "max_size": self.cache_size}
+
+    def cache_clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+def _file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class ClassifierProvider:
+    """
+    One process-wide ExpenseClassifier, loaded on first use (or by warmup()).
+
+    Every `check_interval` seconds get() stats the model file; if its mtime/size
+    changed and its sha256 differs, a new ExpenseClassifier is loaded next to the
+    current one and the reference is swapped under a lock. Requests that already
+    hold the old instance finish on it; a file that fails to load (e.g. still being
+    written) is logged and the current model keeps serving.
+    """
+
+    def __init__(self, model_path: Optional[str] = None, cache_size: int = CACHE_SIZE,
+                 check_interval: float = RELOAD_CHECK_SECONDS, rules: Optional[RuleEngine] = None):
+        self.model_path = Path(model_path or MODEL_PATH)
+        self.rules = rules
+        self.cache_size = cache_size
+        self.check_interval = check_interval
+        self._classifier: Optional[ExpenseClassifier] = None
+        self._signature = None
+        self._sha256: Optional[str] = None
+        self._loaded_at: Optional[float] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._stats = {"loads": 0, "reloads": 0, "reload_errors": 0}
+
+    def _signature_now(self):
+        st = os.stat(self.model_path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def _load(self):
+        signature = self._signature_now()
+        digest = _file_sha256(self.model_path)
+        classifier = ExpenseClassifier(str(self.model_path), cache_size=self.cache_size, auto_reload=False,
+                                       rules=self.rules)
+        with self._lock:
+            replaced = self._classifier is not None
+            self._classifier = classifier
+            self._signature, self._sha256, self._loaded_at = signature, digest, time.time()
+            self._stats["reloads" if replaced else "loads"] += 1
+        return classifier
+
+    def _maybe_reload(self):
+        # only one thread checks / reloads at a time; the others keep using the current model
+        if not self._reload_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_check = time.monotonic() + self.check_interval
+            try:
+                signature = self._signature_now()
+            except FileNotFoundError:
+                return  # file being replaced; keep serving the loaded model
+            if signature == self._signature:
+                return
+            if _file_sha256(self.model_path) == self._sha256:
+                self._signature = signature  # touched, same content
+                return
+            try:
+                self._load()
+            except Exception:
+                self._stats["reload_errors"] += 1
+                logger.exception("Reloading classifier from %s failed; keeping the current model", self.model_path)
+        finally:
+            self._reload_lock.release()
+
+    def get(self) -> ExpenseClassifier:
+        """The current classifier. Raises FileNotFoundError if no model has been trained yet."""
+        classifier = self._classifier
+        if classifier is None:
+            with self._reload_lock:
+                if self._classifier is None:
+                    self._load()
+                    self._next_check = time.monotonic() + self.check_interval
+            return self._classifier
+        if time.monotonic() >= self._next_check:
+            self._maybe_reload()
+            classifier = self._classifier
+        return classifier
+
+    def warmup(self) -> bool:
+        """Load now (e.g. at startup) instead of on the first request. False if the model file is missing."""
+        try:
+            self.get()
+            return True
+        except FileNotFoundError:
+            logger.warning("Classifier model not found at %s; /ml endpoints will return 503 until it is trained", self.model_path)
+            return False
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "loaded": self._classifier is not None, "model_path": str(self.model_path),
+                    "sha256": self._sha256, "loaded_at": self._loaded_at}
+
+
+classifier_provider = ClassifierProvider(rules=merchant_rules if MERCHANT_RULES else None)
+
+
+def get_classifier() -> ExpenseClassifier:
+    return classifier_provider.get()
@@ -0,0 +1,146 @@
+# api/ml/compiled.py
+"""
+Compiled lookup-table form of the TF-IDF + MultinomialNB pipeline.
+
+export_compiled() turns the fitted vectorizer and classifier into one plain dict:
+
+    table             term -> (idf, (log P(term | class) for each class))
+    class_log_prior   log P(class) for each class
+
+plus the classes and the analyzer settings. CompiledScorer scores a text with the
+standard library only: tokenize like sklearn's word analyzer, count terms, weight
+them with idf (+ sublinear tf, l2 norm) and add the weighted rows to the prior.
+No input validation or sparse matrices are built, so a single description takes
+microseconds instead of the pipeline's fixed per-call overhead.
+
+The table is an ordinary per-process dict; for very large vocabularies shared
+across many workers, the memory-mapped bundle (api/ml/artifacts.py) is smaller.
+That is why the shared classifier only serves it with CLASSIFIER_FORMAT=compiled.
+"""
+import math
+import operator
+import re
+import unicodedata
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from api.ml.registry import atomic_joblib_dump
+
+COMPILED_FORMAT = "expense-classifier-compiled/1"
+
+
+def is_compiled(obj: Any) -> bool:
+    return isinstance(obj, dict) and obj.get("format") == COMPILED_FORMAT
+
+
+def export_compiled(pipeline, path: str) -> Dict[str, Any]:
+    """Write the lookup table for a fitted Pipeline([("tfidf", TfidfVectorizer), ("clf", MultinomialNB)])."""
+    vectorizer, nb = pipeline[0], pipeline[-1]
+    params = vectorizer.get_params()
+    if params["analyzer"] != "word" or params["tokenizer"] is not None or params["preprocessor"] is not None:
+        raise ValueError("only the built-in word analyzer can be compiled")
+    if params["norm"] not in ("l2", None) or params["binary"]:
+        raise ValueError(f"unsupported vectorizer settings: norm={params['norm']!r} binary={params['binary']}")
+    if params["strip_accents"] not in (None, "ascii", "unicode"):
+        raise ValueError(f"unsupported strip_accents: {params['strip_accents']!r}")
+
+    log_prob = nb.feature_log_prob_.T  # (n_terms, n_classes)
+    idf = vectorizer.idf_ if params["use_idf"] else None
+    table = {
+        term: (float(idf[col]) if idf is not None else 1.0, tuple(log_prob[col].tolist()))
+        for term, col in vectorizer.vocabulary_.items()
+    }
+    compiled = {
+        "format": COMPILED_FORMAT,
+        "classes": [str(c) for c in nb.classes_],
+        "class_log_prior": tuple(np.asarray(nb.class_log_prior_, dtype=float).tolist()),
+        "table": table,
+        "lowercase": params["lowercase"],
+        "strip_accents": params["strip_accents"],
+        "token_pattern": params["token_pattern"],
+        "ngram_range": tuple(params["ngram_range"]),
+        "stop_words": sorted(vectorizer.get_stop_words() or ()),
+        "norm": params["norm"],
+        "sublinear_tf": params["sublinear_tf"],
+    }
+    atomic_joblib_dump(compiled, path)
+    return {"terms": len(table), "classes": len(compiled["classes"])}
+
+
+def _strip_accents_unicode(s: str) -> str:
+    try:
+        s.encode("ASCII", errors="strict")
+        return s
+    except UnicodeEncodeError:
+        return "".join(c for c in unicodedata.normalize("NFKD", s) if not unicodedata.combining(c))
+
+
+def _strip_accents_ascii(s: str) -> str:
+    return unicodedata.normalize("NFKD", s).encode("ASCII", "ignore").decode("ASCII")
+
+
+class CompiledScorer:
+    """predict_proba of the exported pipeline from a compiled lookup table, without sklearn."""
+
+    def __init__(self, compiled: Dict[str, Any]):
+        self.classes_ = np.array(compiled["classes"], dtype=object)
+        self.table: Dict[str, Tuple[float, Tuple[float, ...]]] = compiled["table"]
+        self.class_log_prior: Tuple[float, ...] = tuple(compiled["class_log_prior"])
+        self.lowercase = compiled["lowercase"]
+        self.strip_accents = {None: None, "ascii": _strip_accents_ascii,
+                              "unicode": _strip_accents_unicode}[compiled["strip_accents"]]
+        self.token_re = re.compile(compiled["token_pattern"])
+        if self.token_re.groups > 1:
+            raise ValueError("token_pattern may have at most one capturing group")
+        self.min_n, self.max_n = compiled["ngram_range"]
+        self.stop_words = frozenset(compiled["stop_words"])
+        self.norm = compiled["norm"]
+        self.sublinear_tf = compiled["sublinear_tf"]
+
+    def analyze(self, text: str) -> List[str]:
+        """Same terms as TfidfVectorizer(analyzer="word").build_analyzer() with the exported settings."""
+        if self.lowercase:
+            text = text.lower()
+        if self.strip_accents is not None:
+            text = self.strip_accents(text)
+        tokens = self.token_re.findall(text)
+        if self.stop_words:
+            tokens = [t for t in tokens if t not in self.stop_words]
+        if self.max_n == 1:
+            return tokens
+        n_tokens = len(tokens)
+        terms = list(tokens) if self.min_n == 1 else []
+        for n in range(max(self.min_n, 2), min(self.max_n, n_tokens) + 1):
+            terms.extend(" ".join(tokens[i:i + n]) for i in range(n_tokens - n + 1))
+        return terms
+
+    def proba_one(self, text: str) -> List[float]:
+        """Class probabilities for one text, in classes_ order."""
+        counts: Dict[str, int] = {}
+        table = self.table
+        for term in self.analyze(text):
+            if term in table:
+                counts[term] = counts.get(term, 0) + 1
+
+        if counts:
+            weights, rows = [], []
+            for term, tf in counts.items():
+                idf, row = table[term]
+                weights.append((math.log(tf) + 1 if self.sublinear_tf else tf) * idf)
+                rows.append(row)
+            if self.norm == "l2":
+                scale = 1.0 / math.sqrt(math.fsum(w * w for w in weights))
+                weights = [w * scale for w in weights]
+            # prior + weights . log_prob column, per class
+            jll = [p + sum(map(operator.mul, weights, col)) for p, col in zip(self.class_log_prior, zip(*rows))]
+        else:
+            jll = list(self.class_log_prior)
+
+        top = max(jll)
+        exps = [math.exp(a - top) for a in jll]
+        total = math.fsum(exps)
+        return [e / total for e in exps]
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        return np.array([self.proba_one(t) for t in texts], dtype=float).reshape(len(texts), len(self.classes_))
@@ -1,11 +1,16 @@
 # api/ml/forecast.py
 from __future__ import annotations
 import os
-from typing import Tuple, Optional, Dict, Any
+import time
+from typing import Tuple, Optional, Dict, Any, Callable
 import pandas as pd
 import numpy as np
 from datetime import timedelta
 import joblib
+from joblib import Parallel, delayed
+
+from api.ml.locks import SingleFlight
+from api.ml.registry import ModelRegistry, atomic_joblib_dump, default_registry, series_fingerprint
 
 # Try Prophet, fall back to sklearn LinearRegression if Prophet not available
 try:
@@ -20,19 +25,30 @@ from sklearn.metrics import mean_absolute_error
 MODEL_DIR = os.getenv("ML_MODEL_DIR", "models")
 os.makedirs(MODEL_DIR, exist_ok=True)
 
+# concurrent requests that need the same model trained share one fit
+_training_flight = SingleFlight()
+
+# Start Prophet refits from the previous model's parameters
+WARM_START = os.getenv("FORECAST_PROPHET_WARM_START", "true").lower() in ("1", "true", "yes")
+
+# Worker processes for per-category Prophet fits (-1 = one per core)
+CATEGORY_JOBS = int(os.getenv("FORECAST_CATEGORY_JOBS", "-1"))
+
 
 def _aggregate_expenses(expenses_df: pd.DataFrame, freq: str = "D") -> pd.DataFrame:
     """
     expenses_df must have columns: 'date' (datetime-like), 'amount' (numeric).
-    Returns dataframe indexed by date with column 'y' (total amount) and column 'ds' for Prophet.
+    Rows may be raw expenses or totals already aggregated per period (e.g. from
+    crud.get_period_totals); summing again per period gives the same result.
+    Returns dataframe with column 'y' (total amount) and column 'ds' for Prophet.
     """
-    df = expenses_df.copy()
-    df["date"] = pd.to_datetime(df["date"])
-    df = df.set_index("date").sort_index()
+    amounts = pd.Series(
+        expenses_df["amount"].to_numpy(dtype=float),
+        index=pd.DatetimeIndex(pd.to_datetime(expenses_df["date"].to_numpy()), name="ds"),
+    )
     # Resample (fill missing with 0)
-    agg = df["amount"].resample(freq).sum().rename("y").to_frame()
-    agg = agg.reset_index().rename(columns={"date": "ds"})
-    return agg
+    agg = amounts.sort_index().resample(freq).sum().rename("y")
+    return agg.reset_index()
 
 
 def _detect_and_handle_outliers(df: pd.DataFrame, z_thresh: float = 3.0) -> pd.DataFrame:
@@ -50,34 +66,52 @@ def _detect_and_handle_outliers(df: pd.DataFrame, z_thresh: float = 3.0) -> pd.D
     return out
 
 
-def train_prophet(df: pd.DataFrame, model_name: str = "prophet_expense", kwargs: Optional[Dict[str, Any]] = None):
+def warm_start_params(model) -> Dict[str, Any]:
+    """Fitted parameters of a Prophet model, in the form Prophet.fit(init=...) passes to Stan."""
+    params = model.params
+    if model.mcmc_samples == 0:
+        scalars = {name: float(params[name][0][0]) for name in ("k", "m", "sigma_obs")}
+        vectors = {name: params[name][0] for name in ("delta", "beta")}
+    else:
+        scalars = {name: float(np.mean(params[name])) for name in ("k", "m", "sigma_obs")}
+        vectors = {name: np.mean(params[name], axis=0) for name in ("delta", "beta")}
+    return {**scalars, **vectors}
+
+
+def train_prophet(df: pd.DataFrame, model_name: str = "prophet_expense", kwargs: Optional[Dict[str, Any]] = None,
+                  init: Optional[Dict[str, Any]] = None):
     """
     Train a Prophet model on aggregated dataframe (ds, y). Returns a fitted model.
-    Saves model to disk as joblib.
+    `init` (see warm_start_params) starts the optimizer from a previous fit instead of from scratch.
+    Saves model to disk as joblib unless model_name is None.
     """
     if not PROPHET_AVAILABLE:
         raise RuntimeError("Prophet not available in environment.")
 
     kwargs = kwargs or {}
     m = Prophet(**kwargs)
-    m.fit(df)
-    filepath = os.path.join(MODEL_DIR, f"{model_name}.joblib")
-    joblib.dump(m, filepath)
+    if init is not None:
+        m.fit(df, init=init)
+    else:
+        m.fit(df)
+    if model_name:
+        atomic_joblib_dump(m, os.path.join(MODEL_DIR, f"{model_name}.joblib"))
     return m
 
 
 def train_linear_regression(df: pd.DataFrame, model_name: str = "lr_expense"):
     """
     Fallback simple model: use day index as feature for linear regression.
-    Saves model and scalers if needed.
+    Saves model to disk as joblib unless model_name is None.
     """
     X = (pd.to_datetime(df["ds"]) - pd.to_datetime(df["ds"].min())).dt.days.values.reshape(-1, 1)
     y = df["y"].values
     lr = LinearRegression()
     lr.fit(X, y)
-    artifact = {"model": lr, "start_date": str(df["ds"].min())}
-    filepath = os.path.join(MODEL_DIR, f"{model_name}.joblib")
-    joblib.dump(artifact, filepath)
+    # n_days (number of training periods) lets predict_with_lr rebuild the timeline
+    artifact = {"model": lr, "start_date": str(df["ds"].min()), "n_days": len(df)}
+    if model_name:
+        atomic_joblib_dump(artifact, os.path.join(MODEL_DIR, f"{model_name}.joblib"))
     return artifact
 
 
@@ -97,26 +131,121 @@ def predict_with_prophet(model, periods: int = 30, freq: str = "D") -> pd.DataFr
 
 
 def predict_with_lr(artifact: Dict[str, Any], periods: int = 30, freq: str = "D") -> pd.DataFrame:
+    if "n_days" not in artifact:
+        raise ValueError("LR artifact has no 'n_days' (saved by an older version); retrain the model")
     start = pd.to_datetime(artifact["start_date"])
-    # compute ordinal days for existing model and future
-    last_date = start
-    # find model's last trained day by loading a saved training frame? we stored start only; assume length from artifact if present
-    # For robustness user should pass original df; here we will create future based on start + range
-    # We'll reconstruct days from 0..n+periods-1, but need n; we cannot reconstruct n. So assume artifact contains 'n_days' optionally.
-    n_days = artifact.get("n_days", 30)
-    total = n_days + periods
-    days = np.arange(total).reshape(-1, 1)
+    # history (n_days periods) plus the horizon; the model was fit on days since start, whatever the freq
+    ds = pd.date_range(start=start, periods=artifact["n_days"] + periods, freq=freq)
+    days = (ds - start).days.values.reshape(-1, 1)
     preds = artifact["model"].predict(days)
-    # Build ds: start + days
-    ds = pd.date_range(start=start, periods=total, freq=freq)
     out = pd.DataFrame({"ds": ds, "yhat": preds})
     # For LR we do not have intervals — set approx +/-10% (naive)
     out["yhat_lower"] = out["yhat"] * 0.9
     out["yhat_upper"] = out["yhat"] * 1.1
-    # Keep only the last n_days-> future? For simplicity return all
     return out
 
 
+# Holt-Winters: season length per frequency, and the smoothing grid searched at fit time
+HW_SEASON_LENGTHS = {"D": 7, "W": 52, "MS": 12, "ME": 12, "QS": 4, "QE": 4}
+HW_ALPHAS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.7)
+HW_BETAS = (0.0, 0.01, 0.05, 0.1)
+HW_GAMMAS = (0.0, 0.05, 0.1, 0.3)
+HW_DAMPING = 0.98
+# z for an 80% interval, Prophet's default interval_width
+HW_INTERVAL_Z = 1.2816
+
+
+def _hw_run(y: np.ndarray, m: int, alpha: np.ndarray, beta: np.ndarray, gamma: np.ndarray, phi: float):
+    """
+    Additive damped-trend Holt-Winters recursion for G parameter sets at once.
+    Returns (level, trend, season (m x G), sse, one-step residuals (n x G)).
+    The loop runs over time only; each step updates all G states with in-place NumPy ops.
+    """
+    g = len(alpha)
+    level = np.full(g, y[:m].mean())
+    if m > 1 and len(y) >= 2 * m:
+        trend = np.full(g, (y[m:2 * m].mean() - y[:m].mean()) / m)
+    else:
+        trend = np.zeros(g)
+    season = np.repeat((y[:m] - y[:m].mean())[:, None], g, axis=1) if m > 1 else np.zeros((1, g))
+    resid = np.empty((len(y), g))
+    new_level, base, damped = np.empty(g), np.empty(g), np.empty(g)
+    for t, yt in enumerate(y):
+        s = season[t % m]
+        np.multiply(trend, phi, out=damped)
+        np.add(level, damped, out=base)
+        r = resid[t]
+        np.subtract(yt - s, base, out=r)
+        # level: alpha*(y - s) + (1 - alpha)*(level + damped) == base + alpha*r
+        np.multiply(alpha, r, out=new_level)
+        new_level += base
+        # trend: beta*(new_level - level) + (1 - beta)*damped == damped + beta*(new_level - base)
+        np.subtract(new_level, base, out=base)
+        base *= beta
+        np.add(base, damped, out=trend)
+        s += gamma * (yt - new_level - s)
+        level, new_level = new_level, level
+    # skip the first season, where the initial state is still settling
+    burn = min(m, len(y) - 1)
+    sse = (resid[burn:] ** 2).sum(axis=0)
+    return level, trend, season, sse, resid
+
+
+def train_holt_winters(df: pd.DataFrame, freq: str = "D", model_name: str = "hw_expense") -> Dict[str, Any]:
+    """
+    Pure-NumPy additive Holt-Winters (damped trend, seasonal period from freq, e.g.
+    weekly for daily data). Smoothing parameters are picked from a small grid by
+    in-sample one-step SSE; every grid point runs in the same vectorized pass.
+    Saves the artifact to disk as joblib unless model_name is None.
+    """
+    y = df["y"].to_numpy(dtype=float)
+    if len(y) == 0:
+        raise ValueError("cannot fit Holt-Winters on an empty series")
+    m = HW_SEASON_LENGTHS.get(freq, 1)
+    if len(y) < 2 * m:
+        m = 1  # not enough history for a seasonal pattern
+    grid = np.array(np.meshgrid(HW_ALPHAS, HW_BETAS, HW_GAMMAS if m > 1 else (0.0,), indexing="ij")).reshape(3, -1)
+    level, trend, season, sse, resid = _hw_run(y, m, grid[0], grid[1], grid[2], HW_DAMPING)
+    best = int(np.argmin(sse))
+    burn = min(m, len(y) - 1)
+    errors = resid[burn:, best]
+    artifact = {
+        "model_type": "hw",
+        "freq": freq,
+        "season_length": m,
+        "alpha": float(grid[0, best]),
+        "beta": float(grid[1, best]),
+        "gamma": float(grid[2, best]),
+        "phi": HW_DAMPING,
+        "level": float(level[best]),
+        "trend": float(trend[best]),
+        "season": season[:, best].copy(),
+        # season slot of the first forecast period
+        "next_season_index": len(y) % m if m > 1 else 0,
+        "sigma": float(errors.std(ddof=1)) if len(errors) > 1 else 0.0,
+        "mae": float(np.abs(errors).mean()) if len(errors) else 0.0,
+        "last_date": str(pd.to_datetime(df["ds"]).max()),
+        "n_days": len(y),
+    }
+    if model_name:
+        atomic_joblib_dump(artifact, os.path.join(MODEL_DIR, f"{model_name}.joblib"))
+    return artifact
+
+
+def predict_with_hw(artifact: Dict[str, Any], periods: int = 30, freq: str = "D") -> pd.DataFrame:
+    """Future periods only, with intervals from the in-sample one-step residuals."""
+    h = np.arange(1, periods + 1)
+    phi = artifact["phi"]
+    damped_sum = phi * (1 - phi ** h) / (1 - phi) if phi < 1 else h.astype(float)
+    m = artifact["season_length"]
+    season = np.asarray(artifact["season"])[(artifact["next_season_index"] + h - 1) % m] if m > 1 else 0.0
+    yhat = artifact["level"] + damped_sum * artifact["trend"] + season
+    # forecast-error variance grows with the horizon (simple exponential smoothing approximation)
+    spread = HW_INTERVAL_Z * artifact["sigma"] * np.sqrt(1 + (h - 1) * artifact["alpha"] ** 2)
+    ds = pd.date_range(start=pd.Timestamp(artifact["last_date"]), periods=periods + 1, freq=freq)[1:]
+    return pd.DataFrame({"ds": ds, "yhat": yhat, "yhat_lower": yhat - spread, "yhat_upper": yhat + spread})
+
+
 def prepare_and_train(expenses_df: pd.DataFrame, freq: str = "D", model_type: str = "prophet", model_name: str = None):
     """
     Prepare raw expense rows and train chosen model_type. Returns trained model/artifact and aggregated train_df.
@@ -124,36 +253,253 @@ def prepare_and_train(expenses_df: pd.DataFrame, freq: str = "D", model_type: st
     agg = _aggregate_expenses(expenses_df, freq=freq)
     agg = _detect_and_handle_outliers(agg)
     model_name = model_name or f"{model_type}_expense"
-    if model_type == "prophet" and PROPHET_AVAILABLE:
-        m = train_prophet(agg, model_name=model_name)
-        return m, agg
-    else:
-        artifact = train_linear_regression(agg, model_name=model_name)
-        # store n_days to help predictions later
-        artifact["n_days"] = len(agg)
-        return artifact, agg
+    return _fit(agg, model_type, model_name=model_name, freq=freq), agg
+
+
+def _effective_model_type(model_type: str) -> str:
+    if model_type == "hw":
+        return "hw"
+    return "prophet" if model_type == "prophet" and PROPHET_AVAILABLE else "lr"
+
+
+def _fit(train_df: pd.DataFrame, model_type: str, model_name: Optional[str] = None, freq: str = "D",
+         init: Optional[Dict[str, Any]] = None):
+    model_type = _effective_model_type(model_type)
+    if model_type == "prophet":
+        return train_prophet(train_df, model_name=model_name, init=init)
+    if model_type == "hw":
+        return train_holt_winters(train_df, freq=freq, model_name=model_name)
+    return train_linear_regression(train_df, model_name=model_name)
+
 
+def _predict(model_or_artifact, model_type: str, periods: int, freq: str) -> pd.DataFrame:
+    model_type = _effective_model_type(model_type)
+    if model_type == "prophet":
+        return predict_with_prophet(model_or_artifact, periods=periods, freq=freq)
+    if model_type == "hw":
+        return predict_with_hw(model_or_artifact, periods=periods, freq=freq)
+    return predict_with_lr(model_or_artifact, periods=periods, freq=freq)
 
-def forecast_from_raw(expenses_df: pd.DataFrame, periods: int = 30, freq: str = "D", model_type: str = "prophet", model_name: str = None):
+
+def _warm_start_init(registry: ModelRegistry, model_name: str, freq: str, model_type: str) -> Optional[Dict[str, Any]]:
+    # Prophet refits start from the latest registered version's parameters
+    if model_type != "prophet" or not WARM_START:
+        return None
+    meta = registry.latest_meta(model_name, freq)
+    if meta is None or meta.get("model_type") != "prophet":
+        return None
+    loaded = registry.load(model_name, freq, meta)
+    return warm_start_params(loaded[0]) if loaded is not None else None
+
+
+def _train_and_save(raw_agg: pd.DataFrame, train_df: pd.DataFrame, freq: str, model_type: str, model_name: str,
+                    registry: ModelRegistry):
+    started = time.perf_counter()
+    init = _warm_start_init(registry, model_name, freq, model_type)
+    try:
+        model = _fit(train_df, model_type, freq=freq, init=init)
+    except Exception:
+        if init is None:
+            raise
+        # e.g. the seasonality setup changed and the old parameter shapes no longer fit
+        init = None
+        model = _fit(train_df, model_type, freq=freq)
+    meta = registry.save(model_name, freq, model, raw_agg, model_type=model_type,
+                         fit_seconds=round(time.perf_counter() - started, 4),
+                         extra={"warm_start": init is not None})
+    return model, meta, train_df
+
+
+def train_and_register(expenses_df: pd.DataFrame, freq: str = "D", model_type: str = "prophet", model_name: str = None,
+                       registry: Optional[ModelRegistry] = None):
     """
-    Convenience function: prepare, train (or load existing), and produce forecast dataframe.
+    Always fit a new model on expenses_df and register it as the latest version.
+    Returns (model, meta, train_df). Used directly by background training jobs.
+    Holds the registry's training lock, so it never races another process fitting the same model.
     """
+    registry = registry or default_registry
+    model_type = _effective_model_type(model_type)
     model_name = model_name or f"{model_type}_expense"
-    loaded = load_model(model_name)
-    if loaded is None:
-        model_or_artifact, train_df = prepare_and_train(expenses_df, freq=freq, model_type=model_type, model_name=model_name)
-    else:
-        model_or_artifact = loaded
-        # We still need a train_df to calculate MAE if desired; user can pass test set separately.
-        train_df = None
+    raw_agg = _aggregate_expenses(expenses_df, freq=freq)
+    train_df = _detect_and_handle_outliers(raw_agg)
+    with registry.lock(model_name, freq):
+        return _train_and_save(raw_agg, train_df, freq, model_type, model_name, registry)
 
-    if model_type == "prophet" and PROPHET_AVAILABLE:
-        forecast_df = predict_with_prophet(model_or_artifact, periods=periods, freq=freq)
-    else:
-        forecast_df = predict_with_lr(model_or_artifact, periods=periods, freq=freq)
 
+def _fresh_model(registry: ModelRegistry, model_name: str, freq: str, model_type: str, raw_agg: pd.DataFrame,
+                 allow_stale: bool = False):
+    """(model, meta, stale_reason) for the latest registry version, or None if it cannot be used."""
+    meta = registry.latest_meta(model_name, freq)
+    if meta is None or meta.get("model_type") != model_type:
+        return None
+    reason = registry.staleness(meta, raw_agg)
+    if reason is not None and not allow_stale:
+        return None
+    loaded = registry.load(model_name, freq, meta)
+    return (loaded[0], loaded[1], reason) if loaded is not None else None
+
+
+def get_or_train(expenses_df: pd.DataFrame, freq: str = "D", model_type: str = "prophet", model_name: str = None,
+                 registry: Optional[ModelRegistry] = None, on_stale: Optional[Callable[[str], Any]] = None):
+    """
+    Latest registry model for (model_name, freq) if it is still fresh for this data,
+    otherwise a newly trained and registered one. Returns (model, meta, train_df).
+
+    With on_stale set, a stale-but-loadable model is returned as is and
+    on_stale(reason) is called instead of refitting inline (e.g. to queue a
+    background job). Inline training then only happens when no model exists.
+
+    Inline training is coalesced: concurrent callers in this process share one
+    fit, and callers in other processes wait on the registry's file lock and then
+    reuse the model the lock holder registered.
+    """
+    registry = registry or default_registry
+    model_type = _effective_model_type(model_type)
+    model_name = model_name or f"{model_type}_expense"
+    raw_agg = _aggregate_expenses(expenses_df, freq=freq)
+    train_df = _detect_and_handle_outliers(raw_agg)
+
+    found = _fresh_model(registry, model_name, freq, model_type, raw_agg, allow_stale=on_stale is not None)
+    if found is not None:
+        model, meta, reason = found
+        if reason is not None:
+            on_stale(reason)
+        return model, meta, train_df
+
+    def refresh():
+        with registry.lock(model_name, freq):
+            # another thread or process may have registered a usable model while we waited
+            found = _fresh_model(registry, model_name, freq, model_type, raw_agg)
+            if found is not None:
+                return found[0], found[1], train_df
+            return _train_and_save(raw_agg, train_df, freq, model_type, model_name, registry)
+
+    key = (os.path.abspath(registry.root), model_name, freq, model_type, series_fingerprint(raw_agg))
+    return _training_flight.do(key, refresh)
+
+
+def forecast_from_raw(expenses_df: pd.DataFrame, periods: int = 30, freq: str = "D", model_type: str = "prophet", model_name: str = None,
+                      registry: Optional[ModelRegistry] = None, on_stale: Optional[Callable[[str], Any]] = None):
+    """
+    Convenience function: prepare, train (or reuse a registry model), and produce forecast dataframe.
+    """
+    model_or_artifact, _meta, train_df = get_or_train(expenses_df, freq=freq, model_type=model_type,
+                                                      model_name=model_name, registry=registry, on_stale=on_stale)
+
+    forecast_df = _predict(model_or_artifact, model_type, periods=periods, freq=freq)
     return forecast_df, train_df
 
 
+def _category_matrix(expenses_df: pd.DataFrame, freq: str = "D") -> pd.DataFrame:
+    """
+    expenses_df must have columns 'date', 'category', 'amount' (raw rows or per-period totals).
+    Returns a (periods x categories) frame indexed by period (ds), missing periods filled with 0.
+    """
+    amounts = pd.Series(
+        expenses_df["amount"].to_numpy(dtype=float),
+        index=pd.MultiIndex.from_arrays(
+            [pd.DatetimeIndex(pd.to_datetime(expenses_df["date"].to_numpy())), expenses_df["category"].fillna("").to_numpy()],
+            names=["ds", "category"],
+        ),
+    )
+    wide = amounts.groupby(level=["ds", "category"]).sum().unstack("category", fill_value=0.0)
+    return wide.sort_index().resample(freq).sum()
+
+
+def _active_mask(Y: np.ndarray) -> np.ndarray:
+    # a category's history starts at its first non-zero period; earlier zeros are not observations
+    return np.maximum.accumulate(Y != 0, axis=0)
+
+
+def _winsorize_columns(Y: np.ndarray, active: np.ndarray, z_thresh: float = 3.0) -> np.ndarray:
+    """_detect_and_handle_outliers applied to every column of Y at once, over its active periods."""
+    n = active.sum(axis=0)
+    mean = np.where(active, Y, 0.0).sum(axis=0) / np.maximum(n, 1)
+    var = np.where(active, (Y - mean) ** 2, 0.0).sum(axis=0) / np.maximum(n - 1, 1)
+    std = np.where((n > 1) & (var > 0), np.sqrt(var), 1.0)
+    return np.clip(Y, mean - z_thresh * std, mean + z_thresh * std)
+
+
+def _forecast_lr_batch(ds: pd.DatetimeIndex, Y: np.ndarray, active: np.ndarray,
+                       future: pd.DatetimeIndex) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Same model as train_linear_regression (y ~ days) for every column at once:
+    closed-form least squares over each column's active periods, no per-series loop.
+    """
+    t = (ds - ds[0]).days.to_numpy(dtype=float)[:, None]
+    w = active.astype(float)
+    n = np.maximum(w.sum(axis=0), 1.0)
+    t_mean = (w * t).sum(axis=0) / n
+    y_mean = (w * Y).sum(axis=0) / n
+    sxx = (w * (t - t_mean) ** 2).sum(axis=0)
+    sxy = (w * (t - t_mean) * (Y - y_mean)).sum(axis=0)
+    slope = np.divide(sxy, sxx, out=np.zeros_like(sxy), where=sxx > 0)
+    intercept = y_mean - slope * t_mean
+    t_future = (future - ds[0]).days.to_numpy(dtype=float)[:, None]
+    yhat = intercept + t_future * slope
+    return yhat, yhat * 0.9, yhat * 1.1
+
+
+def _forecast_prophet_series(train_df: pd.DataFrame, periods: int, freq: str) -> np.ndarray:
+    # runs in a joblib worker; returns (periods x 3) yhat / lower / upper
+    m = Prophet()
+    m.fit(train_df)
+    fc = m.predict(m.make_future_dataframe(periods=periods, freq=freq, include_history=False))
+    return fc[["yhat", "yhat_lower", "yhat_upper"]].to_numpy()
+
+
+def forecast_by_category(expenses_df: pd.DataFrame, periods: int = 30, freq: str = "D", model_type: str = "lr",
+                         n_jobs: int = CATEGORY_JOBS) -> pd.DataFrame:
+    """
+    Forecast the next `periods` intervals for every category in expenses_df
+    ('date', 'category', 'amount'). The data is pivoted once into a
+    (periods x categories) matrix; lr fits every category in a single batched
+    least-squares solve, prophet fits run in parallel across n_jobs processes,
+    hw fits run one after another (milliseconds each).
+    Returns a long frame (ds, category, yhat, yhat_lower, yhat_upper), future periods only.
+    """
+    wide = _category_matrix(expenses_df, freq=freq)
+    if wide.empty:
+        return pd.DataFrame(columns=["ds", "category", "yhat", "yhat_lower", "yhat_upper"])
+    Y = wide.to_numpy(dtype=float)
+    active = _active_mask(Y)
+    Y = _winsorize_columns(Y, active)
+    ds = wide.index
+    future = pd.date_range(start=ds[-1], periods=periods + 1, freq=freq)[1:]
+
+    model_type = _effective_model_type(model_type)
+    if model_type == "prophet":
+        # Prophet.fit needs 2+ rows; a category with a single active period (new in the
+        # last bucket) keeps the lr result, which is flat at its only value
+        yhat, lower, upper = _forecast_lr_batch(ds, Y, active, future)
+        fit_cols = np.flatnonzero(active.sum(axis=0) >= 2)
+        outs = Parallel(n_jobs=n_jobs)(
+            delayed(_forecast_prophet_series)(pd.DataFrame({"ds": ds[active[:, j]], "y": Y[active[:, j], j]}), periods, freq)
+            for j in fit_cols
+        )
+        for j, out in zip(fit_cols, outs):
+            yhat[:, j], lower[:, j], upper[:, j] = out[:, 0], out[:, 1], out[:, 2]
+    elif model_type == "hw":
+        # each fit takes milliseconds, a process pool would cost more than it saves
+        outs = [
+            predict_with_hw(train_holt_winters(pd.DataFrame({"ds": ds[active[:, j]], "y": Y[active[:, j], j]}),
+                                               freq=freq, model_name=None), periods=periods, freq=freq)
+            if active[:, j].any() else pd.DataFrame({"yhat": np.zeros(periods), "yhat_lower": 0.0, "yhat_upper": 0.0})
+            for j in range(Y.shape[1])
+        ]
+        yhat, lower, upper = (np.column_stack([o[c].to_numpy() for o in outs]) for c in ("yhat", "yhat_lower", "yhat_upper"))
+    else:
+        yhat, lower, upper = _forecast_lr_batch(ds, Y, active, future)
+
+    k = Y.shape[1]
+    return pd.DataFrame({
+        "ds": np.repeat(future.to_numpy(), k),
+        "category": np.tile(wide.columns.to_numpy(dtype=object), len(future)),
+        "yhat": yhat.ravel(),
+        "yhat_lower": lower.ravel(),
+        "yhat_upper": upper.ravel(),
+    })
+
+
 def compute_mae(y_true: pd.Series, y_pred: pd.Series) -> float:
     return float(mean_absolute_error(y_true, y_pred))
@@ -0,0 +1,182 @@
+# api/ml/online.py
+"""
+Incrementally trained classifier fed by the misclassification log.
+
+The online artifact pairs a stateless HashingVectorizer (no vocabulary to refit,
+unseen words get a column too) with a MultinomialNB updated by partial_fit. It
+also stores how far into data/misclassified_log.csv it has read, so an update
+only parses and fits the corrections appended since the previous one and costs
+O(new rows), not a full retrain.
+
+update_from_log() reads the new rows, fits them in batches and publishes the
+model with an atomic rename; the ClassifierProvider of every worker serving the
+same path picks it up on its next reload check. A FileLock next to the artifact
+keeps concurrent updaters (one per uvicorn worker) from fitting the same rows twice.
+"""
+import csv
+import datetime
+import io
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+import joblib
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.naive_bayes import MultinomialNB
+
+from api.ml.locks import FileLock
+from api.ml.preprocessing import clean_text
+from api.ml.registry import atomic_joblib_dump
+
+ONLINE_FORMAT = "expense-classifier-online/1"
+# appended to by api/services/online_learning.log_correction (the expense create/update
+# paths) and api/routers/expense_routes.log_misclassification
+MISCLASS_LOG_PATH = Path(os.getenv(
+    "CLASSIFIER_MISCLASS_LOG", Path(__file__).resolve().parent.parent.parent / "data" / "misclassified_log.csv"))
+LOG_FIELDS = ["ts", "description", "predicted", "actual"]
+
+N_FEATURES = 2 ** 18
+# every partial_fit call recomputes the log-probabilities of all n_features columns, so batches are large
+BATCH_SIZE = int(os.getenv("CLASSIFIER_ONLINE_BATCH_SIZE", "4096"))
+# weight of one correction relative to one bootstrap example
+CORRECTION_WEIGHT = float(os.getenv("CLASSIFIER_ONLINE_CORRECTION_WEIGHT", "1"))
+LOCK_TIMEOUT = float(os.getenv("CLASSIFIER_ONLINE_LOCK_TIMEOUT", "60"))
+
+_append_lock = threading.Lock()
+
+
+def is_online(obj: Any) -> bool:
+    return isinstance(obj, dict) and obj.get("format") == ONLINE_FORMAT
+
+
+def new_online_model(n_features: int = N_FEATURES, ngram_range: Tuple[int, int] = (1, 2),
+                     alpha: float = 0.1) -> Dict[str, Any]:
+    return {
+        "format": ONLINE_FORMAT,
+        # non-negative l2-normalized term frequencies, as MultinomialNB needs counts >= 0
+        "vectorizer": HashingVectorizer(n_features=n_features, ngram_range=ngram_range,
+                                        alternate_sign=False, norm="l2"),
+        "clf": MultinomialNB(alpha=alpha),
+        "log_offset": 0,
+        "n_examples": 0,
+        "n_updates": 0,
+        "updated_at": None,
+    }
+
+
+def _add_classes(clf: MultinomialNB, labels: Sequence[str]):
+    """Grow a fitted MultinomialNB by classes it has not seen yet (partial_fit would ignore them)."""
+    new = sorted(set(labels) - set(clf.classes_.tolist()))
+    if not new:
+        return
+    classes = np.array(sorted(clf.classes_.tolist() + new), dtype=object)
+    positions = np.searchsorted(classes, clf.classes_)
+    class_count = np.zeros(len(classes))
+    feature_count = np.zeros((len(classes), clf.feature_count_.shape[1]))
+    class_count[positions] = clf.class_count_
+    feature_count[positions] = clf.feature_count_
+    clf.classes_, clf.class_count_, clf.feature_count_ = classes, class_count, feature_count
+
+
+def partial_fit(model: Dict[str, Any], texts: Sequence[str], labels: Sequence[str], weight: float = 1.0,
+                batch_size: int = BATCH_SIZE):
+    """Update the model in place with (already cleaned) texts and their categories."""
+    clf = model["clf"]
+    for start in range(0, len(texts), batch_size):
+        batch_texts, batch_labels = texts[start:start + batch_size], [str(l) for l in labels[start:start + batch_size]]
+        X = model["vectorizer"].transform(batch_texts)
+        sample_weight = np.full(len(batch_texts), weight)
+        if not hasattr(clf, "classes_"):
+            clf.partial_fit(X, batch_labels, classes=np.array(sorted(set(batch_labels)), dtype=object),
+                            sample_weight=sample_weight)
+        else:
+            _add_classes(clf, batch_labels)
+            clf.partial_fit(X, batch_labels, sample_weight=sample_weight)
+    model["n_examples"] += len(texts)
+
+
+def append_correction(log_path: str, description: str, predicted: str, actual: str = ""):
+    """
+    Append one row to the misclassification log. The row goes out in a single
+    append-mode write, so rows from concurrent writers (threads or workers) do not
+    interleave; read_corrections skips a repeated header.
+    """
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=LOG_FIELDS, lineterminator="\n")
+    with _append_lock:
+        os.makedirs(os.path.dirname(os.path.abspath(log_path)), exist_ok=True)
+        if not os.path.exists(log_path) or os.path.getsize(log_path) == 0:
+            writer.writeheader()
+        writer.writerow({"ts": datetime.datetime.utcnow().isoformat(), "description": description,
+                         "predicted": predicted, "actual": actual or ""})
+        with open(log_path, "a", newline="", encoding="utf-8") as f:
+            f.write(out.getvalue())
+
+
+def read_corrections(log_path: str, offset: int = 0) -> Tuple[List[str], List[str], int]:
+    """
+    (cleaned descriptions, categories, new offset) for the log rows after byte
+    `offset` that carry an actual category. Only complete lines are consumed, so a
+    row that is still being appended is picked up by the next call. A log that
+    shrank below `offset` (rotated / truncated) is read from the start.
+    """
+    if not os.path.exists(log_path):
+        return [], [], 0
+    if os.path.getsize(log_path) < offset:
+        offset = 0
+    with open(log_path, "rb") as f:
+        f.seek(offset)
+        data = f.read()
+    end = data.rfind(b"\n") + 1
+    if end == 0:
+        return [], [], offset
+    texts, labels = [], []
+    for row in csv.reader(io.StringIO(data[:end].decode("utf-8", errors="replace"), newline="")):
+        if len(row) != len(LOG_FIELDS) or row == LOG_FIELDS:
+            continue  # header, or a malformed line
+        record = dict(zip(LOG_FIELDS, row))
+        actual = record["actual"].strip()
+        if actual:
+            texts.append(clean_text(record["description"]))
+            labels.append(actual)
+    return texts, labels, offset + end
+
+
+def update_from_log(model_path: str, log_path: str, weight: float = CORRECTION_WEIGHT,
+                    batch_size: int = BATCH_SIZE) -> Dict[str, Any]:
+    """
+    Fit the corrections appended to log_path since the last update and publish the
+    model if anything was learned. Raises FileNotFoundError without a bootstrapped
+    model (scripts/train_classifier.py --online-out).
+    """
+    started = time.perf_counter()
+    with FileLock(str(model_path) + ".lock", timeout=LOCK_TIMEOUT):
+        model = joblib.load(model_path)
+        if not is_online(model):
+            raise ValueError(f"{model_path} is not an online classifier")
+        texts, labels, offset = read_corrections(log_path, model["log_offset"])
+        if texts:
+            partial_fit(model, texts, labels, weight=weight, batch_size=batch_size)
+            model["n_updates"] += 1
+            model["updated_at"] = time.time()
+        changed = offset != model["log_offset"] or bool(texts)
+        model["log_offset"] = offset
+        if changed:
+            atomic_joblib_dump(model, model_path)
+    return {"learned": len(texts), "log_offset": offset, "published": changed,
+            "n_examples": model["n_examples"], "seconds": round(time.perf_counter() - started, 4)}
+
+
+class OnlineScorer:
+    """predict_proba of an online artifact over cleaned texts."""
+
+    def __init__(self, model: Dict[str, Any]):
+        self.vectorizer = model["vectorizer"]
+        self.clf = model["clf"]
+        self.classes_ = np.asarray(self.clf.classes_, dtype=object)
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        return self.clf.predict_proba(self.vectorizer.transform(list(texts)))
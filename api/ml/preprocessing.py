@@ -0,0 +1,12 @@
+# api/ml/preprocessing.py
+import re
+
+_NON_ALNUM = re.compile(r"[^a-z0-9\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+def clean_text(s: str) -> str:
+    # shared by training (scripts/train_classifier.py) and inference so both see the same tokens
+    s = s.lower()
+    s = _NON_ALNUM.sub(" ", s)
+    s = _WHITESPACE.sub(" ", s).strip()
+    return s
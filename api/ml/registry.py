@@ -0,0 +1,194 @@
+# api/ml/registry.py
+"""
+Versioned store for forecast model artifacts.
+
+Artifacts live under MODEL_DIR/registry/<name>_<freq>/ as v<N>.joblib next to a
+manifest.json holding one metadata record per version (model type, frequency,
+training range, row count, data fingerprint, fit time). Every file is written to
+a temp file in the same directory and then os.replace()d, so readers only ever
+see complete files.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import joblib
+import pandas as pd
+
+from api.ml.locks import FileLock
+
+MODEL_DIR = os.getenv("ML_MODEL_DIR", "models")
+REGISTRY_DIR = os.getenv("ML_REGISTRY_DIR", os.path.join(MODEL_DIR, "registry"))
+
+# Staleness rules
+MAX_MODEL_AGE_HOURS = float(os.getenv("FORECAST_MAX_MODEL_AGE_HOURS", "24"))
+REFIT_MIN_NEW_PERIODS = int(os.getenv("FORECAST_REFIT_MIN_NEW_PERIODS", "1"))
+KEEP_VERSIONS = int(os.getenv("FORECAST_KEEP_VERSIONS", "3"))
+# How long a process waits for another one to finish training the same model
+TRAIN_LOCK_TIMEOUT = float(os.getenv("FORECAST_TRAIN_LOCK_TIMEOUT", "600"))
+
+
+def atomic_write_bytes(path: str, data: bytes):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def atomic_joblib_dump(obj: Any, path: str, **dump_kwargs):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.basename(path))
+    os.close(fd)
+    try:
+        joblib.dump(obj, tmp, **dump_kwargs)
+        os.chmod(tmp, 0o644)  # mkstemp creates 0600; other worker users must be able to read artifacts
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def series_fingerprint(agg: pd.DataFrame) -> str:
+    """Hash of an aggregated (ds, y) series; changes if any period's total changes."""
+    h = hashlib.sha1()
+    h.update(pd.to_datetime(agg["ds"]).to_numpy(dtype="datetime64[ns]").tobytes())
+    h.update(agg["y"].to_numpy(dtype="float64").tobytes())
+    return h.hexdigest()
+
+
+class ModelRegistry:
+    def __init__(self, root: str = REGISTRY_DIR, max_age_hours: float = MAX_MODEL_AGE_HOURS,
+                 min_new_periods: int = REFIT_MIN_NEW_PERIODS, keep_versions: int = KEEP_VERSIONS):
+        self.root = root
+        self.max_age_hours = max_age_hours
+        self.min_new_periods = min_new_periods
+        self.keep_versions = keep_versions
+        # artifact path -> loaded model, so each version is unpickled once per process
+        self._loaded: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # picklable for process-pool workers: ship the settings, not the lock or loaded models
+        state = self.__dict__.copy()
+        del state["_lock"], state["_loaded"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    def _key_dir(self, name: str, freq: str) -> str:
+        return os.path.join(self.root, f"{name}_{freq}")
+
+    def _manifest_path(self, name: str, freq: str) -> str:
+        return os.path.join(self._key_dir(name, freq), "manifest.json")
+
+    def lock(self, name: str, freq: str, timeout: Optional[float] = TRAIN_LOCK_TIMEOUT) -> FileLock:
+        """Cross-process lock held while training (name, freq), so only one process fits it at a time."""
+        return FileLock(os.path.join(self._key_dir(name, freq), ".train.lock"), timeout=timeout)
+
+    def versions(self, name: str, freq: str) -> List[Dict[str, Any]]:
+        path = self._manifest_path(name, freq)
+        if not os.path.exists(path):
+            return []
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("versions", [])
+
+    def latest_meta(self, name: str, freq: str) -> Optional[Dict[str, Any]]:
+        versions = self.versions(name, freq)
+        return versions[-1] if versions else None
+
+    def load(self, name: str, freq: str, meta: Optional[Dict[str, Any]] = None) -> Optional[Tuple[Any, Dict[str, Any]]]:
+        """Returns (model, meta) for the given (default: latest) version, or None."""
+        meta = meta or self.latest_meta(name, freq)
+        if meta is None:
+            return None
+        path = os.path.join(self._key_dir(name, freq), meta["file"])
+        with self._lock:
+            model = self._loaded.get(path)
+        if model is None:
+            if not os.path.exists(path):
+                return None
+            model = joblib.load(path)
+            with self._lock:
+                self._loaded[path] = model
+        return model, meta
+
+    def save(self, name: str, freq: str, model: Any, agg: pd.DataFrame, model_type: str,
+             fit_seconds: Optional[float] = None, extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Store a new version trained on `agg` and prune versions beyond keep_versions."""
+        key_dir = self._key_dir(name, freq)
+        # the manifest is read-modify-write; serialize it across processes
+        with FileLock(os.path.join(key_dir, ".manifest.lock"), timeout=TRAIN_LOCK_TIMEOUT):
+            return self._save_locked(name, freq, model, agg, model_type, fit_seconds, extra)
+
+    def _save_locked(self, name, freq, model, agg, model_type, fit_seconds, extra) -> Dict[str, Any]:
+        versions = self.versions(name, freq)
+        number = (versions[-1]["version"] + 1) if versions else 1
+        meta = {
+            "version": number,
+            "file": f"v{number}.joblib",
+            "model_type": model_type,
+            "freq": freq,
+            "created_at": time.time(),
+            "train_start": str(pd.to_datetime(agg["ds"]).min().date()),
+            "train_end": str(pd.to_datetime(agg["ds"]).max().date()),
+            "n_rows": int(len(agg)),
+            "data_fingerprint": series_fingerprint(agg),
+            "fit_seconds": fit_seconds,
+            **(extra or {}),
+        }
+        key_dir = self._key_dir(name, freq)
+        atomic_joblib_dump(model, os.path.join(key_dir, meta["file"]))
+        versions.append(meta)
+        keep, drop = versions[-self.keep_versions:], versions[:-self.keep_versions]
+        atomic_write_bytes(self._manifest_path(name, freq), json.dumps({"versions": keep}, indent=2).encode("utf-8"))
+        for old in drop:
+            old_path = os.path.join(key_dir, old["file"])
+            with self._lock:
+                self._loaded.pop(old_path, None)
+            if os.path.exists(old_path):
+                os.unlink(old_path)
+        with self._lock:
+            self._loaded[os.path.join(key_dir, meta["file"])] = model
+        return meta
+
+    def staleness(self, meta: Optional[Dict[str, Any]], agg: pd.DataFrame) -> Optional[str]:
+        """
+        Why the model described by `meta` should be refit on `agg`, or None if it is fresh:
+        no model yet, older than max_age_hours, at least min_new_periods periods
+        past its training range, or history inside its training range changed.
+        """
+        if meta is None:
+            return "missing"
+        if self.max_age_hours > 0 and time.time() - meta["created_at"] > self.max_age_hours * 3600:
+            return "expired"
+        ds = pd.to_datetime(agg["ds"])
+        train_end = pd.Timestamp(meta["train_end"])
+        new_periods = int((ds > train_end).sum())
+        if new_periods >= max(self.min_new_periods, 1):
+            return "new_data"
+        seen = agg[ds <= train_end]
+        if len(seen) != meta["n_rows"] or series_fingerprint(seen) != meta["data_fingerprint"]:
+            return "history_changed"
+        return None
+
+
+default_registry = ModelRegistry()
@@ -0,0 +1,166 @@
+# api/ml/rules.py
+"""
+Merchant / keyword rules that categorize a description before the classifier runs.
+
+Rules live in a user-editable CSV (data/merchant_rules.csv: pattern,category).
+Patterns are normalized with clean_text and compiled into a token trie, so
+"Uber Eats" matches the tokens ["uber", "eats"] anywhere in a description but
+"uber" does not match "uberx". Matching walks the trie from every token position,
+O(tokens x longest pattern), independent of how many rules there are. When
+several rules match, the one with the most tokens wins, then the earliest.
+
+The file is re-read when its mtime/size changes (checked at most every
+MERCHANT_RULES_CHECK_SECONDS) and saved with write + rename.
+"""
+import csv
+import io
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from api.ml.preprocessing import clean_text
+from api.ml.registry import atomic_write_bytes
+
+RULES_PATH = Path(os.getenv(
+    "MERCHANT_RULES_PATH", Path(__file__).resolve().parent.parent.parent / "data" / "merchant_rules.csv"))
+RULES_CHECK_SECONDS = float(os.getenv("MERCHANT_RULES_CHECK_SECONDS", "2"))
+
+_CATEGORY = "\0category"  # trie key holding the category of a pattern ending at this node
+
+
+def compile_trie(rules: Dict[str, str]) -> Tuple[Dict[str, Any], int]:
+    """(trie, longest pattern in tokens) for {normalized pattern: category}."""
+    trie: Dict[str, Any] = {}
+    depth = 0
+    for pattern, category in rules.items():
+        tokens = pattern.split()
+        if not tokens:
+            continue
+        node = trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node[_CATEGORY] = category
+        depth = max(depth, len(tokens))
+    return trie, depth
+
+
+def match_tokens(trie: Dict[str, Any], tokens: Sequence[str]) -> Optional[Tuple[str, int, int]]:
+    """(category, start, length) of the longest (then earliest) rule matching `tokens`, or None."""
+    best = None
+    for start in range(len(tokens)):
+        node = trie
+        for i in range(start, len(tokens)):
+            node = node.get(tokens[i])
+            if node is None:
+                break
+            if _CATEGORY in node and (best is None or i + 1 - start > best[2]):
+                best = (node[_CATEGORY], start, i + 1 - start)
+    return best
+
+
+class RuleEngine:
+    def __init__(self, path: Optional[str] = None, check_interval: float = RULES_CHECK_SECONDS):
+        self.path = Path(path or RULES_PATH)
+        self.check_interval = check_interval
+        self._rules: Dict[str, str] = {}
+        self._trie: Dict[str, Any] = {}
+        self._depth = 0
+        self._signature = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        # serializes reloads and set_rules (read, modify, save, install) so concurrent edits are not lost
+        self._update_lock = threading.Lock()
+        self._stats = {"lookups": 0, "hits": 0, "reloads": 0}
+        self._maybe_reload(force=True)
+
+    def _file_signature(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _read(self) -> Dict[str, str]:
+        rules: Dict[str, str] = {}
+        if not self.path.exists():
+            return rules
+        with open(self.path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                pattern = clean_text(row.get("pattern") or "")
+                category = (row.get("category") or "").strip()
+                if pattern and category:
+                    rules[pattern] = category  # a repeated pattern: the last row wins
+        return rules
+
+    def _install(self, rules: Dict[str, str]):
+        trie, depth = compile_trie(rules)
+        with self._lock:
+            self._rules, self._trie, self._depth = rules, trie, depth
+
+    def _maybe_reload(self, force: bool = False):
+        if not force and time.monotonic() < self._next_check:
+            return
+        self._next_check = time.monotonic() + self.check_interval
+        with self._update_lock:
+            signature = self._file_signature()
+            if signature == self._signature and not force:
+                return
+            self._install(self._read())
+            self._signature = signature
+            if not force:
+                self._stats["reloads"] += 1
+
+    def match(self, text: str) -> Optional[str]:
+        """Category of the best rule matching `text`, or None (then the classifier decides)."""
+        return self.match_batch([text])[0]
+
+    def match_batch(self, texts: Sequence[str]) -> List[Optional[str]]:
+        self._maybe_reload()
+        trie = self._trie
+        if trie:
+            results = [match_tokens(trie, clean_text(t).split()) for t in texts]
+            categories = [r[0] if r else None for r in results]
+        else:
+            categories = [None] * len(texts)
+        with self._lock:
+            self._stats["lookups"] += len(texts)
+            self._stats["hits"] += sum(c is not None for c in categories)
+        return categories
+
+    def rules(self) -> Dict[str, str]:
+        self._maybe_reload()
+        with self._lock:
+            return dict(self._rules)
+
+    def set_rules(self, updates: Dict[str, Optional[str]]) -> Dict[str, str]:
+        """Add / replace rules (category None deletes) and save the table."""
+        with self._update_lock:
+            # start from the file, not the installed table, so edits saved by another worker are kept
+            rules = self._read()
+            for pattern, category in updates.items():
+                pattern = clean_text(pattern)
+                if not pattern:
+                    raise ValueError("rule pattern is empty after normalization")
+                if category is None or not category.strip():
+                    rules.pop(pattern, None)
+                else:
+                    rules[pattern] = category.strip()
+            out = io.StringIO()
+            writer = csv.writer(out, lineterminator="\n")
+            writer.writerow(["pattern", "category"])
+            writer.writerows(sorted(rules.items()))
+            atomic_write_bytes(str(self.path), out.getvalue().encode("utf-8"))
+            self._install(rules)
+            self._signature = self._file_signature()
+        return rules
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["lookups"]
+            return {**self._stats, "hit_rate": (self._stats["hits"] / lookups) if lookups else None,
+                    "rules": len(self._rules), "max_tokens": self._depth, "path": str(self.path)}
+
+
+merchant_rules = RuleEngine()
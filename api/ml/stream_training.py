@@ -0,0 +1,285 @@
+# api/ml/stream_training.py
+"""
+Out-of-core, parallel training of the TF-IDF + MultinomialNB classifier.
+
+The labeled CSV is read in chunks and never held in memory as a whole. Chunks
+are processed on a joblib process pool in three passes:
+
+  1. clean   clean_text (vectorized with pandas .str), split train / validation,
+             tokenize and count n-grams; the chunk's sparse term counts are
+             spilled to a temp directory and its document frequencies merged
+  2. count   per candidate (ngram_range, min_df): sum the l2-normalized tf-idf
+             rows of each class, which is all MultinomialNB keeps from the data
+  3. score   validation accuracy of every candidate and alpha
+
+Passes 2 and 3 only remap the spilled counts onto the final vocabulary, so the
+text is tokenized once.
+
+Because TF-IDF + NB only needs document frequencies and per-class sums, the
+result is the same Pipeline that TfidfVectorizer(...).fit + MultinomialNB().fit
+would produce on the training rows, and it exports to the bundle / compiled formats.
+Memory is bounded by the vocabulary and the per-class counts, not the row count.
+"""
+import itertools
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import normalize
+
+from api.ml.preprocessing import clean_text
+
+CHUNKSIZE = int(os.getenv("CLASSIFIER_TRAIN_CHUNKSIZE", "100000"))
+# Worker processes for training passes (-1 = one per core)
+TRAIN_JOBS = int(os.getenv("CLASSIFIER_TRAIN_JOBS", "-1"))
+VALIDATION_PERCENT = 20
+
+DEFAULT_PARAMS = {"ngram_range": (1, 2), "min_df": 2, "alpha": 1.0}
+DEFAULT_GRID = {"ngram_range": [(1, 1), (1, 2)], "min_df": [1, 2, 5], "alpha": [0.1, 0.5, 1.0]}
+
+
+def clean_series(s: pd.Series) -> pd.Series:
+    """
+    api.ml.preprocessing.clean_text over a whole Series with pandas string methods.
+    Non-ASCII rows go through clean_text itself, since the vectorized lower() /
+    regex engine can differ from Python's on them (e.g. "İ".lower()).
+    """
+    s = s.astype(str)
+    out = (s.str.lower()
+           .str.replace(r"[^a-z0-9\s]", " ", regex=True)
+           .str.replace(r"\s+", " ", regex=True)
+           .str.strip())
+    non_ascii = ~s.str.isascii().to_numpy(dtype=bool)
+    if non_ascii.any():
+        out[non_ascii] = [clean_text(t) for t in s[non_ascii]]
+    return out
+
+
+def _is_validation(row_ids: np.ndarray, percent: int) -> np.ndarray:
+    # deterministic pseudo-random split by row number (Knuth multiplicative hash)
+    return (row_ids.astype(np.uint64) * np.uint64(2654435761) % np.uint64(2 ** 32)) % np.uint64(100) < np.uint64(percent)
+
+
+def _read_chunks(csv_path: str, chunksize: int) -> Iterator[Tuple[int, pd.DataFrame]]:
+    row = 0
+    for chunk in pd.read_csv(csv_path, usecols=["description", "category"], chunksize=chunksize):
+        yield row, chunk
+        row += len(chunk)
+
+
+def _analyzer_terms_ok(terms: np.ndarray, ngram_range: Tuple[int, int]) -> np.ndarray:
+    # word n-grams are tokens joined by single spaces
+    n_words = np.fromiter((t.count(" ") + 1 for t in terms), dtype=np.int64, count=len(terms))
+    return (n_words >= ngram_range[0]) & (n_words <= ngram_range[1])
+
+
+# -- pass 1 ------------------------------------------------------------------
+
+def _clean_chunk(first_row: int, chunk: pd.DataFrame, spill_dir: str, max_ngram: Tuple[int, int],
+                 validation_percent: int) -> Dict[str, Any]:
+    # executed in a worker process
+    is_val = _is_validation(first_row + np.arange(len(chunk)), validation_percent)
+    keep = chunk["description"].notna().to_numpy() & chunk["category"].notna().to_numpy()
+    chunk, is_val = chunk[keep], is_val[keep]
+    texts = clean_series(chunk["description"]).tolist()
+    labels = chunk["category"].astype(str).tolist()
+
+    # tokenized once: the chunk's term counts (over its own terms) are spilled for passes 2 and 3
+    counter = CountVectorizer(ngram_range=max_ngram)
+    try:
+        counts = counter.fit_transform(texts)
+        terms = counter.get_feature_names_out().tolist()
+    except ValueError:  # no terms in this chunk (empty vocabulary)
+        counts, terms = sparse.csr_matrix((len(texts), 0), dtype=np.int64), []
+    path = os.path.join(spill_dir, f"chunk-{first_row}.joblib")
+    joblib.dump({"counts": counts, "labels": labels, "is_val": is_val}, path)
+
+    train = ~is_val
+    df = np.asarray((counts[np.flatnonzero(train)] > 0).sum(axis=0)).ravel()
+    return {"path": path, "terms": terms, "df": df, "n_train": int(train.sum()), "n_val": int(is_val.sum()),
+            "labels": {l for l, v in zip(labels, is_val) if not v}}
+
+
+# -- passes 2 and 3 ----------------------------------------------------------
+
+def _candidate_matrices(counts: sparse.csr_matrix, shared: Dict[str, Any]):
+    """(candidate index, l2-normalized tf-idf matrix) for every candidate vocabulary."""
+    counts = counts.tocsc()
+    for c, columns in enumerate(shared["columns"]):
+        X = counts[:, columns].tocsr()
+        X = X.multiply(shared["idf"][columns]).tocsr()
+        yield c, normalize(X, norm="l2", copy=False)
+
+
+def _load_chunk(chunk_path: str, shared: Dict[str, Any], validation: bool):
+    """(counts over the global vocabulary, labels) of a chunk's train or validation rows."""
+    data = joblib.load(chunk_path)
+    rows = np.flatnonzero(data["is_val"] == validation)
+    # chunk term -> pass-1 term id -> global vocabulary column (-1: below min_df)
+    columns = shared["vocab_index"][np.load(chunk_path + ".ids.npy")]
+    counts = data["counts"][rows].tocsc()[:, columns >= 0].tocsr()
+    counts = sparse.csr_matrix((counts.data, columns[columns >= 0][counts.indices], counts.indptr),
+                               shape=(len(rows), shared["n_terms"]))
+    counts.sort_indices()
+    return counts, np.array(data["labels"], dtype=object)[rows]
+
+
+def _count_chunk(chunk_path: str, shared_path: str) -> Dict[str, Any]:
+    # executed in a worker process
+    shared = joblib.load(shared_path, mmap_mode="r")
+    counts, labels = _load_chunk(chunk_path, shared, validation=False)
+    classes = shared["classes"]
+    Y = (labels[:, None] == classes[None, :]).astype(np.float64)
+    if not len(labels):
+        return {"class_count": np.zeros(len(classes)), "feature_count": None}
+    feature_count = [np.asarray((X.T @ Y).T) for _, X in _candidate_matrices(counts, shared)]
+    return {"class_count": Y.sum(axis=0), "feature_count": feature_count}
+
+
+def _score_chunk(chunk_path: str, shared_path: str, models_path: str) -> np.ndarray:
+    # executed in a worker process; correct predictions per (candidate, alpha)
+    shared = joblib.load(shared_path, mmap_mode="r")
+    models = joblib.load(models_path, mmap_mode="r")
+    counts, truth = _load_chunk(chunk_path, shared, validation=True)
+    correct = np.zeros((len(shared["columns"]), len(models["alphas"])), dtype=np.int64)
+    if not len(truth):
+        return correct
+    for c, X in _candidate_matrices(counts, shared):
+        for a in range(len(models["alphas"])):
+            jll = np.asarray(X @ models["feature_log_prob"][c][a].T) + models["class_log_prior"]
+            correct[c, a] = int((shared["classes"][jll.argmax(axis=1)] == truth).sum())
+    return correct
+
+
+def _feature_log_prob(feature_count: np.ndarray, alpha: float) -> np.ndarray:
+    # MultinomialNB._update_feature_log_prob
+    smoothed = feature_count + alpha
+    return np.log(smoothed) - np.log(smoothed.sum(axis=1, keepdims=True))
+
+
+def _build_pipeline(vocabulary: np.ndarray, idf: np.ndarray, ngram_range, min_df, alpha, classes,
+                    class_count, feature_count) -> Pipeline:
+    vectorizer = TfidfVectorizer(ngram_range=tuple(ngram_range), min_df=min_df)
+    vectorizer.vocabulary_ = {term: i for i, term in enumerate(vocabulary.tolist())}
+    vectorizer.idf_ = np.asarray(idf, dtype=np.float64)
+    nb = MultinomialNB(alpha=alpha)
+    nb.classes_ = np.asarray(classes, dtype=object)
+    nb.class_count_ = class_count
+    nb.feature_count_ = feature_count
+    nb.n_features_in_ = feature_count.shape[1]
+    nb.feature_log_prob_ = _feature_log_prob(feature_count, alpha)
+    nb.class_log_prior_ = np.log(class_count) - np.log(class_count.sum())
+    return Pipeline([("tfidf", vectorizer), ("clf", nb)])
+
+
+def train_streaming(csv_path: str, grid: Optional[Dict[str, Sequence]] = None, chunksize: int = CHUNKSIZE,
+                    n_jobs: int = TRAIN_JOBS, validation_percent: int = VALIDATION_PERCENT,
+                    work_dir: Optional[str] = None) -> Tuple[Pipeline, Dict[str, Any]]:
+    """
+    Train on csv_path (description, category) chunk by chunk. With a grid
+    ({"ngram_range": [...], "min_df": [...], "alpha": [...]}) every combination is
+    scored on the validation rows and the best one is returned, otherwise
+    DEFAULT_PARAMS are used. Returns (pipeline, report) where the report holds the
+    per-candidate validation accuracy and the seconds spent in each stage.
+    """
+    grid = grid or {k: [v] for k, v in DEFAULT_PARAMS.items()}
+    ngram_ranges = [tuple(n) for n in grid["ngram_range"]]
+    min_dfs, alphas = list(grid["min_df"]), [float(a) for a in grid["alpha"]]
+    candidates = list(itertools.product(ngram_ranges, min_dfs))
+    max_ngram = (min(n[0] for n in ngram_ranges), max(n[1] for n in ngram_ranges))
+    timings: Dict[str, float] = {}
+    spill_dir = tempfile.mkdtemp(prefix="clf-train-", dir=work_dir)
+    try:
+        with Parallel(n_jobs=n_jobs, return_as="generator_unordered") as parallel:
+            started = time.perf_counter()
+            # term -> id in order of first appearance, with document frequencies per id
+            term_ids: Dict[str, int] = {}
+            df = np.zeros(0, dtype=np.int64)
+            n_train, n_val, chunk_paths, labels = 0, 0, [], set()
+            for result in parallel(delayed(_clean_chunk)(first, chunk, spill_dir, max_ngram, validation_percent)
+                                   for first, chunk in _read_chunks(csv_path, chunksize)):
+                ids = np.fromiter((term_ids.setdefault(t, len(term_ids)) for t in result["terms"]),
+                                  dtype=np.int64, count=len(result["terms"]))
+                if len(term_ids) > len(df):
+                    df = np.concatenate([df, np.zeros(max(len(term_ids) - len(df), len(df)), dtype=np.int64)])
+                np.add.at(df, ids, result["df"])
+                np.save(result["path"] + ".ids.npy", ids)
+                n_train += result["n_train"]
+                n_val += result["n_val"]
+                chunk_paths.append(result["path"])
+                labels |= result["labels"]
+            chunk_paths.sort()
+            timings["clean_and_df"] = time.perf_counter() - started
+            if not n_train:
+                raise ValueError(f"no training rows in {csv_path}")
+
+            started = time.perf_counter()
+            terms = np.array(list(term_ids), dtype=object)
+            del term_ids
+            df = df[:len(terms)]
+            kept = np.flatnonzero(df >= min(min_dfs))
+            kept = kept[np.argsort(terms[kept], kind="stable")]  # sklearn's vocabulary is sorted
+            vocabulary, doc_freq = terms[kept], df[kept].astype(np.float64)
+            vocab_index = np.full(len(terms), -1, dtype=np.int64)
+            vocab_index[kept] = np.arange(len(kept))
+            del terms, df
+            # TfidfTransformer(smooth_idf=True)
+            idf = np.log((1 + n_train) / (1 + doc_freq)) + 1
+            columns = [np.flatnonzero((doc_freq >= min_df) & _analyzer_terms_ok(vocabulary, ngram))
+                       for ngram, min_df in candidates]
+            classes = np.array(sorted(labels), dtype=object)
+            shared_path = os.path.join(spill_dir, "shared.joblib")
+            joblib.dump({"vocab_index": vocab_index, "n_terms": len(vocabulary), "idf": idf, "columns": columns,
+                         "classes": classes}, shared_path)
+            timings["vocabulary"] = time.perf_counter() - started
+
+            started = time.perf_counter()
+            class_count = np.zeros(len(classes))
+            feature_count = [np.zeros((len(classes), len(c))) for c in columns]
+            for result in parallel(delayed(_count_chunk)(p, shared_path) for p in chunk_paths):
+                class_count += result["class_count"]
+                if result["feature_count"] is not None:
+                    for total, part in zip(feature_count, result["feature_count"]):
+                        total += part
+            timings["count"] = time.perf_counter() - started
+
+            started = time.perf_counter()
+            accuracy = np.full((len(candidates), len(alphas)), np.nan)
+            if n_val:
+                models_path = os.path.join(spill_dir, "models.joblib")
+                joblib.dump({"alphas": alphas, "class_log_prior": np.log(class_count) - np.log(class_count.sum()),
+                             "feature_log_prob": [[_feature_log_prob(fc, a) for a in alphas] for fc in feature_count]},
+                            models_path)
+                correct = np.zeros_like(accuracy, dtype=np.int64)
+                for result in parallel(delayed(_score_chunk)(p, shared_path, models_path) for p in chunk_paths):
+                    correct += result
+                accuracy = correct / n_val
+            timings["search"] = time.perf_counter() - started
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+
+    best_c, best_a = np.unravel_index(np.argmax(np.nan_to_num(accuracy, nan=-1.0)), accuracy.shape)
+    (ngram, min_df), alpha = candidates[best_c], alphas[best_a]
+    cols = columns[best_c]
+    pipeline = _build_pipeline(vocabulary[cols], idf[cols], ngram, min_df, alpha, classes, class_count,
+                               feature_count[best_c])
+    report = {
+        "rows": {"train": n_train, "validation": n_val},
+        "best": {"ngram_range": ngram, "min_df": min_df, "alpha": alpha,
+                 "accuracy": None if np.isnan(accuracy[best_c, best_a]) else float(accuracy[best_c, best_a])},
+        "candidates": [{"ngram_range": ngram_c, "min_df": min_df_c, "alpha": a, "terms": int(len(columns[c])),
+                        "accuracy": None if np.isnan(accuracy[c, i]) else float(accuracy[c, i])}
+                       for c, (ngram_c, min_df_c) in enumerate(candidates) for i, a in enumerate(alphas)],
+        "seconds": {k: round(v, 3) for k, v in timings.items()},
+    }
+    return pipeline, report
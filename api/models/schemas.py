@@ -1,7 +1,7 @@
 # api/models/schemas.py
 from pydantic import BaseModel, Field, validator
 from datetime import date as DateType
-from typing import Optional
+from typing import Optional, List
 
 class ExpenseBase(BaseModel):
     date: DateType = Field(default_factory=DateType.today)
@@ -24,3 +24,19 @@ class ExpenseOut(ExpenseBase):
 model_config = {"from_attributes": True}
 
 
+class ExpensePage(BaseModel):
+    items: List[ExpenseOut]
+    next_cursor: Optional[str] = None
+
+class ImportRowError(BaseModel):
+    row: int
+    error: str
+
+class ImportResult(BaseModel):
+    received: int
+    inserted: int
+    failed: int
+    categorized: int
+    errors: List[ImportRowError]
+    elapsed_seconds: float
+    rows_per_second: Optional[float] = None
@@ -0,0 +1,58 @@
+# api/routers/async_expenses.py
+# Async twin of api/routers/expenses.py (same paths and schemas), mounted instead of it when DB_ASYNC is set.
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
+from datetime import date
+
+from api.db.async_session import get_async_db
+from api.models import schemas
+from api.services import async_expense_service
+
+router = APIRouter(prefix="/expenses", tags=["expenses"])
+
+@router.post("/", response_model=schemas.ExpenseOut, status_code=status.HTTP_201_CREATED)
+async def create_expense(payload: schemas.ExpenseCreate, db: AsyncSession = Depends(get_async_db)):
+    return await async_expense_service.create_expense(db, payload)
+
+@router.get("/", response_model=Union[List[schemas.ExpenseOut], schemas.ExpensePage])
+async def list_expenses(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category: Optional[str] = None,
+    paginate: str = Query("offset", pattern="^(offset|cursor)$", description="'cursor' returns {items, next_cursor}"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; implies paginate=cursor"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    if paginate == "offset" and cursor is None:
+        return await async_expense_service.get_expenses(db, skip=skip, limit=limit, start_date=start_date, end_date=end_date, category=category)
+    try:
+        items, next_cursor = await async_expense_service.get_expenses_page(
+            db, cursor=cursor, limit=limit, start_date=start_date, end_date=end_date, category=category
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.get("/{expense_id}", response_model=schemas.ExpenseOut)
+async def get_expense(expense_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_exp = await async_expense_service.get_expense(db, expense_id)
+    if not db_exp:
+        raise HTTPException(status_code=404, detail="Expense not found")
+    return db_exp
+
+@router.put("/{expense_id}", response_model=schemas.ExpenseOut)
+async def update_expense(expense_id: int, payload: schemas.ExpenseUpdate, db: AsyncSession = Depends(get_async_db)):
+    db_exp = await async_expense_service.update_expense(db, expense_id, payload)
+    if not db_exp:
+        raise HTTPException(status_code=404, detail="Expense not found")
+    return db_exp
+
+@router.delete("/{expense_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_expense(expense_id: int, db: AsyncSession = Depends(get_async_db)):
+    ok = await async_expense_service.delete_expense(db, expense_id)
+    if not ok:
+        raise HTTPException(status_code=404, detail="Expense not found")
+    return
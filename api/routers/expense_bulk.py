@@ -0,0 +1,46 @@
+# api/routers/expense_bulk.py
+# Bulk import/export endpoints. They stream through their own sync sessions and are
+# shared by the sync and async expense routers, so they live in a separate router
+# that main.py includes before the /expenses/{expense_id} routes.
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import date
+
+from api.db.session import get_db
+from api.models import schemas
+from api.services import import_service, export_service
+from api.ml.classifier import classifier_provider
+
+router = APIRouter(prefix="/expenses", tags=["expenses"])
+
+@router.post("/import", response_model=schemas.ImportResult)
+def import_expenses(
+    file: UploadFile = File(...),
+    fmt: Optional[str] = Query(None, alias="format", pattern="^(csv|ndjson)$", description="Defaults to the file extension"),
+    chunk_size: int = Query(import_service.DEFAULT_CHUNK_SIZE, ge=1, le=5000),
+    db: Session = Depends(get_db),
+):
+    fmt = fmt or ("ndjson" if (file.filename or "").lower().endswith((".ndjson", ".jsonl", ".json")) else "csv")
+    rows = import_service.iter_ndjson_rows(file.file) if fmt == "ndjson" else import_service.iter_csv_rows(file.file)
+    try:
+        categorize = classifier_provider.get().predict_batch
+    except FileNotFoundError:
+        categorize = None  # no trained model: import rows as they are
+    return import_service.import_expenses(db, rows, categorize=categorize, chunk_size=chunk_size)
+
+@router.get("/export")
+def export_expenses(
+    fmt: str = Query("csv", alias="format", pattern="^(csv|ndjson|parquet)$"),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category: Optional[str] = None,
+):
+    if fmt == "parquet" and not export_service.PYARROW_AVAILABLE:
+        raise HTTPException(status_code=501, detail="Parquet export requires pyarrow")
+    return StreamingResponse(
+        export_service.stream_export(fmt, start_date=start_date, end_date=end_date, category=category),
+        media_type=export_service.MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="expenses.{fmt}"'},
+    )
@@ -1,7 +1,8 @@
 # api/routers/expenses.py
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Union
+from datetime import date
 
 from api.db.session import get_db
 from api.models import schemas
@@ -13,9 +14,26 @@ router = APIRouter(prefix="/expenses", tags=["expenses"])
 def create_expense(payload: schemas.ExpenseCreate, db: Session = Depends(get_db)):
     return expense_service.create_expense(db, payload)
 
-@router.get("/", response_model=List[schemas.ExpenseOut])
-def list_expenses(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000), db: Session = Depends(get_db)):
-    return expense_service.get_expenses(db, skip=skip, limit=limit)
+@router.get("/", response_model=Union[List[schemas.ExpenseOut], schemas.ExpensePage])
+def list_expenses(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category: Optional[str] = None,
+    paginate: str = Query("offset", pattern="^(offset|cursor)$", description="'cursor' returns {items, next_cursor}"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; implies paginate=cursor"),
+    db: Session = Depends(get_db),
+):
+    if paginate == "offset" and cursor is None:
+        return expense_service.get_expenses(db, skip=skip, limit=limit, start_date=start_date, end_date=end_date, category=category)
+    try:
+        items, next_cursor = expense_service.get_expenses_page(
+            db, cursor=cursor, limit=limit, start_date=start_date, end_date=end_date, category=category
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor}
 
 @router.get("/{expense_id}", response_model=schemas.ExpenseOut)
 def get_expense(expense_id: int, db: Session = Depends(get_db)):
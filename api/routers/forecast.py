@@ -21,26 +21,112 @@
 #     result = forecast_service.get_forecast(periods=periods, freq=used_freq, model_type=("prophet" if model == "prophet" else "lr"))
 #     return result
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from api.db.database import get_db
+from api.db.session import get_read_db
+from api.crud.expenses import get_period_totals
 # from api.services import forecast_service
 import api.services.forecast_service as forecast_service
+from api.services.serialization import FastJSONResponse
+from api.services.training_jobs import QueueFullError, job_manager
 
 
 router = APIRouter()
 
-@router.get("/forecast/")
+# API freq param -> pandas offset alias (pandas >= 2.2 rejects bare "M"/"Q")
+FREQ_MAP = {"D": "D", "W": "W", "M": "MS", "Q": "QS"}
+# API model param -> model_type; anything unknown falls back to linear regression
+MODEL_TYPES = {"prophet": "prophet", "hw": "hw"}
+
+@router.get("/forecast/", response_class=FastJSONResponse)
 def get_forecast(
     periods: int = 7,
     freq: str = "D",
     model: str = "lr",
-    db: Session = Depends(get_db)
+    shape: str = Query("rows", pattern="^(rows|columns)$"),
+    future_only: bool = False,
+    db: Session = Depends(get_read_db)
+):
+    """
+    shape=columns returns {"date": [...], "predicted": [...], "lower": [...], "upper": [...]}
+    instead of one object per period; future_only drops the in-sample periods.
+    """
+    used_freq = FREQ_MAP.get(freq.upper(), "D")
+    return FastJSONResponse(forecast_service.get_forecast(
+        periods=periods,
+        freq=used_freq,
+        model_type=MODEL_TYPES.get(model, "lr"),
+        db=db,
+        columnar=shape == "columns",
+        future_only=future_only,
+    ))
+
+
+@router.get("/forecast/by-category", response_class=FastJSONResponse)
+def get_category_forecast(
+    periods: int = 7,
+    freq: str = "D",
+    model: str = "lr",
+    shape: str = Query("rows", pattern="^(rows|columns)$"),
+    db: Session = Depends(get_read_db)
 ):
-    used_freq = freq.upper()
-    return forecast_service.get_forecast(
+    """Next `periods` intervals per category (future periods only), for budgeting."""
+    used_freq = FREQ_MAP.get(freq.upper(), "D")
+    return FastJSONResponse(forecast_service.get_category_forecast(
         periods=periods,
         freq=used_freq,
-        model_type=("prophet" if model == "prophet" else "lr"),
-        db=db
-    )
+        model_type=MODEL_TYPES.get(model, "lr"),
+        db=db,
+        columnar=shape == "columns",
+    ))
+
+
+@router.get("/forecast/backtest")
+def get_backtest(
+    models: str = "lr,hw,prophet",
+    freq: str = "D",
+    horizon: int = Query(14, ge=1, le=365),
+    folds: int = Query(5, ge=1, le=50),
+    db: Session = Depends(get_read_db)
+):
+    """Rolling-origin MAE / MAPE per horizon step and fit / predict time for each model."""
+    used_freq = FREQ_MAP.get(freq.upper(), "D")
+    model_types = sorted({MODEL_TYPES.get(m.strip(), "lr") for m in models.split(",") if m.strip()})
+    try:
+        return forecast_service.get_backtest(model_types, freq=used_freq, horizon=horizon, folds=folds, db=db)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/forecast/cache")
+def forecast_cache_stats():
+    return forecast_service.forecast_cache.info()
+
+
+class TrainJobRequest(BaseModel):
+    model: str = "lr"
+    freq: str = "D"
+
+@router.post("/forecast/jobs", status_code=status.HTTP_202_ACCEPTED)
+def start_training_job(req: TrainJobRequest, db: Session = Depends(get_read_db)):
+    """Fit and register a new model on the training process pool; poll GET /forecast/jobs/{id}."""
+    used_freq = FREQ_MAP.get(req.freq.upper(), "D")
+    df = get_period_totals(db, freq=used_freq)
+    if df.empty:
+        raise HTTPException(status_code=400, detail="no expense data available")
+    try:
+        return job_manager.submit(df, freq=used_freq, model_type=MODEL_TYPES.get(req.model, "lr"))
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+@router.get("/forecast/jobs")
+def list_training_jobs():
+    return job_manager.list()
+
+@router.get("/forecast/jobs/{job_id}")
+def get_training_job(job_id: str):
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -1,10 +1,21 @@
 # api/routers/ml_routes.py
+import os
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from api.ml.classifier import ExpenseClassifier
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+from api.ml.classifier import ExpenseClassifier, classifier_provider, ONLINE, MERCHANT_RULES
+from api.ml.rules import merchant_rules
+from api.services.micro_batcher import MicroBatcher
 
 router = APIRouter(prefix="/ml", tags=["ml"])
-cls = ExpenseClassifier()  
+
+# Opt-in: coalesce concurrent /ml/predict calls into one vectorized inference
+MICROBATCH = os.getenv("CLASSIFIER_MICROBATCH", "false").lower() in ("1", "true", "yes")
+MICROBATCH_MAX_SIZE = int(os.getenv("CLASSIFIER_BATCH_MAX_SIZE", "64"))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("CLASSIFIER_BATCH_MAX_WAIT_MS", "5"))
+
+MAX_BATCH_SIZE = 10000
 
 class PredictRequest(BaseModel):
     description: str
@@ -13,13 +24,104 @@ class PredictResponse(BaseModel):
     category: str
     probabilities: list  
 
+class BatchPredictRequest(BaseModel):
+    descriptions: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+    top_k: Optional[int] = Field(3, ge=1, description="Number of most likely labels to return per description; null for all")
+
+class BatchPredictResponse(BaseModel):
+    results: List[PredictResponse]
+
+class RulesUpdate(BaseModel):
+    # pattern -> category; null removes the rule
+    rules: Dict[str, Optional[str]] = Field(..., min_length=1)
+
+def _classifier() -> ExpenseClassifier:
+    # the shared instance; a missing model makes the ML routes unavailable, not the whole app
+    try:
+        return classifier_provider.get()
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+# the classifier is looked up per batch, so hot reloads apply to the next batch
+batcher = MicroBatcher(lambda texts: classifier_provider.get().classify_batch(texts),
+                       max_batch_size=MICROBATCH_MAX_SIZE, max_wait_ms=MICROBATCH_MAX_WAIT_MS)
+
 @router.post("/predict", response_model=PredictResponse)
-def predict(req: PredictRequest):
+async def predict(req: PredictRequest):
     desc = req.description
     if not desc or not desc.strip():
         raise HTTPException(status_code=400, detail="Empty description")
-    cat = cls.predict(desc)
-    probs = cls.predict_proba(desc)
+    if MICROBATCH:
+        try:
+            cat, probs = await batcher.submit(desc)
+        except FileNotFoundError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+    else:
+        # model loading / reload checks can block, so they stay off the event loop
+        cat, probs = await run_in_threadpool(lambda: _classifier().classify(desc))
     # Convert probabilities to list of [label, float]
     probs_list = [[label, float(prob)] for label, prob in probs]
     return {"category": cat, "probabilities": probs_list}
+
+@router.post("/predict/batch", response_model=BatchPredictResponse)
+def predict_batch(req: BatchPredictRequest):
+    empty = [i for i, d in enumerate(req.descriptions) if not d or not d.strip()]
+    if empty:
+        raise HTTPException(status_code=400, detail=f"Empty description at index {empty[0]}")
+    # one vectorized pass; the top label is the first entry of each sorted row
+    cls = _classifier()
+    probs = cls.predict_proba_batch(req.descriptions, top_k=req.top_k or len(cls.classes_))
+    results = [
+        {"category": row[0][0], "probabilities": [[label, p] for label, p in row]}
+        for row in probs
+    ]
+    return {"results": results}
+
+@router.get("/cache")
+def cache_stats():
+    # hit/miss/eviction counters of the classifier's prediction cache
+    return _classifier().cache_info()
+
+@router.get("/batching")
+def batching_stats():
+    # batch-size and queue-time histograms of the /ml/predict micro-batcher
+    return {"enabled": MICROBATCH, **batcher.stats()}
+
+@router.get("/model")
+def model_info():
+    # which artifact is loaded, and how often it has been (re)loaded
+    return classifier_provider.info()
+
+@router.get("/online")
+def online_status():
+    # background updates of the online classifier from the misclassification log
+    from api.services.online_learning import online_updater
+    return {"enabled": ONLINE, **online_updater.status()}
+
+@router.post("/online/update")
+def online_update():
+    # fold the corrections logged so far into the online model now instead of on the next tick
+    from api.services.online_learning import online_updater
+    if not ONLINE:
+        raise HTTPException(status_code=409, detail="Online learning is disabled (CLASSIFIER_ONLINE)")
+    try:
+        return online_updater.run_once()
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+@router.get("/rules")
+def rules_info(include_rules: bool = False):
+    # merchant rules answered before the model, with their hit rate
+    out = {"enabled": MERCHANT_RULES, **merchant_rules.stats()}
+    if include_rules:
+        out["table"] = merchant_rules.rules()
+    return out
+
+@router.put("/rules")
+def update_rules(req: RulesUpdate):
+    # add / replace / delete rules; saved to the rules CSV and live immediately in this process
+    try:
+        rules = merchant_rules.set_rules(req.rules)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"rules": len(rules)}
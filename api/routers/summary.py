@@ -0,0 +1,21 @@
+# api/routers/summary.py
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import date
+
+from api.db.session import get_read_db
+from api.crud.expenses import get_category_totals
+
+router = APIRouter(prefix="/summary", tags=["summary"])
+
+@router.get("/")
+def get_summary(start_date: Optional[date] = None, end_date: Optional[date] = None, db: Session = Depends(get_read_db)):
+    """Overall and per-category totals, served from the daily_totals rollup."""
+    rows = get_category_totals(db, start_date=start_date, end_date=end_date)
+    by_category = [{"category": cat or None, "total": float(total), "count": int(count)} for cat, total, count in rows]
+    return {
+        "total": sum(c["total"] for c in by_category),
+        "count": sum(c["count"] for c in by_category),
+        "by_category": by_category,
+    }
@@ -0,0 +1,73 @@
+# api/services/async_expense_service.py
+# Async versions of the api/services/expense_service.py functions used by the expense routes.
+import asyncio
+from datetime import date
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.db.models import Expense
+from api.models.schemas import ExpenseCreate, ExpenseUpdate
+from api.services.expense_service import apply_filters, decode_cursor, encode_cursor
+from api.services import rollup_service
+from api.services.online_learning import log_correction
+from typing import List, Optional, Tuple
+
+async def create_expense(db: AsyncSession, payload: ExpenseCreate) -> Expense:
+    db_exp = Expense(**payload.dict())
+    db.add(db_exp)
+    deltas = rollup_service.collect_deltas([(db_exp.date, db_exp.category, db_exp.amount)])
+    await db.run_sync(rollup_service.apply_deltas, deltas)
+    await db.commit()
+    await db.refresh(db_exp)
+    # inference and the file append stay off the event loop
+    await asyncio.to_thread(log_correction, db_exp.description, payload.category)
+    return db_exp
+
+async def get_expenses(db: AsyncSession, skip: int = 0, limit: int = 100, start_date: Optional[date] = None,
+                       end_date: Optional[date] = None, category: Optional[str] = None) -> List[Expense]:
+    stmt = apply_filters(select(Expense), start_date, end_date, category)
+    stmt = stmt.order_by(Expense.date.desc(), Expense.id.desc()).offset(skip).limit(limit)
+    return list((await db.scalars(stmt)).all())
+
+async def get_expenses_page(db: AsyncSession, cursor: Optional[str] = None, limit: int = 100, start_date: Optional[date] = None,
+                            end_date: Optional[date] = None, category: Optional[str] = None) -> Tuple[List[Expense], Optional[str]]:
+    stmt = apply_filters(select(Expense), start_date, end_date, category)
+    if cursor:
+        after_date, after_id = decode_cursor(cursor)
+        stmt = stmt.filter(tuple_(Expense.date, Expense.id) < tuple_(after_date, after_id))
+    stmt = stmt.order_by(Expense.date.desc(), Expense.id.desc()).limit(limit + 1)
+    rows = list((await db.scalars(stmt)).all())
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return rows, (encode_cursor(rows[-1]) if has_more else None)
+
+async def get_expense(db: AsyncSession, expense_id: int) -> Optional[Expense]:
+    return await db.get(Expense, expense_id)
+
+async def update_expense(db: AsyncSession, expense_id: int, payload: ExpenseUpdate) -> Optional[Expense]:
+    db_exp = await get_expense(db, expense_id)
+    if not db_exp:
+        return None
+    before = (db_exp.date, db_exp.category, db_exp.amount)
+    changes = payload.dict(exclude_unset=True)
+    for field, value in changes.items():
+        setattr(db_exp, field, value)
+    deltas = rollup_service.merge_deltas(
+        rollup_service.collect_deltas([before], sign=-1),
+        rollup_service.collect_deltas([(db_exp.date, db_exp.category, db_exp.amount)]),
+    )
+    await db.run_sync(rollup_service.apply_deltas, deltas)
+    await db.commit()
+    await db.refresh(db_exp)
+    if "category" in changes:
+        await asyncio.to_thread(log_correction, db_exp.description, db_exp.category)
+    return db_exp
+
+async def delete_expense(db: AsyncSession, expense_id: int) -> bool:
+    db_exp = await get_expense(db, expense_id)
+    if not db_exp:
+        return False
+    await db.delete(db_exp)
+    deltas = rollup_service.collect_deltas([(db_exp.date, db_exp.category, db_exp.amount)], sign=-1)
+    await db.run_sync(rollup_service.apply_deltas, deltas)
+    await db.commit()
+    return True
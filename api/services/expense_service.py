@@ -1,18 +1,94 @@
 # api/services/expense_service.py
+import base64
+import json
+from datetime import date
+from sqlalchemy import insert, select, tuple_
 from sqlalchemy.orm import Session
 from api.db.models import Expense
 from api.models.schemas import ExpenseCreate, ExpenseUpdate
-from typing import List, Optional
+from api.services import rollup_service
+from api.services.online_learning import log_correction
+from typing import List, Optional, Sequence, Tuple
+
+EXPORT_COLUMNS = ("id", "date", "description", "amount", "category")
+
+def apply_filters(query, start_date: Optional[date] = None, end_date: Optional[date] = None, category: Optional[str] = None):
+    # works for both legacy Query objects and 2.0-style select() statements
+    if start_date:
+        query = query.filter(Expense.date >= start_date)
+    if end_date:
+        query = query.filter(Expense.date <= end_date)
+    if category:
+        query = query.filter(Expense.category == category)
+    return query
 
 def create_expense(db: Session, payload: ExpenseCreate) -> Expense:
     db_exp = Expense(**payload.dict())
     db.add(db_exp)
+    rollup_service.apply_deltas(db, rollup_service.collect_deltas([(db_exp.date, db_exp.category, db_exp.amount)]))
     db.commit()
     db.refresh(db_exp)
+    log_correction(db_exp.description, payload.category)
     return db_exp
 
-def get_expenses(db: Session, skip: int = 0, limit: int = 100) -> List[Expense]:
-    return db.query(Expense).order_by(Expense.date.desc()).offset(skip).limit(limit).all()
+def bulk_create_expenses(db: Session, payloads: Sequence[ExpenseCreate]) -> int:
+    """
+    Insert many expenses with a single multi-row INSERT in one transaction.
+    Returns the number of rows inserted; rows are not refreshed into ORM objects.
+    """
+    if not payloads:
+        return 0
+    rows = [p.dict() for p in payloads]
+    db.execute(insert(Expense).values(rows))
+    rollup_service.apply_deltas(db, rollup_service.collect_deltas((r["date"], r["category"], r["amount"]) for r in rows))
+    db.commit()
+    return len(payloads)
+
+def get_expenses(db: Session, skip: int = 0, limit: int = 100, start_date: Optional[date] = None,
+                 end_date: Optional[date] = None, category: Optional[str] = None) -> List[Expense]:
+    query = apply_filters(db.query(Expense), start_date, end_date, category)
+    return query.order_by(Expense.date.desc(), Expense.id.desc()).offset(skip).limit(limit).all()
+
+def encode_cursor(exp: Expense) -> str:
+    raw = json.dumps([exp.date.isoformat(), exp.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[date, int]:
+    """Raises ValueError for anything that was not produced by encode_cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        d, exp_id = json.loads(raw)
+        return date.fromisoformat(d), int(exp_id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+def get_expenses_page(db: Session, cursor: Optional[str] = None, limit: int = 100, start_date: Optional[date] = None,
+                      end_date: Optional[date] = None, category: Optional[str] = None) -> Tuple[List[Expense], Optional[str]]:
+    """
+    Keyset pagination over (date DESC, id DESC). The cursor is the position of the
+    last row of the previous page, so every page is an index seek + limit scan
+    regardless of how deep it is. Returns (rows, next_cursor or None).
+    """
+    query = apply_filters(db.query(Expense), start_date, end_date, category)
+    if cursor:
+        after_date, after_id = decode_cursor(cursor)
+        query = query.filter(tuple_(Expense.date, Expense.id) < tuple_(after_date, after_id))
+    rows = query.order_by(Expense.date.desc(), Expense.id.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return rows, (encode_cursor(rows[-1]) if has_more else None)
+
+def iter_expense_rows(db: Session, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                      category: Optional[str] = None, batch_size: int = 1000):
+    """
+    Yield lists of plain row tuples (EXPORT_COLUMNS order) straight from the cursor.
+    No ORM objects are built and at most batch_size rows are buffered at a time.
+    """
+    stmt = select(*(getattr(Expense, c) for c in EXPORT_COLUMNS))
+    stmt = apply_filters(stmt, start_date, end_date, category).order_by(Expense.date, Expense.id)
+    result = db.execute(stmt.execution_options(yield_per=batch_size))
+    for partition in result.partitions():
+        yield [tuple(row) for row in partition]
 
 def get_expense(db: Session, expense_id: int) -> Optional[Expense]:
     return db.query(Expense).filter(Expense.id == expense_id).first()
@@ -21,11 +97,19 @@ def update_expense(db: Session, expense_id: int, payload: ExpenseUpdate) -> Opti
     db_exp = get_expense(db, expense_id)
     if not db_exp:
         return None
-    for field, value in payload.dict(exclude_unset=True).items():
+    before = (db_exp.date, db_exp.category, db_exp.amount)
+    changes = payload.dict(exclude_unset=True)
+    for field, value in changes.items():
         setattr(db_exp, field, value)
     db.add(db_exp)
+    rollup_service.apply_deltas(db, rollup_service.merge_deltas(
+        rollup_service.collect_deltas([before], sign=-1),
+        rollup_service.collect_deltas([(db_exp.date, db_exp.category, db_exp.amount)]),
+    ))
     db.commit()
     db.refresh(db_exp)
+    if "category" in changes:
+        log_correction(db_exp.description, db_exp.category)
     return db_exp
 
 def delete_expense(db: Session, expense_id: int) -> bool:
@@ -33,5 +117,6 @@ def delete_expense(db: Session, expense_id: int) -> bool:
     if not db_exp:
         return False
     db.delete(db_exp)
+    rollup_service.apply_deltas(db, rollup_service.collect_deltas([(db_exp.date, db_exp.category, db_exp.amount)], sign=-1))
     db.commit()
     return True
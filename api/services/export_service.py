@@ -0,0 +1,121 @@
+# api/services/export_service.py
+import csv
+import io
+import json
+from datetime import date
+from typing import Iterator, List, Optional, Tuple
+
+from api.db.session import ReadSessionLocal
+from api.services import expense_service
+from api.services.expense_service import EXPORT_COLUMNS
+
+# pyarrow is optional; parquet export is only offered when it is installed
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except Exception:
+    PYARROW_AVAILABLE = False
+
+EXPORT_BATCH_SIZE = 5000
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+Row = Tuple[int, date, str, float, Optional[str]]
+
+
+def _csv_chunks(batches: Iterator[List[Row]]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(EXPORT_COLUMNS)
+    for rows in batches:
+        writer.writerows(rows)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate(0)
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def _ndjson_chunks(batches: Iterator[List[Row]]) -> Iterator[bytes]:
+    dumps = json.dumps
+    for rows in batches:
+        lines = [
+            dumps({"id": r[0], "date": r[1].isoformat(), "description": r[2], "amount": r[3], "category": r[4]})
+            for r in rows
+        ]
+        lines.append("")
+        yield "\n".join(lines).encode("utf-8")
+
+
+class _DrainableSink(io.RawIOBase):
+    """
+    Write-only file object for ParquetWriter that hands out what has been written
+    so far and forgets it, while tell() keeps reporting the absolute position
+    (parquet footers store absolute offsets).
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._pos = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        data = bytes(b)
+        self._chunks.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._pos
+
+    def drain(self) -> bytes:
+        out = b"".join(self._chunks)
+        self._chunks = []
+        return out
+
+
+def _parquet_chunks(batches: Iterator[List[Row]]) -> Iterator[bytes]:
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("date", pa.date32()),
+        ("description", pa.string()),
+        ("amount", pa.float64()),
+        ("category", pa.string()),
+    ])
+    sink = _DrainableSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        # one row group per database batch
+        for rows in batches:
+            columns = list(zip(*rows)) if rows else [[] for _ in EXPORT_COLUMNS]
+            writer.write_table(pa.Table.from_arrays([pa.array(c, type=f.type) for c, f in zip(columns, schema)], schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+_WRITERS = {"csv": _csv_chunks, "ndjson": _ndjson_chunks, "parquet": _parquet_chunks}
+
+
+def stream_export(fmt: str, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                  category: Optional[str] = None, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    """
+    Generator of encoded export chunks. It owns its session so the cursor stays open
+    for as long as the response is being streamed, independent of request dependencies.
+    """
+    if fmt == "parquet" and not PYARROW_AVAILABLE:
+        raise RuntimeError("Parquet export requires pyarrow.")
+    db = ReadSessionLocal()
+    try:
+        batches = expense_service.iter_expense_rows(db, start_date, end_date, category, batch_size=batch_size)
+        yield from _WRITERS[fmt](batches)
+    finally:
+        db.close()
@@ -58,34 +58,98 @@
 
 # api/services/forecast_service.py
 
+import os
 from typing import Dict, Any
 import pandas as pd
+from api.ml import backtest as ml_backtest
 from api.ml import forecast as ml_forecast
-from api.crud.expenses import get_expenses
+from api.ml.locks import SingleFlight
+from api.ml.registry import series_fingerprint
+from api.crud.expenses import get_period_category_totals, get_period_totals
+from api.services.cache import TTLCache
+from api.services.rollup_service import get_data_version
+from api.services.serialization import forecast_payload
+from api.services.training_jobs import QueueFullError, job_manager
 
+# Refit stale models on the training process pool and keep serving the previous version meanwhile
+BACKGROUND_REFIT = os.getenv("FORECAST_BACKGROUND_REFIT", "true").lower() in ("1", "true", "yes")
 
-def get_forecast(periods: int, freq: str, model_type: str, db) -> Dict[str, Any]:
+FORECAST_CACHE_SIZE = int(os.getenv("FORECAST_CACHE_SIZE", "128"))
+FORECAST_CACHE_TTL = float(os.getenv("FORECAST_CACHE_TTL", "600"))
+
+# (model_type, freq, periods, data_version, ...) -> response dict
+forecast_cache = TTLCache(max_size=FORECAST_CACHE_SIZE, ttl=FORECAST_CACHE_TTL)
+# (model_types, freq, horizon, folds, data fingerprint) -> backtest report
+backtest_cache = TTLCache(max_size=FORECAST_CACHE_SIZE, ttl=float(os.getenv("FORECAST_BACKTEST_CACHE_TTL", "86400")))
+
+# identical requests that miss the cache at the same time share one computation
+forecast_flight = SingleFlight()
+
+
+def _drop_cached_forecasts(job: Dict[str, Any]):
+    # a refit finished: results computed with the previous model must not be served any more
+    forecast_cache.invalidate(
+        lambda k: k[1] == job["freq"] and ml_forecast._effective_model_type(k[0]) == job["model_type"]
+    )
+
+
+job_manager.add_listener(_drop_cached_forecasts)
+
+
+def get_forecast(periods: int, freq: str, model_type: str, db, columnar: bool = False,
+                 future_only: bool = False) -> Dict[str, Any]:
+    """
+    Cached front of _compute_forecast. Any write to the ledger bumps the data
+    version, so results computed on older data are never served again (and are
+    dropped on the next miss). Concurrent misses for the same key are coalesced.
+    """
+    version = get_data_version(db)
+    key = (model_type, freq, periods, version, columnar, future_only)
+    result = forecast_cache.get(key)
+    if result is None:
+        result = forecast_flight.do(
+            key, lambda: _compute_and_cache(key, periods, freq, model_type, db, columnar, future_only)
+        )
+    return result
+
+
+def _compute_and_cache(key, periods: int, freq: str, model_type: str, db, columnar: bool = False,
+                       future_only: bool = False) -> Dict[str, Any]:
+    forecast_cache.invalidate(lambda k: k[3] != key[3])
+    result = _compute_forecast(periods, freq, model_type, db, columnar=columnar, future_only=future_only)
+    # answers from a stale model are not cached, so the refit result shows up as soon as it lands
+    if "refit" not in result:
+        forecast_cache.set(key, result)
+    return result
+
+
+def _compute_forecast(periods: int, freq: str, model_type: str, db, columnar: bool = False,
+                      future_only: bool = False) -> Dict[str, Any]:
     """
     Fetch expenses from DB and run forecasting ML model.
     """
-    # 1. Fetch rows from DB
-    rows = get_expenses(db)
+    # 1-2. Fetch per-period totals aggregated by the DB (one row per period, not per expense)
+    df = get_period_totals(db, freq=freq)
 
-    if not rows:
+    if df.empty:
         return {"error": "no expense data available"}
 
-    # 2. Convert to DataFrame
-    df = pd.DataFrame([
-        {"date": r.date, "amount": r.amount}
-        for r in rows
-    ])
+    # 3. Call ML forecast function; a stale model is refit in the background while it keeps serving
+    refit: Dict[str, Any] = {}
+
+    def queue_refit(reason: str):
+        refit["reason"] = reason
+        try:
+            refit["job_id"] = job_manager.submit(df, freq=freq, model_type=model_type)["id"]
+        except QueueFullError:
+            refit["job_id"] = None
 
-    # 3. Call ML forecast function
     forecast_df, train_df = ml_forecast.forecast_from_raw(
         df,
         periods=periods,
         freq=freq,
-        model_type=model_type
+        model_type=model_type,
+        on_stale=queue_refit if BACKGROUND_REFIT else None,
     )
 
     # 4. Optional backtest metrics
@@ -98,14 +162,67 @@ def get_forecast(periods: int, freq: str, model_type: str, db) -> Dict[str, Any]
                 merged["yhat"]
             )
 
-    # 5. Final output format
-    rows_out = []
-    for _, r in forecast_df.iterrows():
-        rows_out.append({
-            "date": r["ds"].strftime("%Y-%m-%d"),
-            "predicted": float(r["yhat"]),
-            "lower": float(r.get("yhat_lower", r["yhat"] * 0.9)),
-            "upper": float(r.get("yhat_upper", r["yhat"] * 1.1)),
+    # 5. Final output format (built per column, not per row)
+    if future_only and train_df is not None and not train_df.empty:
+        forecast_df = forecast_df[forecast_df["ds"] > train_df["ds"].max()]
+    result = {"forecast": forecast_payload(forecast_df, columnar=columnar), "metrics": metrics}
+    if refit:
+        result["refit"] = refit
+    return result
+
+
+def get_category_forecast(periods: int, freq: str, model_type: str, db, columnar: bool = False) -> Dict[str, Any]:
+    """Per-category forecast of the next `periods` intervals, cached like get_forecast."""
+    version = get_data_version(db)
+    key = (model_type, freq, periods, version, "by_category", columnar)
+    result = forecast_cache.get(key)
+    if result is None:
+        result = forecast_flight.do(
+            key, lambda: _compute_category_forecast(key, periods, freq, model_type, db, columnar)
+        )
+    return result
+
+
+def _compute_category_forecast(key, periods: int, freq: str, model_type: str, db,
+                               columnar: bool = False) -> Dict[str, Any]:
+    forecast_cache.invalidate(lambda k: k[3] != key[3])
+    df = get_period_category_totals(db, freq=freq)
+    if df.empty:
+        return {"error": "no expense data available"}
+    fc = ml_forecast.forecast_by_category(df, periods=periods, freq=freq, model_type=model_type)
+
+    by_category = []
+    for category, part in fc.groupby("category", sort=True):
+        by_category.append({
+            "category": category or None,
+            "total": float(part["yhat"].sum()),
+            "forecast": forecast_payload(part, columnar=columnar),
         })
+    result = {"model": ml_forecast._effective_model_type(model_type), "by_category": by_category}
+    forecast_cache.set(key, result)
+    return result
+
 
-    return {"forecast": rows_out, "metrics": metrics}
+def get_backtest(model_types, freq: str, horizon: int, folds: int, db) -> Dict[str, Any]:
+    """
+    Rolling-origin backtest of model_types on the ledger. Cached per fingerprint of
+    the aggregated series, so a report is reused until the per-period totals change.
+    Raises ValueError if there is not enough history.
+    """
+    df = get_period_totals(db, freq=freq)
+    if df.empty:
+        raise ValueError("no expense data available")
+    fingerprint = series_fingerprint(ml_forecast._aggregate_expenses(df, freq=freq))
+    key = (tuple(model_types), freq, horizon, folds, fingerprint)
+    result = backtest_cache.get(key)
+    if result is None:
+        result = forecast_flight.do(key, lambda: _compute_backtest(key, df))
+    return result
+
+
+def _compute_backtest(key, df) -> Dict[str, Any]:
+    model_types, freq, horizon, folds, fingerprint = key
+    result = ml_backtest.backtest(df, model_types=model_types, freq=freq, horizon=horizon, n_folds=folds)
+    result["data_fingerprint"] = fingerprint
+    backtest_cache.set(key, result)
+    return result
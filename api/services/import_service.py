@@ -0,0 +1,136 @@
+# api/services/import_service.py
+import codecs
+import csv
+import json
+import time
+from itertools import islice
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from api.models.schemas import ExpenseCreate
+from api.services import expense_service
+
+DEFAULT_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+
+Categorizer = Callable[[Sequence[str]], List[str]]
+
+
+def _decoded_lines(fileobj: BinaryIO, bad_lines: List[Tuple[int, Exception]]) -> Iterator[str]:
+    """
+    UTF-8 lines of a binary upload (a leading BOM is dropped). A line that is not
+    valid UTF-8 is recorded in bad_lines and replaced by an empty line, so one bad
+    byte fails that row instead of the rest of the file.
+    """
+    for line_no, raw in enumerate(fileobj, start=1):
+        if line_no == 1:
+            raw = raw.removeprefix(codecs.BOM_UTF8)
+        try:
+            yield raw.decode("utf-8")
+        except UnicodeDecodeError as e:
+            bad_lines.append((line_no, ValueError(f"invalid UTF-8: {e.reason} at byte {e.start}")))
+            yield "\n"
+
+
+def iter_csv_rows(fileobj: BinaryIO) -> Iterator[Tuple[int, Any]]:
+    """
+    Yield (line_number, row_dict) from a CSV upload with a header line.
+    The file is decoded and parsed lazily, one line at a time. Lines that cannot be
+    decoded or parsed are yielded as the exception, like iter_ndjson_rows does.
+    """
+    bad_lines: List[Tuple[int, Exception]] = []
+    reader = csv.DictReader(_decoded_lines(fileobj, bad_lines))
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            break
+        except csv.Error as e:
+            row = ValueError(f"invalid CSV: {e}")
+        yield from bad_lines
+        bad_lines.clear()
+        yield reader.line_num, row
+    yield from bad_lines
+
+
+def iter_ndjson_rows(fileobj: BinaryIO) -> Iterator[Tuple[int, Any]]:
+    """
+    Yield (line_number, parsed_object) from a newline-delimited JSON upload.
+    Lines that are not valid UTF-8 / JSON are yielded as the exception so the
+    caller can report them alongside validation errors.
+    """
+    bad_lines: List[Tuple[int, Exception]] = []
+    for line_no, line in enumerate(_decoded_lines(fileobj, bad_lines), start=1):
+        if bad_lines:
+            yield from bad_lines
+            bad_lines.clear()
+            continue
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except ValueError as e:
+            yield line_no, e
+
+
+def _validate(raw: Any) -> ExpenseCreate:
+    if isinstance(raw, Exception):
+        raise raw
+    if not isinstance(raw, dict):
+        raise ValueError("row must be an object")
+    # empty CSV cells mean "not provided" so field defaults (e.g. today's date) apply
+    data = {k: v for k, v in raw.items() if k and v not in ("", None)}
+    return ExpenseCreate(**data)
+
+
+def _error_message(e: Exception) -> str:
+    if isinstance(e, ValidationError):
+        return "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors())
+    return str(e)
+
+
+def import_expenses(
+    db: Session,
+    rows: Iterator[Tuple[int, Any]],
+    categorize: Optional[Categorizer] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Dict[str, Any]:
+    """
+    Validate, auto-categorize and insert rows chunk by chunk.
+    Each chunk is categorized with one batched classifier call and written with one
+    multi-row INSERT in its own transaction, so memory is bounded by chunk_size.
+    Invalid rows are skipped and reported; valid rows in the same chunk are kept.
+    """
+    started = time.perf_counter()
+    summary: Dict[str, Any] = {"received": 0, "inserted": 0, "failed": 0, "categorized": 0, "errors": []}
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        summary["received"] += len(chunk)
+
+        valid: List[ExpenseCreate] = []
+        for line_no, raw in chunk:
+            try:
+                valid.append(_validate(raw))
+            except (ValidationError, ValueError, TypeError) as e:
+                summary["failed"] += 1
+                if len(summary["errors"]) < MAX_REPORTED_ERRORS:
+                    summary["errors"].append({"row": line_no, "error": _error_message(e)})
+
+        uncategorized = [p for p in valid if not p.category or not p.category.strip()]
+        if uncategorized and categorize is not None:
+            labels = categorize([p.description for p in uncategorized])
+            for p, label in zip(uncategorized, labels):
+                p.category = label
+            summary["categorized"] += len(uncategorized)
+
+        summary["inserted"] += expense_service.bulk_create_expenses(db, valid)
+
+    elapsed = time.perf_counter() - started
+    summary["elapsed_seconds"] = round(elapsed, 4)
+    summary["rows_per_second"] = round(summary["received"] / elapsed, 1) if elapsed > 0 else None
+    return summary
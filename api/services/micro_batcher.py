@@ -0,0 +1,108 @@
+# api/services/micro_batcher.py
+"""
+Dynamic micro-batching for single-item inference requests.
+
+Concurrent callers `await batcher.submit(item)`. A worker task on the event loop
+collects items until max_batch_size are waiting or max_wait_ms has passed since
+the first one arrived, runs fn(items) once in a worker thread, and hands each
+caller its own result. While a batch is running, new arrivals queue up for the
+next one, so batches grow with load and stay at size 1 when the server is idle.
+"""
+import asyncio
+import bisect
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+class Histogram:
+    """Counts of observed values per upper bound (the last bucket is unbounded)."""
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = list(bounds)
+        self._counts = [0] * (len(self.bounds) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self._counts[bisect.bisect_left(self.bounds, value)] += 1
+            self._sum += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            count = sum(self._counts)
+            labels = [f"<={b:g}" for b in self.bounds] + [f">{self.bounds[-1]:g}"]
+            return {"count": count, "mean": (self._sum / count) if count else None,
+                    "buckets": dict(zip(labels, self._counts))}
+
+
+class MicroBatcher:
+    def __init__(self, fn: Callable[[List[Any]], List[Any]], max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.batch_sizes = Histogram([1, 2, 4, 8, 16, 32, 64, 128, 256])
+        self.queue_ms = Histogram([0.5, 1, 2, 5, 10, 20, 50, 100, 250])
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: List[Tuple[Any, asyncio.Future, float]] = []
+        self._worker: Optional[asyncio.Task] = None
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # first use, or a new event loop (e.g. a test client): start over on this loop
+            self._loop = loop
+            self._pending = []
+            self._wakeup = asyncio.Event()
+            self._full = asyncio.Event()
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, item: Any) -> Any:
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self._pending.append((item, future, time.perf_counter()))
+        self._wakeup.set()
+        if len(self._pending) >= self.max_batch_size:
+            self._full.set()
+        return await future
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if len(self._pending) < self.max_batch_size and self.max_wait > 0:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.max_wait)
+                except asyncio.TimeoutError:
+                    pass
+            self._full.clear()
+            batch, self._pending = self._pending[:self.max_batch_size], self._pending[self.max_batch_size:]
+            if self._pending:
+                self._wakeup.set()
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            self.batch_sizes.observe(len(batch))
+            for _, _, queued_at in batch:
+                self.queue_ms.observe((started - queued_at) * 1000)
+            try:
+                results = await self._loop.run_in_executor(None, self.fn, [item for item, _, _ in batch])
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "pending": len(self._pending),
+            "batch_size": self.batch_sizes.snapshot(),
+            "queue_ms": self.queue_ms.snapshot(),
+        }
@@ -0,0 +1,103 @@
+# api/services/online_learning.py
+"""
+Periodic background task that feeds new corrections from the misclassification
+log into the online classifier (api/ml/online.py). Enabled with
+CLASSIFIER_ONLINE=true; each tick fits only the rows appended since the last one.
+
+The log itself is fed by log_correction, which the expense create/update
+services call whenever a user-supplied category disagrees with the classifier.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from api.ml import online
+from api.ml.classifier import ONLINE, ONLINE_PATH, classifier_provider
+
+UPDATE_INTERVAL_SECONDS = float(os.getenv("CLASSIFIER_ONLINE_INTERVAL_SECONDS", "60"))
+# log category corrections from the expense write paths (costs one cached inference per write); on with online learning
+LOG_CORRECTIONS = os.getenv("CLASSIFIER_LOG_CORRECTIONS", str(ONLINE)).lower() in ("1", "true", "yes")
+
+logger = logging.getLogger(__name__)
+
+
+def log_correction(description: Optional[str], category: Optional[str],
+                   log_path: Optional[str] = None) -> bool:
+    """
+    Append (description, predicted, category) to the misclassification log when the
+    user-supplied category differs from the classifier's prediction. Never raises:
+    a missing or failing model only skips the log. Returns whether a row was written.
+    """
+    if not LOG_CORRECTIONS or not description or not description.strip() or not category or not category.strip():
+        return False
+    try:
+        predicted = classifier_provider.get().predict(description)
+        if predicted.lower() == category.strip().lower():
+            return False
+        online.append_correction(log_path or str(online.MISCLASS_LOG_PATH), description, predicted, category.strip())
+        return True
+    except FileNotFoundError:
+        return False
+    except Exception:
+        logger.exception("Logging a category correction failed")
+        return False
+
+
+class OnlineUpdater:
+    def __init__(self, model_path: str = str(ONLINE_PATH), log_path: str = str(online.MISCLASS_LOG_PATH),
+                 interval: float = UPDATE_INTERVAL_SECONDS):
+        self.model_path = model_path
+        self.log_path = log_path
+        self.interval = interval
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Any] = {"runs": 0, "errors": 0, "learned": 0, "last_run": None, "last_error": None}
+
+    def run_once(self) -> Dict[str, Any]:
+        """One update now; the result of online.update_from_log plus the run time."""
+        try:
+            result = online.update_from_log(self.model_path, self.log_path)
+        except Exception as e:
+            with self._lock:
+                self._stats["errors"] += 1
+                self._stats["last_error"] = repr(e)
+            raise
+        with self._lock:
+            self._stats["runs"] += 1
+            self._stats["learned"] += result["learned"]
+            self._stats["last_run"] = {**result, "at": time.time()}
+        return result
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except FileNotFoundError:
+                logger.warning("Online classifier %s not found; bootstrap it with "
+                               "scripts/train_classifier.py --online-out", self.model_path)
+            except Exception:
+                logger.exception("Online classifier update failed")
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="classifier-online-updates", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "running": self._thread is not None and self._thread.is_alive(),
+                    "interval_seconds": self.interval, "model_path": self.model_path, "log_path": self.log_path}
+
+
+online_updater = OnlineUpdater()
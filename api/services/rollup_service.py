@@ -0,0 +1,140 @@
+# api/services/rollup_service.py
+# Maintains the daily_totals rollup (date, category, total, count) alongside writes to expenses.
+# Deltas are applied in the caller's transaction, so the rollup commits or rolls back with the expense.
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from api.db.models import DailyTotal, Expense, LedgerVersion
+
+Key = Tuple[date, str]
+
+
+def _key(exp_date: date, category: Optional[str]) -> Key:
+    return exp_date, (category or "")
+
+
+def collect_deltas(rows: Iterable[Tuple[date, Optional[str], float]], sign: int = 1) -> Dict[Key, List[float]]:
+    """Group (date, category, amount) rows into {(date, category): [total_delta, count_delta]}."""
+    deltas: Dict[Key, List[float]] = defaultdict(lambda: [0.0, 0])
+    for exp_date, category, amount in rows:
+        d = deltas[_key(exp_date, category)]
+        d[0] += sign * amount
+        d[1] += sign
+    return deltas
+
+
+def merge_deltas(*parts: Dict[Key, List[float]]) -> Dict[Key, List[float]]:
+    merged: Dict[Key, List[float]] = defaultdict(lambda: [0.0, 0])
+    for part in parts:
+        for key, (total, count) in part.items():
+            merged[key][0] += total
+            merged[key][1] += count
+    return merged
+
+
+def _upsert(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as upsert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as upsert
+    else:
+        return None
+    return upsert
+
+
+def bump_data_version(db: Session):
+    """Increment the ledger version in the caller's transaction."""
+    upsert = _upsert(db)
+    if upsert is not None:
+        stmt = upsert(LedgerVersion).values(id=1, version=1)
+        db.execute(stmt.on_conflict_do_update(index_elements=[LedgerVersion.id], set_={"version": LedgerVersion.version + 1}))
+        return
+    row = db.get(LedgerVersion, 1)
+    if row is None:
+        db.add(LedgerVersion(id=1, version=1))
+    else:
+        row.version += 1
+    db.flush()
+
+
+def get_data_version(db: Session) -> int:
+    """Current ledger version (primary-key lookup); 0 before the first write."""
+    return db.scalar(select(LedgerVersion.version).where(LedgerVersion.id == 1)) or 0
+
+
+def apply_deltas(db: Session, deltas: Dict[Key, List[float]]):
+    """
+    Add the deltas to daily_totals (upsert) without committing, then drop buckets
+    whose count reached zero, and bump the ledger version. On SQLite/PostgreSQL
+    the rollup update is one executemany upsert.
+    """
+    deltas = {k: v for k, v in deltas.items() if v[1] != 0 or v[0] != 0}
+    if not deltas:
+        return
+    bump_data_version(db)
+    upsert = _upsert(db)
+    if upsert is not None:
+        stmt = upsert(DailyTotal)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DailyTotal.date, DailyTotal.category],
+            set_={"total": DailyTotal.total + stmt.excluded.total, "count": DailyTotal.count + stmt.excluded.count},
+        )
+        db.execute(stmt, [{"date": d, "category": cat, "total": total, "count": count}
+                          for (d, cat), (total, count) in deltas.items()])
+    else:
+        for (d, cat), (total, count) in deltas.items():
+            row = db.get(DailyTotal, (d, cat))
+            if row is None:
+                db.add(DailyTotal(date=d, category=cat, total=total, count=count))
+            else:
+                row.total += total
+                row.count += count
+        db.flush()
+    touched_dates = {d for d, _ in deltas}
+    db.execute(delete(DailyTotal).where(DailyTotal.count <= 0, DailyTotal.date.in_(touched_dates)))
+
+
+def rebuild(db: Session) -> int:
+    """Recompute daily_totals from scratch in one INSERT ... SELECT. Returns the number of buckets."""
+    category = func.coalesce(Expense.category, "")
+    source = select(Expense.date, category, func.sum(Expense.amount), func.count(Expense.id)).group_by(Expense.date, category)
+    db.execute(delete(DailyTotal))
+    db.execute(insert(DailyTotal).from_select(["date", "category", "total", "count"], source))
+    bump_data_version(db)
+    db.commit()
+    return db.scalar(select(func.count()).select_from(DailyTotal))
+
+
+def ensure_built(db: Session) -> bool:
+    """Populate an empty rollup from existing expenses (e.g. first start after upgrading). Returns True if rebuilt."""
+    if db.scalar(select(DailyTotal.date).limit(1)) is not None:
+        return False
+    if db.scalar(select(Expense.id).limit(1)) is None:
+        return False
+    rebuild(db)
+    return True
+
+
+def verify(db: Session, tolerance: float = 1e-6) -> List[dict]:
+    """Compare daily_totals with a fresh GROUP BY over expenses; returns one dict per mismatching bucket."""
+    category = func.coalesce(Expense.category, "")
+    expected = {
+        (d, c): (t, n)
+        for d, c, t, n in db.execute(
+            select(Expense.date, category, func.sum(Expense.amount), func.count(Expense.id)).group_by(Expense.date, category)
+        )
+    }
+    actual = {(r.date, r.category): (r.total, r.count) for r in db.scalars(select(DailyTotal))}
+    mismatches = []
+    for key in expected.keys() | actual.keys():
+        exp_t, exp_n = expected.get(key, (0.0, 0))
+        act_t, act_n = actual.get(key, (0.0, 0))
+        if exp_n != act_n or abs(exp_t - act_t) > tolerance * max(1.0, abs(exp_t)):
+            mismatches.append({"date": key[0].isoformat(), "category": key[1], "expected_total": exp_t,
+                               "actual_total": act_t, "expected_count": exp_n, "actual_count": act_n})
+    return sorted(mismatches, key=lambda m: (m["date"], m["category"]))
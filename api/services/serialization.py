@@ -0,0 +1,54 @@
+# api/services/serialization.py
+"""
+Fast JSON for large responses (e.g. multi-year forecasts).
+Uses orjson when installed and falls back to the stdlib json module.
+"""
+import json
+from typing import Any, Dict, List, Union
+
+import numpy as np
+import pandas as pd
+from fastapi.responses import Response
+
+# orjson is optional; it encodes large lists of floats several times faster than json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except Exception:
+    ORJSON_AVAILABLE = False
+
+
+def dumps(obj: Any) -> bytes:
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, separators=(",", ":"), allow_nan=False).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSONResponse that skips FastAPI's jsonable_encoder walk; content must already be JSON-native."""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def forecast_columns(forecast_df: pd.DataFrame) -> Dict[str, list]:
+    """date / predicted / lower / upper as plain lists, built column by column without a per-row loop."""
+    yhat = forecast_df["yhat"].to_numpy(dtype=float)
+    lower = forecast_df["yhat_lower"].to_numpy(dtype=float) if "yhat_lower" in forecast_df else yhat * 0.9
+    upper = forecast_df["yhat_upper"].to_numpy(dtype=float) if "yhat_upper" in forecast_df else yhat * 1.1
+    return {
+        "date": pd.to_datetime(forecast_df["ds"]).dt.strftime("%Y-%m-%d").tolist(),
+        "predicted": yhat.tolist(),
+        "lower": np.asarray(lower).tolist(),
+        "upper": np.asarray(upper).tolist(),
+    }
+
+
+def forecast_payload(forecast_df: pd.DataFrame, columnar: bool = False) -> Union[Dict[str, list], List[Dict[str, Any]]]:
+    """Columnar {"date": [...], ...} or the row shape [{"date", "predicted", "lower", "upper"}, ...]."""
+    columns = forecast_columns(forecast_df)
+    if columnar:
+        return columns
+    keys = tuple(columns)
+    return [dict(zip(keys, row)) for row in zip(*columns.values())]
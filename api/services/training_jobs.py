@@ -0,0 +1,160 @@
+# api/services/training_jobs.py
+"""
+Background forecast training on a process pool.
+
+Jobs fit and register a model (api/ml/forecast.train_and_register) in a worker
+process, so a slow Prophet fit never blocks a request thread. While a refit is
+queued or running, the forecast endpoint keeps serving the previous registry
+version.
+"""
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from api.ml import forecast as ml_forecast
+from api.ml.registry import ModelRegistry, default_registry
+
+TRAIN_WORKERS = int(os.getenv("FORECAST_TRAIN_WORKERS", "2"))
+TRAIN_QUEUE_LIMIT = int(os.getenv("FORECAST_TRAIN_QUEUE_LIMIT", "8"))
+# spawn keeps workers independent of the server's threads and open DB connections
+TRAIN_START_METHOD = os.getenv("FORECAST_TRAIN_START_METHOD", "spawn")
+JOB_HISTORY = 200
+
+
+class QueueFullError(RuntimeError):
+    pass
+
+
+def _run_training(expenses_df: pd.DataFrame, freq: str, model_type: str, model_name: Optional[str],
+                  registry: ModelRegistry) -> Dict[str, Any]:
+    # executed in the worker process
+    started = time.time()
+    _model, meta, _train_df = ml_forecast.train_and_register(
+        expenses_df, freq=freq, model_type=model_type, model_name=model_name, registry=registry
+    )
+    return {"started_at": started, "finished_at": time.time(), "model": meta}
+
+
+class TrainingJobManager:
+    def __init__(self, max_workers: int = TRAIN_WORKERS, queue_limit: int = TRAIN_QUEUE_LIMIT,
+                 registry: ModelRegistry = default_registry, start_method: str = TRAIN_START_METHOD):
+        self.max_workers = max_workers
+        self.queue_limit = queue_limit
+        self.registry = registry
+        self.start_method = start_method
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+    def add_listener(self, fn: Callable[[Dict[str, Any]], None]):
+        """fn(job) is called in the parent process whenever a job succeeds."""
+        self._listeners.append(fn)
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context(self.start_method)
+            )
+        return self._executor
+
+    def _active(self) -> List[Dict[str, Any]]:
+        return [j for j in self._jobs.values() if j["status"] in ("queued", "running")]
+
+    def submit(self, expenses_df: pd.DataFrame, freq: str, model_type: str, model_name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Queue a training job and return its record. An identical job that is still
+        queued or running is returned instead of starting a second one.
+        Raises QueueFullError when queue_limit jobs are already pending.
+        """
+        model_type = ml_forecast._effective_model_type(model_type)
+        with self._lock:
+            for job in self._active():
+                if (job["model_type"], job["freq"], job["model_name"]) == (model_type, freq, model_name):
+                    return self._view(job)
+            if len(self._active()) >= self.queue_limit:
+                raise QueueFullError(f"{self.queue_limit} training jobs already pending")
+            job = {
+                "id": uuid.uuid4().hex,
+                "model_type": model_type,
+                "freq": freq,
+                "model_name": model_name,
+                "status": "queued",
+                "submitted_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "model": None,
+                "error": None,
+            }
+            future = self._pool().submit(_run_training, expenses_df, freq, model_type, model_name, self.registry)
+            self._jobs[job["id"]] = job
+            self._futures[job["id"]] = future
+            while len(self._jobs) > JOB_HISTORY:
+                old_id, old = next(iter(self._jobs.items()))
+                if old["status"] in ("queued", "running"):
+                    break
+                self._jobs.pop(old_id)
+            view = self._view(job)
+        future.add_done_callback(lambda f, job_id=job["id"]: self._on_done(job_id, f))
+        return view
+
+    def _on_done(self, job_id: str, future: Future):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            self._futures.pop(job_id, None)
+            if job is None:
+                return
+            if future.cancelled():
+                job.update(status="cancelled", finished_at=time.time())
+            elif future.exception() is not None:
+                job.update(status="failed", error=repr(future.exception()), finished_at=time.time())
+            else:
+                job.update(status="succeeded", **future.result())
+            done = dict(job)
+        if done["status"] == "succeeded":
+            for fn in self._listeners:
+                fn(done)
+
+    def _view(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        out = dict(job)
+        future = self._futures.get(job["id"])
+        if out["status"] == "queued" and future is not None and future.running():
+            out["status"] = "running"
+        # timings in seconds: wait in queue, training in the worker, end to end
+        if out["started_at"] is not None:
+            out["queue_seconds"] = round(out["started_at"] - out["submitted_at"], 4)
+        if out["finished_at"] is not None:
+            out["total_seconds"] = round(out["finished_at"] - out["submitted_at"], 4)
+            if out["started_at"] is not None:
+                out["train_seconds"] = round(out["finished_at"] - out["started_at"], 4)
+        return out
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return self._view(job) if job else None
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [self._view(j) for j in reversed(self._jobs.values())]
+
+    def is_pending(self, model_type: str, freq: str, model_name: Optional[str] = None) -> bool:
+        model_type = ml_forecast._effective_model_type(model_type)
+        with self._lock:
+            return any((j["model_type"], j["freq"], j["model_name"]) == (model_type, freq, model_name) for j in self._active())
+
+    def shutdown(self, wait: bool = False):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+
+job_manager = TrainingJobManager()
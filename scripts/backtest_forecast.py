@@ -0,0 +1,51 @@
+# scripts/backtest_forecast.py
+# Rolling-origin backtest of the forecast models on the ledger (or a synthetic series).
+#   python scripts/backtest_forecast.py --freq D --horizon 14 --folds 10
+#   python scripts/backtest_forecast.py --synthetic-days 1095 --models lr hw prophet
+import argparse
+import os
+import sys
+
+# Add project root to Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pandas as pd
+from api.ml import backtest as ml_backtest
+
+
+def _synthetic(days: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    ds = pd.date_range("2021-01-01", periods=days, freq="D")
+    t = np.arange(days)
+    y = 60 + 0.02 * t + 25 * (ds.dayofweek >= 5) + 10 * np.sin(2 * np.pi * t / 365.25) + rng.gamma(2.0, 5.0, days)
+    return pd.DataFrame({"date": ds, "amount": y})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--models", nargs="+", default=["lr", "hw", "prophet"])
+    parser.add_argument("--freq", default="D", help="pandas frequency: D, W, MS, QS")
+    parser.add_argument("--horizon", type=int, default=14)
+    parser.add_argument("--folds", type=int, default=10)
+    parser.add_argument("--jobs", type=int, default=ml_backtest.BACKTEST_JOBS)
+    parser.add_argument("--synthetic-days", type=int, default=0, help="backtest a generated series instead of the DB")
+    args = parser.parse_args()
+
+    if args.synthetic_days:
+        df = _synthetic(args.synthetic_days)
+    else:
+        from api.db.session import SessionLocal
+        from api.crud.expenses import get_period_totals
+        with SessionLocal() as db:
+            df = get_period_totals(db, freq=args.freq)
+
+    report = ml_backtest.backtest(df, model_types=args.models, freq=args.freq, horizon=args.horizon,
+                                  n_folds=args.folds, n_jobs=args.jobs)
+    print(f"{len(report['cutoffs'])} folds, cutoffs {report['cutoffs'][0]} .. {report['cutoffs'][-1]}, "
+          f"wall {report['wall_seconds']:.2f}s")
+    for model, res in report["models"].items():
+        mape = "n/a" if res["mape"] is None else f"{res['mape']:.1f}%"
+        print(f"{model:>8}: MAE {res['mae']:8.2f}  MAPE {mape:>7}  fit {res['fit_seconds'] * 1000:8.1f} ms"
+              f"  predict {res['predict_seconds'] * 1000:7.1f} ms")
+        print("          MAE by h: " + " ".join(f"{h['mae']:.1f}" for h in res["by_horizon"]))
@@ -0,0 +1,106 @@
+# scripts/bench_api_load.py
+"""
+Load test of the expense routes on the sync stack vs the async stack (DB_ASYNC=1).
+Each mode runs in its own uvicorn process against a fresh temporary SQLite file.
+
+    python scripts/bench_api_load.py --concurrency 200 --seconds 10
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def _start_server(mode: str, port: int, db_path: str) -> subprocess.Popen:
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{db_path}", "DB_ASYNC": "1" if mode == "async" else "0"}
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+
+
+async def _wait_ready(base: str, timeout: float = 30.0):
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.perf_counter() < deadline:
+            try:
+                if (await client.get(f"{base}/")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+async def _load(base: str, concurrency: int, seconds: float, write_ratio: float):
+    latencies = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=30.0) as client:
+        # seed so reads have something to return
+        for i in range(200):
+            await client.post("/expenses/", json={"date": "2024-01-01", "description": f"seed {i}", "amount": 1.0 + i, "category": "Seed"})
+
+        stop = time.perf_counter() + seconds
+
+        async def worker():
+            nonlocal errors
+            rnd = random.Random()
+            while time.perf_counter() < stop:
+                t0 = time.perf_counter()
+                if rnd.random() < write_ratio:
+                    r = await client.post("/expenses/", json={"description": "load", "amount": 2.5, "category": "Load"})
+                elif rnd.random() < 0.5:
+                    r = await client.get("/expenses/", params={"limit": 20})
+                else:
+                    r = await client.get(f"/expenses/{rnd.randint(1, 200)}")
+                latencies.append(time.perf_counter() - t0)
+                if r.status_code >= 400:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    lat = np.array(latencies) * 1000
+    return {
+        "rps": len(lat) / elapsed,
+        "p50": float(np.percentile(lat, 50)),
+        "p99": float(np.percentile(lat, 99)),
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"concurrency={args.concurrency} seconds={args.seconds:.0f} write_ratio={args.write_ratio}")
+    for mode in ("sync", "async"):
+        with tempfile.TemporaryDirectory() as tmp:
+            proc = _start_server(mode, args.port, os.path.join(tmp, "bench.db"))
+            try:
+                base = f"http://127.0.0.1:{args.port}"
+                asyncio.run(_wait_ready(base))
+                res = asyncio.run(_load(base, args.concurrency, args.seconds, args.write_ratio))
+            finally:
+                proc.terminate()
+                proc.wait()
+        print(f"{mode:>6}: {res['rps']:8.1f} req/s  p50 {res['p50']:7.1f} ms  p99 {res['p99']:7.1f} ms  {res['errors']} errors")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# scripts/bench_category_forecast.py
+"""
+Per-category forecasting: one prepare_and_train fit per category (loop) vs the
+batched forecast_by_category path, for a growing number of categories.
+
+    python scripts/bench_category_forecast.py --days 1095 --categories 5 20 80 --model lr
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add project root to Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pandas as pd
+from api.ml import forecast as ml
+
+
+def _data(days: int, categories: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("2022-01-01", periods=days, freq="D")
+    d = np.repeat(dates.to_numpy(), categories)
+    c = np.tile([f"cat{i}" for i in range(categories)], days)
+    keep = rng.random(len(d)) < 0.7
+    return pd.DataFrame({"date": d[keep], "category": c[keep], "amount": rng.gamma(2.0, 20.0, keep.sum())})
+
+
+def _loop(df: pd.DataFrame, periods: int, freq: str, model: str):
+    for _, part in df.groupby("category"):
+        train_df = ml._detect_and_handle_outliers(ml._aggregate_expenses(part, freq=freq))
+        ml._predict(ml._fit(train_df, model, freq=freq), model, periods=periods, freq=freq)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=1095)
+    parser.add_argument("--categories", type=int, nargs="+", default=[5, 20, 80])
+    parser.add_argument("--periods", type=int, default=30)
+    parser.add_argument("--freq", default="D")
+    parser.add_argument("--model", default="lr")
+    args = parser.parse_args()
+
+    print(f"model={ml._effective_model_type(args.model)} days={args.days} periods={args.periods} freq={args.freq}")
+    for k in args.categories:
+        df = _data(args.days, k)
+        t0 = time.perf_counter()
+        _loop(df, args.periods, args.freq, args.model)
+        loop_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        ml.forecast_by_category(df, periods=args.periods, freq=args.freq, model_type=args.model)
+        batch_s = time.perf_counter() - t0
+        print(f"{k:4d} categories: loop {loop_s * 1000:9.1f} ms  batched {batch_s * 1000:8.1f} ms  ({loop_s / batch_s:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# scripts/bench_classifier_latency.py
+"""
+Single-description latency of the classifier formats: the sklearn pipeline
+(pickle), the memory-mapped bundle and the compiled lookup table. Measures the
+raw scorer and ExpenseClassifier.predict (with the prediction cache off), and
+checks that all three predict the same labels.
+
+    python scripts/bench_classifier_latency.py --n 5000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from api.ml.artifacts import export_bundle
+from api.ml.classifier import PICKLE_PATH, ExpenseClassifier
+from api.ml.compiled import export_compiled
+
+WORDS = ["uber", "coffee", "rent", "grocery", "netflix", "airport", "pharmacy", "gym", "pizza", "electric", "bill",
+         "taxi", "starbucks", "monthly", "ride", "store"]
+
+
+def _texts(n: int):
+    rng = np.random.default_rng(0)
+    return [" ".join(rng.choice(WORDS, size=rng.integers(2, 6))) for _ in range(n)]
+
+
+def _latency_us(fn, texts):
+    samples = []
+    for t in texts:
+        t0 = time.perf_counter()
+        fn(t)
+        samples.append((time.perf_counter() - t0) * 1e6)
+    samples = np.array(samples)
+    return np.percentile(samples, 50), np.percentile(samples, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=5000, help="descriptions per measurement")
+    args = parser.parse_args()
+    texts = _texts(args.n)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pipeline = joblib.load(PICKLE_PATH)
+        bundle, table = os.path.join(tmp, "clf.bundle"), os.path.join(tmp, "clf.compiled")
+        export_bundle(pipeline, bundle)
+        export_compiled(pipeline, table)
+        formats = {name: ExpenseClassifier(path, cache_size=0)
+                   for name, path in (("pickle", str(PICKLE_PATH)), ("bundle", bundle), ("compiled", table))}
+
+        labels = {name: clf.predict_batch(texts) for name, clf in formats.items()}
+        assert labels["bundle"] == labels["pickle"] and labels["compiled"] == labels["pickle"], "predictions differ"
+
+        print(f"{'format':<10}{'scorer p50':>12}{'p99':>10}{'predict p50':>14}{'p99':>10}   (microseconds)")
+        for name, clf in formats.items():
+            if clf.scorer is None:
+                pipe = clf.pipeline
+                score = lambda t: pipe.predict_proba([t])
+            else:
+                score = lambda t, s=clf.scorer: s.predict_proba([t])
+            _latency_us(score, texts[:200])  # warm up
+            s50, s99 = _latency_us(score, texts)
+            p50, p99 = _latency_us(clf.predict, texts)
+            print(f"{name:<10}{s50:>12.1f}{s99:>10.1f}{p50:>14.1f}{p99:>10.1f}")
+        scorer = formats["compiled"].scorer
+        o50, o99 = _latency_us(scorer.proba_one, texts)
+        print(f"compiled proba_one(): p50 {o50:.1f} us, p99 {o99:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
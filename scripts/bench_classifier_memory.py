@@ -0,0 +1,91 @@
+# scripts/bench_classifier_memory.py
+"""
+Per-worker memory of the classifier: pickled Pipeline vs memory-mapped bundle
+(api/ml/artifacts.py). Trains a synthetic model with a large vocabulary, then
+starts N worker processes per format that each load it and classify a few
+texts, like N uvicorn workers. Reports the RSS and PSS (proportional set size,
+shared pages split between the processes mapping them) added by the model.
+
+    python scripts/bench_classifier_memory.py --workers 4 --vocab 300000
+"""
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+
+# Add project root to Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+
+def _mem_kb():
+    """(rss, pss) in KiB from /proc/self/smaps_rollup (Linux)."""
+    out = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:"):
+                out[parts[0][:-1]] = int(parts[1])
+    return out["Rss"], out["Pss"]
+
+
+def _worker(path, barrier, results):
+    from api.ml.classifier import ExpenseClassifier
+    before = _mem_kb()
+    t0 = time.perf_counter()
+    clf = ExpenseClassifier(path, cache_size=0)
+    load_ms = (time.perf_counter() - t0) * 1000
+    clf.predict_batch([f"w{i} w{i + 1} shop" for i in range(0, 2000, 7)])
+    barrier.wait()  # every worker has the model loaded before anyone measures
+    after = _mem_kb()
+    barrier.wait()
+    results.put((after[0] - before[0], after[1] - before[1], load_ms))
+
+
+def _build_model(vocab: int, docs: int, out_dir: str):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.naive_bayes import MultinomialNB
+    from sklearn.pipeline import Pipeline
+    from api.ml.artifacts import export_bundle
+    from api.ml.registry import atomic_joblib_dump
+    rng = np.random.default_rng(0)
+    words = rng.integers(0, vocab, size=(docs, 6))
+    texts = [" ".join(f"w{w}" for w in row) for row in words]
+    labels = rng.integers(0, 10, size=docs).astype(str)
+    pipeline = Pipeline([("tfidf", TfidfVectorizer(ngram_range=(1, 2))), ("clf", MultinomialNB())]).fit(texts, labels)
+    pkl, bundle = os.path.join(out_dir, "clf.pkl"), os.path.join(out_dir, "clf.bundle")
+    atomic_joblib_dump(pipeline, pkl)
+    export_bundle(pipeline, bundle)
+    return pkl, bundle, len(pipeline[0].vocabulary_)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--vocab", type=int, default=300000)
+    parser.add_argument("--docs", type=int, default=200000)
+    args = parser.parse_args()
+
+    ctx = mp.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        pkl, bundle, n_terms = _build_model(args.vocab, args.docs, tmp)
+        print(f"{n_terms} terms; pickle {os.path.getsize(pkl) / 2**20:.1f} MiB, bundle {os.path.getsize(bundle) / 2**20:.1f} MiB; "
+              f"{args.workers} workers")
+        for name, path in (("pickle", pkl), ("bundle", bundle)):
+            barrier, results = ctx.Barrier(args.workers), ctx.Queue()
+            procs = [ctx.Process(target=_worker, args=(path, barrier, results)) for _ in range(args.workers)]
+            for p in procs:
+                p.start()
+            rows = [results.get() for _ in procs]
+            for p in procs:
+                p.join()
+            rss, pss, load = (np.mean([r[i] for r in rows]) for i in range(3))
+            print(f"{name:>7}: per worker +{rss / 1024:7.1f} MiB RSS  +{pss / 1024:7.1f} MiB PSS  "
+                  f"(all workers {pss * args.workers / 1024:7.1f} MiB)  load {load:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# scripts/bench_classifier_training.py
+"""
+In-memory vs streaming classifier training on a synthetic labeled CSV.
+
+  in-memory  the original path: pd.read_csv of the whole file, clean_text per row,
+             one Pipeline.fit
+  stream     api/ml/stream_training.train_streaming with the default parameters
+  search     the same with the ngram_range / min_df / alpha grid
+
+Each mode runs in its own process; wall time, stage timings and the peak RSS of
+the training process are reported.
+
+    python scripts/bench_classifier_training.py --rows 1000000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+CATEGORIES = ["Food & Dining", "Transport", "Rent", "Groceries", "Shopping", "Bills & Utilities", "Travel",
+              "Healthcare", "Entertainment", "Miscellaneous"]
+
+
+def _write_csv(path: str, rows: int, vocab: int = 50000):
+    rng = np.random.default_rng(0)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("description,category\n")
+        for start in range(0, rows, 100000):
+            n = min(100000, rows - start)
+            labels = rng.integers(0, len(CATEGORIES), size=n)
+            # each category prefers its own slice of the vocabulary
+            words = (labels[:, None] * (vocab // len(CATEGORIES)) + rng.zipf(1.5, size=(n, 5))) % vocab
+            refs = rng.integers(1000, 9999, size=n)
+            f.writelines(f"POS {r} W{w[0]}*W{w[1]} w{w[2]} w{w[3]} w{w[4]},{CATEGORIES[l]}\n"
+                         for r, w, l in zip(refs, words, labels))
+
+
+def _run_mode(mode: str, csv_path: str, chunksize: int, jobs: int):
+    # executed in a child process
+    started = time.perf_counter()
+    if mode == "in-memory":
+        import pandas as pd
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.naive_bayes import MultinomialNB
+        from sklearn.pipeline import Pipeline
+        from api.ml.preprocessing import clean_text
+        df = pd.read_csv(csv_path).dropna(subset=["description", "category"])
+        df["description_clean"] = df["description"].astype(str).apply(clean_text)
+        cleaned = time.perf_counter()
+        Pipeline([("tfidf", TfidfVectorizer(ngram_range=(1, 2), min_df=2)),
+                  ("clf", MultinomialNB())]).fit(df["description_clean"], df["category"])
+        seconds = {"read_and_clean": cleaned - started, "fit": time.perf_counter() - cleaned}
+    else:
+        from api.ml.stream_training import DEFAULT_GRID, train_streaming
+        _, report = train_streaming(csv_path, grid=DEFAULT_GRID if mode == "search" else None,
+                                    chunksize=chunksize, n_jobs=jobs)
+        seconds = report["seconds"]
+    print(json.dumps({"wall": time.perf_counter() - started, "seconds": seconds,
+                      "peak_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--chunksize", type=int, default=100000)
+    parser.add_argument("--jobs", type=int, default=-1)
+    parser.add_argument("--modes", default="in-memory,stream,search")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _run_mode(args.child[0], args.child[1], args.chunksize, args.jobs)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "labeled.csv")
+        _write_csv(csv_path, args.rows)
+        print(f"{args.rows} rows, {os.path.getsize(csv_path) / 2 ** 20:.0f} MiB CSV, {os.cpu_count()} cores")
+        for mode in args.modes.split(","):
+            out = subprocess.run([sys.executable, "-W", "ignore", __file__, "--child", mode, csv_path,
+                                  "--chunksize", str(args.chunksize), "--jobs", str(args.jobs)],
+                                 capture_output=True, text=True, check=True).stdout
+            result = json.loads(out.strip().splitlines()[-1])
+            stages = ", ".join(f"{k} {v:.1f}s" for k, v in result["seconds"].items())
+            print(f"{mode:<10} wall {result['wall']:7.1f}s  peak RSS {result['peak_rss_mib']:7.0f} MiB  ({stages})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# scripts/bench_forecast_models.py
+"""
+Fit time and holdout MAE of the forecast model types (lr, hw, prophet if installed)
+on a synthetic daily spending series with trend, weekly and yearly seasonality.
+
+    python scripts/bench_forecast_models.py --days 1095 --horizon 30
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add project root to Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pandas as pd
+from api.ml import forecast as ml
+
+
+def _series(days: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    ds = pd.date_range("2021-01-01", periods=days, freq="D")
+    t = np.arange(days)
+    y = (60 + 0.02 * t + 25 * (ds.dayofweek >= 5) + 10 * np.sin(2 * np.pi * t / 365.25)
+         + rng.gamma(2.0, 5.0, days))
+    return pd.DataFrame({"date": ds, "amount": y})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=1095)
+    parser.add_argument("--horizon", type=int, default=30)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    models = ["lr", "hw"] + (["prophet"] if ml.PROPHET_AVAILABLE else [])
+    print(f"days={args.days} horizon={args.horizon} (prophet {'available' if ml.PROPHET_AVAILABLE else 'not installed'})")
+    df = _series(args.days + args.horizon)
+    train, test = df.iloc[:args.days], df.iloc[args.days:]
+    for model in models:
+        fit_times, maes = [], []
+        for _ in range(args.repeats):
+            t0 = time.perf_counter()
+            train_df = ml._detect_and_handle_outliers(ml._aggregate_expenses(train, freq="D"))
+            artifact = ml._fit(train_df, model, freq="D")
+            fit_times.append(time.perf_counter() - t0)
+            fc = ml._predict(artifact, model, periods=args.horizon, freq="D").tail(args.horizon)
+            maes.append(ml.compute_mae(test["amount"].to_numpy(), fc["yhat"].to_numpy()))
+        print(f"{model:>8}: fit {np.median(fit_times) * 1000:9.1f} ms  holdout MAE {np.mean(maes):7.2f}")
+
+
+if __name__ == "__main__":
+    main()
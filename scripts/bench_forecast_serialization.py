@@ -0,0 +1,71 @@
+# scripts/bench_forecast_serialization.py
+"""
+Cost of turning a forecast frame into a JSON response: the previous per-row
+iterrows() loop + FastAPI's default encoder vs the column-wise payload + fast
+encoder (api/services/serialization.py), for rows, columns and future-only shapes.
+
+    python scripts/bench_forecast_serialization.py --history 1825 --horizon 365
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add project root to Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from api.services import serialization
+
+
+def _legacy(forecast_df: pd.DataFrame) -> bytes:
+    rows_out = []
+    for _, r in forecast_df.iterrows():
+        rows_out.append({
+            "date": r["ds"].strftime("%Y-%m-%d"),
+            "predicted": float(r["yhat"]),
+            "lower": float(r.get("yhat_lower", r["yhat"] * 0.9)),
+            "upper": float(r.get("yhat_upper", r["yhat"] * 1.1)),
+        })
+    return JSONResponse(jsonable_encoder({"forecast": rows_out, "metrics": {}})).body
+
+
+def _timed(fn, repeats: int):
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - t0)
+    return np.median(times) * 1000, len(out)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--history", type=int, default=1825)
+    parser.add_argument("--horizon", type=int, default=365)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    n = args.history + args.horizon
+    yhat = np.random.default_rng(0).normal(100, 10, n)
+    fc = pd.DataFrame({"ds": pd.date_range("2020-01-01", periods=n, freq="D"), "yhat": yhat,
+                       "yhat_lower": yhat * 0.9, "yhat_upper": yhat * 1.1})
+    future = fc.iloc[args.history:]
+
+    cases = {
+        "iterrows + jsonable_encoder": lambda: _legacy(fc),
+        "vectorized rows": lambda: serialization.dumps({"forecast": serialization.forecast_payload(fc), "metrics": {}}),
+        "vectorized columns": lambda: serialization.dumps({"forecast": serialization.forecast_payload(fc, columnar=True), "metrics": {}}),
+        "columns, future only": lambda: serialization.dumps({"forecast": serialization.forecast_payload(future, columnar=True), "metrics": {}}),
+    }
+    print(f"{n} periods ({args.history} history + {args.horizon} horizon), orjson={'yes' if serialization.ORJSON_AVAILABLE else 'no'}")
+    for name, fn in cases.items():
+        ms, size = _timed(fn, args.repeats)
+        print(f"{name:>28}: {ms:8.2f} ms  {size / 1024:7.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
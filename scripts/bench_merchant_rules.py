@@ -0,0 +1,87 @@
+# scripts/bench_merchant_rules.py
+"""
+Merchant rule matching time as the rule table grows, and predict_batch with and
+without the rule layer in front of the classifier.
+
+    python scripts/bench_merchant_rules.py --texts 20000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from api.ml.classifier import ExpenseClassifier
+from api.ml.rules import RuleEngine
+
+MERCHANTS = ["netflix", "uber", "swiggy", "zomato", "starbucks", "spotify", "amazon prime video", "bigbasket"]
+FILLER = ["pos", "payment", "ref", "card", "upi", "monthly", "order", "txn", "rent", "coffee", "grocery", "bill"]
+
+
+def _texts(n: int, hit_share: float):
+    rng = np.random.default_rng(0)
+    out = []
+    for i in range(n):
+        words = list(rng.choice(FILLER, size=rng.integers(3, 8)))
+        if rng.random() < hit_share:
+            words.insert(int(rng.integers(0, len(words))), MERCHANTS[i % len(MERCHANTS)])
+        out.append(" ".join(words) + f" {rng.integers(1000, 9999)}")
+    return out
+
+
+def _write_rules(path: str, n_rules: int):
+    rng = np.random.default_rng(1)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("pattern,category\n")
+        f.writelines(f"{m},Merchant\n" for m in MERCHANTS)
+        # synthetic merchants of 1-3 tokens that never occur in the texts
+        for i in range(n_rules - len(MERCHANTS)):
+            f.write(" ".join(f"m{int(t)}" for t in rng.integers(0, 10 ** 6, size=rng.integers(1, 4))) + f" {i},Other\n")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--texts", type=int, default=20000)
+    parser.add_argument("--hit-share", type=float, default=0.6, help="share of texts that contain a known merchant")
+    args = parser.parse_args()
+    texts = _texts(args.texts, args.hit_share)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rules.csv")
+        print(f"{'rules':>8}{'us / text':>12}{'hit rate':>10}")
+        for n_rules in (10, 1000, 100000, 1000000):
+            _write_rules(path, n_rules)
+            rules = RuleEngine(path, check_interval=3600)
+            rules.match_batch(texts[:100])
+            t0 = time.perf_counter()
+            rules.match_batch(texts)
+            per_text = (time.perf_counter() - t0) / len(texts) * 1e6
+            print(f"{n_rules:>8}{per_text:>12.2f}{rules.stats()['hit_rate']:>10.2f}")
+
+        _write_rules(path, 1000)
+        rules = RuleEngine(path, check_interval=3600)
+        for name, clf in (("model only", ExpenseClassifier(cache_size=0)),
+                          ("rules + model", ExpenseClassifier(cache_size=0, rules=rules))):
+            clf.predict_batch(texts[:100])
+            t0 = time.perf_counter()
+            for i in range(0, len(texts), 64):
+                clf.predict_batch(texts[i:i + 64])
+            print(f"{name:<14} predict_batch(64): {(time.perf_counter() - t0) / len(texts) * 1e6:.1f} us / text")
+        t0 = time.perf_counter()
+        single = ExpenseClassifier(cache_size=0)
+        for t in texts[:2000]:
+            single.predict(t)
+        model_us = (time.perf_counter() - t0) / 2000 * 1e6
+        ruled = ExpenseClassifier(cache_size=0, rules=rules)
+        t0 = time.perf_counter()
+        for t in texts[:2000]:
+            ruled.predict(t)
+        print(f"single predict: model only {model_us:.1f} us, rules + model {(time.perf_counter() - t0) / 2000 * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# scripts/bench_ml_predict.py
+"""
+Load test of POST /ml/predict with and without server-side micro-batching
+(CLASSIFIER_MICROBATCH). Each mode runs in its own uvicorn process; every request
+sends a distinct description so the prediction cache does not hide inference cost.
+
+    python scripts/bench_ml_predict.py --concurrency 64 --seconds 10
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+WORDS = ["uber", "coffee", "rent", "grocery", "netflix", "airport", "pharmacy", "gym", "pizza", "electric", "bill", "taxi"]
+
+
+def _start_server(batching: bool, port: int, db_path: str, max_wait_ms: float, max_size: int) -> subprocess.Popen:
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{db_path}", "CLASSIFIER_MICROBATCH": "1" if batching else "0",
+           "CLASSIFIER_BATCH_MAX_WAIT_MS": str(max_wait_ms), "CLASSIFIER_BATCH_MAX_SIZE": str(max_size)}
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+
+
+async def _wait_ready(base: str, timeout: float = 30.0):
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.perf_counter() < deadline:
+            try:
+                if (await client.get(f"{base}/")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+async def _load(base: str, concurrency: int, seconds: float):
+    latencies = []
+    errors = 0
+    counter = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=30.0) as client:
+        stop = time.perf_counter() + seconds
+
+        async def worker():
+            nonlocal errors, counter
+            while time.perf_counter() < stop:
+                counter += 1
+                desc = f"{WORDS[counter % len(WORDS)]} {WORDS[(counter // 7) % len(WORDS)]} #{counter}"
+                t0 = time.perf_counter()
+                r = await client.post("/ml/predict", json={"description": desc})
+                latencies.append(time.perf_counter() - t0)
+                if r.status_code >= 400:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        stats = (await client.get("/ml/batching")).json()
+
+    lat = np.array(latencies) * 1000
+    return {"rps": len(lat) / elapsed, "p50": float(np.percentile(lat, 50)), "p99": float(np.percentile(lat, 99)),
+            "errors": errors, "mean_batch": stats["batch_size"]["mean"]}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--max-size", type=int, default=64)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    print(f"concurrency={args.concurrency} seconds={args.seconds:.0f} max_wait_ms={args.max_wait_ms} max_size={args.max_size}")
+    for batching in (False, True):
+        with tempfile.TemporaryDirectory() as tmp:
+            proc = _start_server(batching, args.port, os.path.join(tmp, "bench.db"), args.max_wait_ms, args.max_size)
+            try:
+                base = f"http://127.0.0.1:{args.port}"
+                asyncio.run(_wait_ready(base))
+                res = asyncio.run(_load(base, args.concurrency, args.seconds))
+            finally:
+                proc.terminate()
+                proc.wait()
+        mean_batch = f"{res['mean_batch']:.1f}" if res["mean_batch"] else "-"
+        print(f"{'batched' if batching else 'per-call':>8}: {res['rps']:8.1f} req/s  p50 {res['p50']:7.1f} ms"
+              f"  p99 {res['p99']:7.1f} ms  mean batch {mean_batch:>5}  {res['errors']} errors")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# scripts/bench_prophet_warm_start.py
+"""
+Prophet refit after a few new days: cold fit vs warm start from the previous
+model's parameters (api/ml/forecast.warm_start_params). Reports refit time and
+how far the warm forecast is from the cold one.
+
+    python scripts/bench_prophet_warm_start.py --days 1095 --new-days 7 --horizon 30
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+# Add project root to Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pandas as pd
+from api.ml import forecast as ml
+
+
+def _series(days: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    ds = pd.date_range("2021-01-01", periods=days, freq="D")
+    t = np.arange(days)
+    y = 60 + 0.02 * t + 25 * (ds.dayofweek >= 5) + 10 * np.sin(2 * np.pi * t / 365.25) + rng.gamma(2.0, 5.0, days)
+    return pd.DataFrame({"ds": ds, "y": y})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=1095)
+    parser.add_argument("--new-days", type=int, default=7)
+    parser.add_argument("--horizon", type=int, default=30)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    if not ml.PROPHET_AVAILABLE:
+        sys.exit("prophet is not installed")
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+
+    df = _series(args.days + args.new_days)
+    previous = ml.train_prophet(df.iloc[:args.days], model_name=None)
+    init = ml.warm_start_params(previous)
+
+    cold_t, warm_t = [], []
+    for _ in range(args.repeats):
+        t0 = time.perf_counter()
+        cold = ml.train_prophet(df, model_name=None)
+        cold_t.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        warm = ml.train_prophet(df, model_name=None, init=init)
+        warm_t.append(time.perf_counter() - t0)
+
+    fc_cold = ml.predict_with_prophet(cold, periods=args.horizon)["yhat"].to_numpy()[-args.horizon:]
+    fc_warm = ml.predict_with_prophet(warm, periods=args.horizon)["yhat"].to_numpy()[-args.horizon:]
+    diff = np.abs(fc_warm - fc_cold)
+    print(f"days={args.days} +{args.new_days} new, horizon={args.horizon}")
+    print(f"cold refit {np.median(cold_t) * 1000:8.1f} ms   warm refit {np.median(warm_t) * 1000:8.1f} ms"
+          f"   ({np.median(cold_t) / np.median(warm_t):.1f}x)")
+    print(f"forecast |warm - cold|: mean {diff.mean():.3f}  max {diff.max():.3f}"
+          f"  (mean level {np.abs(fc_cold).mean():.1f}, {100 * diff.mean() / np.abs(fc_cold).mean():.2f}%)")
+
+
+if __name__ == "__main__":
+    main()
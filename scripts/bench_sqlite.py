@@ -0,0 +1,103 @@
+# scripts/bench_sqlite.py
+"""
+Concurrent read/write throughput of the default SQLite engine vs the tuned one
+from api/db/session.py (WAL, synchronous=NORMAL, cache/mmap pragmas, pooled).
+
+    python scripts/bench_sqlite.py --writers 4 --readers 8 --seconds 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+from datetime import date
+import threading
+import time
+
+# Add project root to Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine, func, select, insert
+from sqlalchemy.exc import OperationalError
+from api.db.session import make_engine
+from api.db.models import Base, Expense
+
+
+def _seed(engine, rows: int):
+    Base.metadata.create_all(bind=engine)
+    batch = [{"date": date(2024, 1 + i % 12, 1 + i % 28), "description": f"seed {i}", "amount": 1.0 + i % 50, "category": "Seed"}
+             for i in range(rows)]
+    with engine.begin() as conn:
+        conn.execute(insert(Expense), batch)
+
+
+def _run(engine, read_engine, writers: int, readers: int, seconds: float):
+    counts = {"writes": 0, "reads": 0, "errors": 0}
+    lock = threading.Lock()
+    stop = time.perf_counter() + seconds
+
+    def writer():
+        n = errors = 0
+        while time.perf_counter() < stop:
+            try:
+                with engine.begin() as conn:
+                    conn.execute(insert(Expense).values(date=date.today(), description="bench", amount=1.0, category="Bench"))
+                n += 1
+            except OperationalError:
+                errors += 1
+        with lock:
+            counts["writes"] += n
+            counts["errors"] += errors
+
+    def reader():
+        n = errors = 0
+        # one week of the ledger, served from the (date, id) index
+        stmt = (
+            select(Expense.category, func.sum(Expense.amount))
+            .where(Expense.date.between(date(2024, 6, 1), date(2024, 6, 7)))
+            .group_by(Expense.category)
+        )
+        while time.perf_counter() < stop:
+            try:
+                with read_engine.connect() as conn:
+                    conn.execute(stmt).all()
+                n += 1
+            except OperationalError:
+                errors += 1
+        with lock:
+            counts["reads"] += n
+            counts["errors"] += errors
+
+    threads = [threading.Thread(target=writer) for _ in range(writers)] + [threading.Thread(target=reader) for _ in range(readers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return {k: (v / seconds if k != "errors" else v) for k, v in counts.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--rows", type=int, default=50000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base_path = os.path.join(tmp, "baseline.db")
+        baseline = create_engine(f"sqlite:///{base_path}", connect_args={"check_same_thread": False})
+        _seed(baseline, args.rows)
+
+        tuned_url = f"sqlite:///{os.path.join(tmp, 'tuned.db')}"
+        tuned = make_engine(tuned_url)
+        _seed(tuned, args.rows)
+        tuned_ro = make_engine(tuned_url, read_only=True)
+
+        print(f"{args.writers} writers, {args.readers} readers, {args.seconds:.0f}s, {args.rows} seeded rows")
+        for name, eng, ro in (("baseline", baseline, baseline), ("tuned", tuned, tuned_ro)):
+            res = _run(eng, ro, args.writers, args.readers, args.seconds)
+            print(f"{name:>9}: {res['writes']:8.0f} writes/s  {res['reads']:8.0f} reads/s  {res['errors']} errors")
+
+
+if __name__ == "__main__":
+    main()
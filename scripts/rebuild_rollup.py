@@ -0,0 +1,30 @@
+# scripts/rebuild_rollup.py
+# Rebuild or verify the daily_totals rollup against the expenses table.
+#   python scripts/rebuild_rollup.py            # rebuild from scratch
+#   python scripts/rebuild_rollup.py --verify   # report mismatches, exit 1 if any
+import argparse
+import os
+import sys
+
+# Add project root to Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from api.db.session import engine, SessionLocal
+from api.db import models
+from api.services import rollup_service
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--verify", action="store_true", help="only compare, do not rebuild")
+    args = parser.parse_args()
+
+    models.Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        if args.verify:
+            mismatches = rollup_service.verify(db)
+            for m in mismatches[:50]:
+                print(m)
+            print(f"{len(mismatches)} mismatching buckets.")
+            sys.exit(1 if mismatches else 0)
+        n = rollup_service.rebuild(db)
+        print(f"Rebuilt daily_totals: {n} buckets.")
@@ -1,4 +1,6 @@
 # scripts/train_classifier.py
+import os
+import sys
 import pandas as pd
 from pathlib import Path
 from sklearn.feature_extraction.text import TfidfVectorizer
@@ -7,28 +9,46 @@ from sklearn.naive_bayes import MultinomialNB
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, accuracy_score
 import joblib
-import re
 import argparse
 
+# Add project root to Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from api.ml.stream_training import DEFAULT_GRID, CHUNKSIZE, TRAIN_JOBS, clean_series, train_streaming
+from api.ml.artifacts import export_bundle
+from api.ml.compiled import export_compiled
+from api.ml import online
+from api.ml.registry import atomic_joblib_dump
+
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 DATA_DIR = PROJECT_ROOT / "data"
 MODEL_DIR = PROJECT_ROOT / "ml"
 MODEL_DIR.mkdir(exist_ok=True)
 
-def clean_text(s: str) -> str:
-    s = s.lower()
-    s = re.sub(r"[^a-z0-9\s]", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
-
 def load_data(csv_path: Path):
     df = pd.read_csv(csv_path)
     # expected columns: description, category
     df = df.dropna(subset=["description", "category"])
-    df["description_clean"] = df["description"].astype(str).apply(clean_text)
+    df["description_clean"] = clean_series(df["description"])
     return df
 
-def train(csv_path: Path, save_path: Path):
+def write_bundle(pipeline, bundle_path: Path):
+    # memory-mappable copy that the API prefers when present (see api/ml/artifacts.py)
+    info = export_bundle(pipeline, str(bundle_path))
+    print(f"Saved bundle ({info['terms']} terms, {info['bytes']} bytes) to {bundle_path}")
+
+def write_compiled(pipeline, compiled_path: Path):
+    # token -> (idf, per-class log-prob) table scored without sklearn (see api/ml/compiled.py)
+    info = export_compiled(pipeline, str(compiled_path))
+    print(f"Saved compiled table ({info['terms']} terms, {info['classes']} classes) to {compiled_path}")
+
+def export(pipeline, bundle_path: Path = None, compiled_path: Path = None):
+    if bundle_path:
+        write_bundle(pipeline, bundle_path)
+    if compiled_path:
+        write_compiled(pipeline, compiled_path)
+
+def train(csv_path: Path, save_path: Path, bundle_path: Path = None, compiled_path: Path = None):
     df = load_data(csv_path)
     X = df["description_clean"]
     y = df["category"]
@@ -45,12 +65,66 @@ def train(csv_path: Path, save_path: Path):
     print("Test accuracy:", acc)
     print(classification_report(y_test, preds))
 
-    joblib.dump(pipeline, save_path)
+    # write + rename: running servers may have the old file memory-mapped
+    atomic_joblib_dump(pipeline, str(save_path))
+    print(f"Saved model to {save_path}")
+    export(pipeline, bundle_path, compiled_path)
+
+def train_stream(csv_path: Path, save_path: Path, bundle_path: Path = None, compiled_path: Path = None,
+                 search: bool = False, chunksize: int = CHUNKSIZE, n_jobs: int = TRAIN_JOBS):
+    # out-of-core: the CSV is streamed in chunks and never loaded whole (see api/ml/stream_training.py)
+    pipeline, report = train_streaming(str(csv_path), grid=DEFAULT_GRID if search else None,
+                                       chunksize=chunksize, n_jobs=n_jobs)
+    print(f"Rows: {report['rows']['train']} train, {report['rows']['validation']} validation")
+    if search:
+        for c in sorted(report["candidates"], key=lambda c: -(c["accuracy"] or 0)):
+            print(f"  ngram={c['ngram_range']} min_df={c['min_df']} alpha={c['alpha']}: "
+                  f"accuracy={c['accuracy']} ({c['terms']} terms)")
+    print("Best:", report["best"])
+    print("Seconds per stage:", report["seconds"])
+    atomic_joblib_dump(pipeline, str(save_path))
     print(f"Saved model to {save_path}")
+    export(pipeline, bundle_path, compiled_path)
+
+def train_online(csv_path: Path, online_path: Path):
+    # bootstrap the incrementally updated model (api/ml/online.py) from the labeled data
+    df = load_data(csv_path)
+    model = online.new_online_model()
+    online.partial_fit(model, df["description_clean"].tolist(), df["category"].astype(str).tolist())
+    # corrections already in the log are expected in the labeled CSV (scripts/review_misclassified.py);
+    # the background updater starts with the rows logged after this point
+    log = online.MISCLASS_LOG_PATH
+    model["log_offset"] = os.path.getsize(log) if log.exists() else 0
+    atomic_joblib_dump(model, str(online_path))
+    print(f"Saved online model ({model['n_examples']} examples, {len(model['clf'].classes_)} classes) to {online_path}")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--csv", type=str, default=str(DATA_DIR / "labeled_expenses.csv"))
     parser.add_argument("--out", type=str, default=str(MODEL_DIR / "expense_classifier.pkl"))
+    parser.add_argument("--bundle-out", type=str, default=str(MODEL_DIR / "expense_classifier.bundle"),
+                        help="memory-mappable export; pass an empty string to skip")
+    parser.add_argument("--compiled-out", type=str, default=str(MODEL_DIR / "expense_classifier.compiled"),
+                        help="sklearn-free lookup table, served with CLASSIFIER_FORMAT=compiled; pass an empty string to skip")
+    parser.add_argument("--bundle-only", action="store_true",
+                        help="only export --out (an existing pipeline) as a bundle / compiled table")
+    parser.add_argument("--stream", action="store_true",
+                        help="train out-of-core from CSV chunks on all cores (for corpora that do not fit in memory)")
+    parser.add_argument("--search", action="store_true",
+                        help="with --stream: pick ngram_range / min_df / alpha by validation accuracy")
+    parser.add_argument("--chunksize", type=int, default=CHUNKSIZE)
+    parser.add_argument("--jobs", type=int, default=TRAIN_JOBS, help="worker processes for --stream (-1 = all cores)")
+    parser.add_argument("--online-out", type=str, default="",
+                        help="also bootstrap the online (incrementally updated) model at this path, "
+                             "e.g. ml/expense_classifier.online")
     args = parser.parse_args()
-    train(Path(args.csv), Path(args.out))
+    bundle_path = Path(args.bundle_out) if args.bundle_out else None
+    compiled_path = Path(args.compiled_out) if args.compiled_out else None
+    if args.bundle_only:
+        export(joblib.load(args.out), bundle_path, compiled_path)
+    elif args.stream:
+        train_stream(Path(args.csv), Path(args.out), bundle_path, compiled_path, args.search, args.chunksize, args.jobs)
+    else:
+        train(Path(args.csv), Path(args.out), bundle_path, compiled_path)
+    if args.online_out:
+        train_online(Path(args.csv), Path(args.online_out))
@@ -5,6 +5,7 @@ from api.main import app
 from api.db.session import engine
 from api.db import models
 import datetime
+import json
 
 client = TestClient(app)
 
@@ -46,3 +47,218 @@ def test_list_and_delete():
     first_id = rlist.json()[0]["id"]
     rdel = client.delete(f"/expenses/{first_id}")
     assert rdel.status_code == 204
+
+def test_import_csv_and_ndjson():
+    csv_body = (
+        "date,description,amount,category\n"
+        "2025-01-02,Rent January,1200,Rent\n"
+        "2025-01-03,uber trip,15.5,\n"
+        "2025-01-04,broken row,-3,\n"
+    )
+    r = client.post("/expenses/import", files={"file": ("bank.csv", csv_body, "text/csv")}, params={"chunk_size": 2})
+    assert r.status_code == 200
+    body = r.json()
+    assert (body["received"], body["inserted"], body["failed"], body["categorized"]) == (3, 2, 1, 1)
+    assert body["errors"][0]["row"] == 4
+
+    ndjson_body = '{"date": "2025-01-05", "description": "coffee", "amount": 4}\nnot json\n'
+    r = client.post("/expenses/import", files={"file": ("bank.ndjson", ndjson_body, "application/x-ndjson")})
+    assert r.status_code == 200
+    body = r.json()
+    assert (body["inserted"], body["failed"]) == (1, 1)
+
+    # a byte that is not UTF-8 fails its row only, in both formats
+    csv_bytes = b"date,description,amount\n2025-01-06,caf\xe9,3\n2025-01-07,tea,2\n"
+    r = client.post("/expenses/import", files={"file": ("bank.csv", csv_bytes, "text/csv")})
+    assert r.status_code == 200
+    body = r.json()
+    assert (body["inserted"], body["failed"], body["errors"][0]["row"]) == (1, 1, 2)
+    assert "UTF-8" in body["errors"][0]["error"]
+    r = client.post("/expenses/import", files={"file": ("bank.ndjson", b'{"description": "caf\xe9", "amount": 1}\n'
+                                                       b'{"description": "tea", "amount": 2}\n', "application/x-ndjson")})
+    assert (r.json()["inserted"], r.json()["failed"]) == (1, 1)
+
+def test_export_filters_and_formats():
+    client.post("/expenses/", json={"date": "2024-06-01", "description": "Export me", "amount": 9.0, "category": "Export"})
+    client.post("/expenses/", json={"date": "2024-06-02", "description": "Other", "amount": 1.0, "category": "Other"})
+
+    r = client.get("/expenses/export", params={"format": "csv", "category": "Export"})
+    assert r.status_code == 200
+    lines = r.text.strip().splitlines()
+    assert lines[0] == "id,date,description,amount,category"
+    assert len(lines) == 2 and "Export me" in lines[1]
+
+    r = client.get("/expenses/export", params={"format": "ndjson", "start_date": "2024-06-02", "end_date": "2024-06-02"})
+    rows = [json.loads(l) for l in r.text.splitlines() if l]
+    assert [row["description"] for row in rows] == ["Other"]
+
+def test_cursor_pagination_walks_all_rows():
+    for i in range(5):
+        client.post("/expenses/", json={"date": "2023-03-01", "description": f"Paged {i}", "amount": 1.0, "category": "Paged"})
+    seen, cursor = [], None
+    while True:
+        params = {"paginate": "cursor", "limit": 2, "category": "Paged"}
+        if cursor:
+            params["cursor"] = cursor
+        r = client.get("/expenses/", params=params)
+        assert r.status_code == 200
+        page = r.json()
+        seen.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert len(seen) == 5 and seen == sorted(seen, reverse=True)
+    assert client.get("/expenses/", params={"cursor": "garbage"}).status_code == 400
+
+def test_rollup_tracks_writes():
+    from api.db.session import SessionLocal
+    from api.services import rollup_service
+
+    r = client.post("/expenses/", json={"date": "2022-05-01", "description": "Rollup", "amount": 10.0, "category": "Roll"})
+    exp_id = r.json()["id"]
+    client.put(f"/expenses/{exp_id}", json={"amount": 25.0, "category": "Rolled"})
+    client.post("/expenses/", json={"date": "2022-05-01", "description": "Rollup 2", "amount": 5.0, "category": "Rolled"})
+
+    summary = client.get("/summary/", params={"start_date": "2022-05-01", "end_date": "2022-05-01"}).json()
+    assert summary["by_category"] == [{"category": "Rolled", "total": 30.0, "count": 2}]
+
+    client.delete(f"/expenses/{exp_id}")
+    with SessionLocal() as db:
+        assert rollup_service.verify(db) == []
+
+def test_async_expense_routes(monkeypatch):
+    # the DB_ASYNC stack (async router + AsyncSession) on the same database as the sync tests
+    pytest.importorskip("aiosqlite")
+    import asyncio
+    from fastapi import FastAPI
+    from sqlalchemy.engine import make_url
+    from api.db.async_session import async_engine
+    from api.db.session import SessionLocal, _is_memory_sqlite
+    from api.routers import async_expenses, summary
+    from api.services import rollup_service
+    if _is_memory_sqlite(make_url(str(engine.url))):
+        pytest.skip("the async engine cannot share an in-memory database with the sync one")
+    async_app = FastAPI()
+    async_app.include_router(async_expenses.router)
+    async_app.include_router(summary.router)
+
+    with SessionLocal() as db:
+        version = rollup_service.get_data_version(db)
+    with TestClient(async_app) as ac:
+        r = ac.post("/expenses/", json={"date": "2021-07-01", "description": "Async", "amount": 10.0, "category": "Async"})
+        assert r.status_code == 201
+        exp_id = r.json()["id"]
+        for i in range(3):
+            ac.post("/expenses/", json={"date": f"2021-07-0{i + 2}", "description": f"Async {i}", "amount": 1.0, "category": "Async"})
+        r = ac.put(f"/expenses/{exp_id}", json={"amount": 20.0})
+        assert r.status_code == 200 and r.json()["amount"] == 20.0
+        assert ac.delete(f"/expenses/{exp_id + 1}").status_code == 204
+        assert ac.get(f"/expenses/{exp_id + 1}").status_code == 404
+
+        page = ac.get("/expenses/", params={"paginate": "cursor", "limit": 2, "category": "Async"}).json()
+        rest = ac.get("/expenses/", params={"cursor": page["next_cursor"], "limit": 2, "category": "Async"}).json()
+        ids = [e["id"] for e in page["items"] + rest["items"]]
+        assert ids == [exp_id + 3, exp_id + 2, exp_id] and rest["next_cursor"] is None
+
+        totals = ac.get("/summary/", params={"start_date": "2021-07-01", "end_date": "2021-07-31"}).json()
+        assert totals["by_category"] == [{"category": "Async", "total": 22.0, "count": 3}]
+    with SessionLocal() as db:
+        # 4 creates + 1 update + 1 delete, each bumped the version in its own transaction
+        assert rollup_service.get_data_version(db) == version + 6
+        assert rollup_service.verify(db) == []
+    asyncio.run(async_engine.dispose())
+
+def test_category_corrections_logged_from_writes(tmp_path, monkeypatch):
+    from api.ml import online
+    from api.ml.classifier import classifier_provider
+    from api.services import online_learning
+    log = tmp_path / "misclassified_log.csv"
+    monkeypatch.setattr(online_learning, "LOG_CORRECTIONS", True)
+    monkeypatch.setattr(online, "MISCLASS_LOG_PATH", log)
+    predicted = classifier_provider.get().predict("monthly house rent")
+
+    client.post("/expenses/", json={"date": "2024-03-01", "description": "monthly house rent", "amount": 1.0, "category": predicted})
+    assert not log.exists()
+    r = client.post("/expenses/", json={"date": "2024-03-01", "description": "monthly house rent", "amount": 1.0, "category": "Housing"})
+    client.put(f"/expenses/{r.json()['id']}", json={"amount": 2.0})  # category untouched: nothing to log
+    client.put(f"/expenses/{r.json()['id']}", json={"category": "Home"})
+    texts, labels, _ = online.read_corrections(str(log))
+    assert labels == ["Housing", "Home"] and texts == ["monthly house rent"] * 2
+
+def test_forecast_cache_invalidated_by_writes(monkeypatch):
+    from api.services import forecast_service
+    forecast_service.forecast_cache.clear()
+    monkeypatch.setattr(forecast_service, "BACKGROUND_REFIT", False)
+    client.post("/expenses/", json={"date": "2024-02-01", "description": "Cache", "amount": 3.0, "category": "C"})
+
+    before = client.get("/forecast/cache").json()
+    client.get("/forecast/", params={"periods": 3, "model": "lr"})
+    client.get("/forecast/", params={"periods": 3, "model": "lr"})
+    mid = client.get("/forecast/cache").json()
+    assert mid["hits"] == before["hits"] + 1
+
+    client.post("/expenses/", json={"date": "2024-02-02", "description": "Cache 2", "amount": 4.0, "category": "C"})
+    client.get("/forecast/", params={"periods": 3, "model": "lr"})
+    after = client.get("/forecast/cache").json()
+    assert after["hits"] == mid["hits"] and after["misses"] == mid["misses"] + 1
+    assert after["size"] == 1
+
+def test_forecast_columnar_future_only():
+    rows = client.get("/forecast/", params={"periods": 4, "model": "lr"}).json()["forecast"]
+    cols = client.get("/forecast/", params={"periods": 4, "model": "lr", "shape": "columns", "future_only": True}).json()["forecast"]
+    assert set(cols) == {"date", "predicted", "lower", "upper"}
+    assert cols["date"] == [r["date"] for r in rows[-4:]]
+    assert cols["predicted"] == [r["predicted"] for r in rows[-4:]]
+    assert client.get("/forecast/", params={"shape": "wide"}).status_code == 422
+
+def test_forecast_by_category():
+    client.post("/expenses/", json={"date": "2024-02-03", "description": "Cat A", "amount": 5.0, "category": "A"})
+    r = client.get("/forecast/by-category", params={"periods": 2, "freq": "W"})
+    assert r.status_code == 200
+    cats = {c["category"]: c for c in r.json()["by_category"]}
+    assert "A" in cats and len(cats["A"]["forecast"]) == 2
+
+def test_forecast_backtest_cached():
+    from api.services import forecast_service
+    forecast_service.backtest_cache.clear()
+    params = {"models": "lr,hw", "horizon": 3, "folds": 2}
+    r = client.get("/forecast/backtest", params=params)
+    assert r.status_code == 200, r.text
+    assert set(r.json()["models"]) == {"lr", "hw"}
+    client.get("/forecast/backtest", params=params)
+    assert forecast_service.backtest_cache.info()["hits"] == 1
+    assert client.get("/forecast/backtest", params={"horizon": 365, "freq": "Q"}).status_code == 400
+
+def test_background_training_job():
+    import time
+    client.post("/expenses/", json={"date": "2024-03-01", "description": "Job", "amount": 2.0, "category": "J"})
+    r = client.post("/forecast/jobs", json={"model": "lr", "freq": "W"})
+    assert r.status_code == 202
+    job_id = r.json()["id"]
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        job = client.get(f"/forecast/jobs/{job_id}").json()
+        if job["status"] in ("succeeded", "failed"):
+            break
+        time.sleep(0.2)
+    assert job["status"] == "succeeded", job
+    assert job["model"]["freq"] == "W" and job["train_seconds"] >= 0
+    assert client.get("/forecast/jobs/nope").status_code == 404
+
+def test_ml_predict_single_and_batching_stats():
+    r = client.post("/ml/predict", json={"description": "coffee from starbucks"})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["category"] == max(body["probabilities"], key=lambda lp: lp[1])[0]
+    assert client.post("/ml/predict", json={"description": "  "}).status_code == 400
+    stats = client.get("/ml/batching").json()
+    assert set(stats) >= {"enabled", "batch_size", "queue_ms"}
+
+def test_merchant_rules_applied_to_ml_predict():
+    before = client.get("/ml/rules").json()
+    r = client.post("/ml/predict", json={"description": "NETFLIX.COM monthly"})
+    body = r.json()
+    assert body["category"] == "Entertainment" and ["Entertainment", 1.0] in body["probabilities"]
+    assert sum(p for _, p in body["probabilities"]) == 1.0 and len(body["probabilities"]) > 1
+    after = client.get("/ml/rules", params={"include_rules": True}).json()
+    assert after["hits"] == before["hits"] + 1 and after["table"]["netflix"] == "Entertainment"
@@ -6,3 +6,265 @@ def test_predict():
     sample = "coffee from starbucks"
     cat = cls.predict(sample)
     assert isinstance(cat, str)
+
+def test_predict_batch_matches_single():
+    cls = ExpenseClassifier()
+    samples = ["coffee from starbucks", "uber ride to airport", "monthly rent"]
+    assert cls.predict_batch(samples) == [cls.predict(s) for s in samples]
+    top = cls.predict_proba_batch(samples, top_k=2)
+    assert all(len(row) == 2 for row in top)
+    assert [row[0][0] for row in top] == cls.predict_batch(samples)
+    assert top[0][0][1] >= top[0][1][1]
+
+def test_prediction_cache(tmp_path):
+    import shutil, os
+    from api.ml.classifier import MODEL_PATH
+    model = tmp_path / "clf.pkl"
+    shutil.copy(MODEL_PATH, model)
+    cls = ExpenseClassifier(str(model), cache_size=2)
+    cls.predict("Uber trip")
+    cls.predict("uber   TRIP!")  # same key after clean_text
+    cls.predict("coffee")
+    cls.predict("monthly rent")
+    info = cls.cache_info()
+    assert (info["hits"], info["misses"], info["evictions"], info["size"]) == (1, 3, 1, 2)
+
+    # replacing the model file drops the cache
+    st = os.stat(model)
+    os.utime(model, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    cls.predict("coffee")
+    info = cls.cache_info()
+    assert info["reloads"] == 1 and info["size"] == 1
+
+def test_provider_loads_lazily_and_swaps_on_new_artifact(tmp_path):
+    import shutil, os
+    import joblib
+    from api.ml.classifier import MODEL_PATH, ClassifierProvider
+    missing = ClassifierProvider(str(tmp_path / "none.pkl"))
+    assert missing.warmup() is False and missing.info()["loaded"] is False
+
+    model = tmp_path / "clf.pkl"
+    shutil.copy(MODEL_PATH, model)
+    provider = ClassifierProvider(str(model), check_interval=0)
+    assert provider.info()["loaded"] is False
+    first = provider.get()
+    assert provider.get() is first
+
+    # a touch without new content keeps the instance
+    st = os.stat(model)
+    os.utime(model, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert provider.get() is first
+
+    # a new artifact (written to a temp file and renamed, as artifacts are memory-mapped)
+    # is loaded beside the old one and swapped in; the old instance still works
+    from api.ml.registry import atomic_joblib_dump
+    atomic_joblib_dump(joblib.load(model), str(model), compress=3)
+    second = provider.get()
+    assert second is not first and provider.info()["reloads"] == 1
+    assert first.predict("coffee") == second.predict("coffee")
+
+def test_micro_batcher_coalesces_concurrent_calls():
+    import asyncio
+    from api.services.micro_batcher import MicroBatcher
+    calls = []
+
+    def score(items):
+        calls.append(len(items))
+        return [i * 2 for i in items]
+
+    batcher = MicroBatcher(score, max_batch_size=8, max_wait_ms=50)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(20)))
+
+    assert asyncio.run(run()) == [i * 2 for i in range(20)]
+    assert calls == [8, 8, 4]
+    stats = batcher.stats()
+    assert stats["batch_size"]["count"] == 3 and stats["queue_ms"]["count"] == 20
+
+def test_bundle_matches_pickled_pipeline(tmp_path):
+    import joblib
+    import numpy as np
+    from api.ml import artifacts
+    from api.ml.classifier import PICKLE_PATH
+    bundle_path = tmp_path / "clf.bundle"
+    artifacts.export_bundle(joblib.load(PICKLE_PATH), str(bundle_path))
+    assert isinstance(artifacts.load_bundle(str(bundle_path))["feature_log_prob"], np.memmap)
+
+    from_pickle = ExpenseClassifier(str(PICKLE_PATH), cache_size=0)
+    from_bundle = ExpenseClassifier(str(bundle_path), cache_size=0)
+    assert from_bundle.pipeline is None
+    samples = ["coffee from starbucks", "uber ride to airport", "monthly rent", "", "never seen words", "netflix netflix"]
+    np.testing.assert_allclose(from_bundle._cached_proba(samples), from_pickle._cached_proba(samples), atol=1e-12)
+    assert from_bundle.predict_batch(samples) == from_pickle.predict_batch(samples)
+
+def test_compiled_table_matches_pickled_pipeline(tmp_path):
+    import joblib
+    import numpy as np
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.naive_bayes import MultinomialNB
+    from sklearn.pipeline import Pipeline
+    from api.ml import compiled
+    from api.ml.classifier import PICKLE_PATH
+    path = tmp_path / "clf.compiled"
+    compiled.export_compiled(joblib.load(PICKLE_PATH), str(path))
+
+    from_pickle = ExpenseClassifier(str(PICKLE_PATH), cache_size=0)
+    from_table = ExpenseClassifier(str(path), cache_size=0)
+    assert from_table.pipeline is None and isinstance(from_table.scorer, compiled.CompiledScorer)
+    samples = ["coffee from starbucks", "uber ride to airport", "monthly rent", "", "never seen words", "netflix netflix"]
+    np.testing.assert_allclose(from_table._cached_proba(samples), from_pickle._cached_proba(samples), atol=1e-12)
+    assert from_table.predict_batch(samples) == from_pickle.predict_batch(samples)
+
+    # analyzer options beyond the production model: accents, stop words, trigrams, sublinear tf
+    texts = ["Café au lait the café", "the uber uber ride home", "rent for the month", "naïve taxi ride"]
+    labels = ["food", "transport", "rent", "transport"]
+    pipeline = Pipeline([("tfidf", TfidfVectorizer(ngram_range=(1, 3), strip_accents="unicode", stop_words=["the"],
+                                                   sublinear_tf=True)), ("clf", MultinomialNB())]).fit(texts, labels)
+    compiled.export_compiled(pipeline, str(path))
+    scorer = compiled.CompiledScorer(joblib.load(path))
+    probe = texts + ["CAFÉ ride", "unknown"]
+    assert [sorted(scorer.analyze(t)) for t in probe] == [sorted(pipeline[0].build_analyzer()(t)) for t in probe]
+    np.testing.assert_allclose(scorer.predict_proba(probe), pipeline.predict_proba(probe), atol=1e-12)
+
+def test_online_model_learns_corrections_from_log(tmp_path):
+    import csv
+    from api.ml import online
+    model_path, log = tmp_path / "clf.online", tmp_path / "misclassified_log.csv"
+    model = online.new_online_model(n_features=2 ** 12)
+    online.partial_fit(model, ["uber ride", "taxi to airport", "monthly rent", "rent payment"],
+                       ["Transport", "Transport", "Rent", "Rent"])
+    from api.ml.registry import atomic_joblib_dump
+    atomic_joblib_dump(model, str(model_path))
+    assert online.update_from_log(str(model_path), str(log))["learned"] == 0  # no log yet
+
+    def append(rows):
+        with open(log, "a", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=online.LOG_FIELDS)
+            if f.tell() == 0:
+                writer.writeheader()
+            writer.writerows(rows)
+
+    append([{"ts": "t", "description": "Swiggy order #1", "predicted": "Transport", "actual": "Food & Dining"},
+            {"ts": "t", "description": "swiggy dinner", "predicted": "Rent", "actual": "Food & Dining"},
+            {"ts": "t", "description": "unlabeled", "predicted": "Rent", "actual": ""}])
+    result = online.update_from_log(str(model_path), str(log))
+    assert result["learned"] == 2 and result["published"] and result["log_offset"] == log.stat().st_size
+
+    cls = ExpenseClassifier(str(model_path), cache_size=0)
+    assert isinstance(cls.scorer, online.OnlineScorer)
+    assert list(cls.classes_) == ["Food & Dining", "Rent", "Transport"]  # new category added
+    assert cls.predict("swiggy lunch") == "Food & Dining" and cls.predict("uber ride home") == "Transport"
+
+    # only rows appended since the last update are read
+    assert online.update_from_log(str(model_path), str(log))["learned"] == 0
+    append([{"ts": "t", "description": "swiggy", "predicted": "Rent", "actual": "Food & Dining"}])
+    assert online.update_from_log(str(model_path), str(log))["n_examples"] == 7
+
+def test_online_default_path_falls_back_when_missing(tmp_path, monkeypatch):
+    from api.ml import classifier
+    monkeypatch.setattr(classifier, "ONLINE", True)
+    monkeypatch.setattr(classifier, "ONLINE_PATH", tmp_path / "missing.online")
+    monkeypatch.setattr(classifier, "COMPILED_PATH", tmp_path / "missing.compiled")
+    monkeypatch.setattr(classifier, "BUNDLE_PATH", tmp_path / "missing.bundle")
+    assert classifier._default_model_path() == classifier.PICKLE_PATH
+    (tmp_path / "missing.online").touch()
+    assert classifier._default_model_path() == tmp_path / "missing.online"
+
+def test_default_path_prefers_the_shared_bundle_over_the_compiled_table(tmp_path, monkeypatch):
+    from api.ml import classifier
+    paths = {name: tmp_path / f"clf.{name}" for name in ("compiled", "bundle", "pkl")}
+    for path in paths.values():
+        path.touch()
+    monkeypatch.setattr(classifier, "ONLINE", False)
+    monkeypatch.setattr(classifier, "COMPILED_PATH", paths["compiled"])
+    monkeypatch.setattr(classifier, "BUNDLE_PATH", paths["bundle"])
+    monkeypatch.setattr(classifier, "PICKLE_PATH", paths["pkl"])
+    # the compiled table is per-worker memory, so it is only served when asked for
+    assert classifier._default_model_path() == paths["bundle"]
+    monkeypatch.setattr(classifier, "CLASSIFIER_FORMAT", "compiled")
+    assert classifier._default_model_path() == paths["compiled"]
+    monkeypatch.setattr(classifier, "CLASSIFIER_FORMAT", "pickle")
+    assert classifier._default_model_path() == paths["pkl"]
+    # a missing export falls back to the bundle, then the pickle
+    monkeypatch.setattr(classifier, "CLASSIFIER_FORMAT", "compiled")
+    paths["compiled"].unlink()
+    assert classifier._default_model_path() == paths["bundle"]
+    paths["bundle"].unlink()
+    assert classifier._default_model_path() == paths["pkl"]
+
+def test_streaming_training_matches_in_memory_fit(tmp_path):
+    import random
+    import numpy as np
+    import pandas as pd
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.naive_bayes import MultinomialNB
+    from sklearn.pipeline import Pipeline
+    from api.ml.preprocessing import clean_text
+    from api.ml.stream_training import _is_validation, clean_series, train_streaming
+
+    odd = ["Café  NETFLIX.com", "İstanbul\x0btaxi", " ", "a\tb\nc", "POS #12 UBER*TRIP"]
+    assert clean_series(pd.Series(odd)).tolist() == [clean_text(t) for t in odd]
+
+    rng = random.Random(0)
+    words = {"Transport": ["uber", "taxi", "ride", "airport"], "Food": ["swiggy", "pizza", "coffee"], "Rent": ["rent", "lease"]}
+    rows = []
+    for _ in range(600):
+        category = rng.choice(list(words))
+        rows.append((" ".join(rng.choices(words[category] + ["the", "#12", "Café"], k=4)), category))
+    rows[5] = (None, "Food")
+    csv_path = tmp_path / "labeled.csv"
+    pd.DataFrame(rows, columns=["description", "category"]).to_csv(csv_path, index=False)
+
+    grid = {"ngram_range": [(1, 1), (1, 2)], "min_df": [1, 3], "alpha": [0.5, 1.0]}
+    pipeline, report = train_streaming(str(csv_path), grid=grid, chunksize=150, n_jobs=1)
+    assert len(report["candidates"]) == 8 and report["best"]["accuracy"] > 0.9
+    assert set(report["seconds"]) == {"clean_and_df", "vocabulary", "count", "search"}
+
+    # same model as an in-memory fit of the best parameters on the training rows
+    df = pd.read_csv(csv_path)
+    train = df[df["description"].notna() & ~_is_validation(np.arange(len(df)), 20)]
+    best = report["best"]
+    reference = Pipeline([("tfidf", TfidfVectorizer(ngram_range=best["ngram_range"], min_df=best["min_df"])),
+                          ("clf", MultinomialNB(alpha=best["alpha"]))])
+    reference.fit([clean_text(t) for t in train["description"]], train["category"])
+    assert pipeline[0].vocabulary_ == reference[0].vocabulary_
+    probe = [clean_text(t) for t in df["description"].dropna()[:100]] + ["unseen words"]
+    np.testing.assert_allclose(pipeline.predict_proba(probe), reference.predict_proba(probe), atol=1e-12)
+
+def test_merchant_rules_short_circuit_the_model(tmp_path):
+    import os
+    from api.ml.rules import RuleEngine
+    path = tmp_path / "rules.csv"
+    path.write_text("pattern,category\nuber,Transport\nUber Eats,Food & Dining\nnetflix,Entertainment\n", encoding="utf-8")
+    rules = RuleEngine(str(path), check_interval=0)
+    # token boundaries, normalization, longest match wins
+    assert rules.match_batch(["UBER *TRIP 1234", "uberx ride", "Uber Eats order", "NETFLIX.COM", "coffee"]) == \
+        ["Transport", None, "Food & Dining", "Entertainment", None]
+    stats = rules.stats()
+    assert (stats["lookups"], stats["hits"], stats["rules"], stats["max_tokens"]) == (5, 3, 3, 2)
+
+    cls = ExpenseClassifier(cache_size=0, rules=rules)
+    texts = ["uber eats dinner", "monthly rent", "netflix subscription"]
+    assert cls.predict_batch(texts) == ["Food & Dining", ExpenseClassifier(cache_size=0).predict("monthly rent"),
+                                        "Entertainment"]
+    # a rule hit lists every class like the model does, with the rule's category at 1.0
+    label, probs = cls.classify("netflix")
+    assert label == "Entertainment" and [l for l, _ in probs] == [str(c) for c in cls.classes_]
+    assert dict(probs)["Entertainment"] == 1.0 and sum(p for _, p in probs) == 1.0
+    top = cls.predict_proba_batch(texts, top_k=2)
+    assert top[0][0] == ("Food & Dining", 1.0) and top[0][1][1] == 0.0 and len(top[1]) == 2
+    assert cls.cache_info()["misses"] == 2  # only "monthly rent" reached the model (predict_batch + proba)
+
+    # edits through set_rules and on disk are picked up
+    rules.set_rules({"swiggy": "Food & Dining", "uber": None})
+    assert rules.match_batch(["swiggy", "uber trip"]) == ["Food & Dining", None]
+    path.write_text("pattern,category\nrent,Rent\n", encoding="utf-8")
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert rules.match("house rent") == "Rent" and rules.match("swiggy") is None
+    # concurrent set_rules calls do not lose each other's edits
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda i: rules.set_rules({f"shop{i}": "Shopping"}), range(32)))
+    assert len(rules.rules()) == 33 and len(RuleEngine(str(path)).rules()) == 33
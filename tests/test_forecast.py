@@ -1,5 +1,6 @@
 # tests/test_forecast.py
 import pandas as pd
+import pytest
 from api.ml import forecast as ml
 
 def test_aggregate_and_train_lr(tmp_path):
@@ -12,3 +13,163 @@ def test_aggregate_and_train_lr(tmp_path):
     # basic prediction
     fc, _ = ml.forecast_from_raw(df, periods=10, freq="D", model_type="lr", model_name=str(tmp_path / "lr_test"))
     assert len(fc) >= 10
+
+def test_period_totals_match_raw_aggregation():
+    import datetime
+    from sqlalchemy.orm import sessionmaker
+    from api.db.session import make_engine
+    from api.db import models
+    from api.crud.expenses import get_period_totals
+    from api.services import rollup_service
+
+    engine = make_engine("sqlite://")
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    dates = pd.date_range("2025-01-01", periods=90, freq="D")
+    raw = pd.DataFrame({"date": [d.date() for d in dates for _ in range(3)], "amount": [1.0, 2.5, 4.0] * 90})
+    db.add_all([models.Expense(date=r.date, description="x", amount=r.amount) for r in raw.itertuples()])
+    db.commit()
+    rollup_service.rebuild(db)
+
+    for freq in ["D", "W", "MS", "ME", "QS"]:
+        expected = ml._aggregate_expenses(raw, freq=freq)
+        got = ml._aggregate_expenses(get_period_totals(db, freq=freq), freq=freq)
+        pd.testing.assert_frame_equal(got, expected, check_dtype=False)
+
+def test_registry_refits_only_when_stale(tmp_path):
+    from api.ml.registry import ModelRegistry
+    registry = ModelRegistry(root=str(tmp_path), max_age_hours=0, min_new_periods=7, keep_versions=2)
+    dates = pd.date_range("2025-01-01", periods=60, freq="D")
+    df = pd.DataFrame({"date": dates, "amount": range(60)})
+
+    _, meta1, _ = ml.get_or_train(df, model_type="lr", registry=registry)
+    _, meta2, _ = ml.get_or_train(df, model_type="lr", registry=registry)
+    assert meta1["version"] == meta2["version"] == 1
+
+    # a few new days are tolerated, a full week triggers a refit
+    more = pd.concat([df, pd.DataFrame({"date": pd.date_range("2025-03-02", periods=3), "amount": 1.0})])
+    assert ml.get_or_train(more, model_type="lr", registry=registry)[1]["version"] == 1
+    more = pd.concat([df, pd.DataFrame({"date": pd.date_range("2025-03-02", periods=7), "amount": 1.0})])
+    assert ml.get_or_train(more, model_type="lr", registry=registry)[1]["version"] == 2
+
+    # editing past data invalidates, and only keep_versions versions stay on disk
+    edited = more.copy()
+    edited.iloc[0, edited.columns.get_loc("amount")] = 500.0
+    meta = ml.get_or_train(edited, model_type="lr", registry=registry)[1]
+    assert meta["version"] == 3
+    assert [v["version"] for v in registry.versions("lr_expense", "D")] == [2, 3]
+    assert sorted(p.name for p in (tmp_path / "lr_expense_D").glob("*.joblib")) == ["v2.joblib", "v3.joblib"]
+
+
+def test_concurrent_get_or_train_fits_once(tmp_path, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    from api.ml.locks import FileLock
+    from api.ml.registry import ModelRegistry
+    registry = ModelRegistry(root=str(tmp_path), max_age_hours=0)
+    df = pd.DataFrame({"date": pd.date_range("2025-01-01", periods=60, freq="D"), "amount": range(60)})
+
+    fits = []
+    real_fit = ml._fit
+
+    def slow_fit(train_df, model_type, **kwargs):
+        fits.append(model_type)
+        import time
+        time.sleep(0.2)
+        return real_fit(train_df, model_type, **kwargs)
+
+    monkeypatch.setattr(ml, "_fit", slow_fit)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        metas = list(pool.map(lambda _: ml.get_or_train(df, model_type="lr", registry=registry)[1], range(8)))
+    assert len(fits) == 1
+    assert {m["version"] for m in metas} == {1}
+
+    # the training lock is exclusive across lock files opened separately (i.e. other processes)
+    with registry.lock("lr_expense", "D"):
+        with pytest.raises(TimeoutError):
+            FileLock(str(tmp_path / "lr_expense_D" / ".train.lock"), timeout=0.1).acquire()
+
+
+def test_forecast_by_category_matches_per_category_lr(tmp_path):
+    import numpy as np
+    from api.ml.registry import ModelRegistry
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("2025-01-01", periods=90, freq="D")
+    rows = [(d, c, float(rng.integers(1, 50))) for d in dates for c in ["Food", "Rent", ""]
+            if rng.random() < 0.8 and not (c == "Rent" and d < pd.Timestamp("2025-02-10"))]
+    df = pd.DataFrame(rows, columns=["date", "category", "amount"])
+
+    out = ml.forecast_by_category(df, periods=5, freq="W", model_type="lr")
+    assert len(out) == 5 * 3
+    for cat in ["Food", "Rent", ""]:
+        # a category that starts late is fitted from its first period, like a standalone model
+        single, _ = ml.forecast_from_raw(df[df["category"] == cat], periods=5, freq="W", model_type="lr",
+                                         registry=ModelRegistry(root=str(tmp_path / (cat or "none"))))
+        np.testing.assert_allclose(out[out["category"] == cat]["yhat"].to_numpy(), single["yhat"].tail(5).to_numpy())
+
+
+def test_forecast_by_category_prophet_skips_single_period_categories(monkeypatch):
+    import numpy as np
+    fitted = []
+
+    def fake_prophet(train_df, periods, freq):
+        # Prophet.fit raises on fewer than 2 rows
+        assert len(train_df) >= 2
+        fitted.append(len(train_df))
+        return np.tile([train_df["y"].mean(), 0.0, 1.0], (periods, 1))
+
+    monkeypatch.setattr(ml, "PROPHET_AVAILABLE", True)
+    monkeypatch.setattr(ml, "_forecast_prophet_series", fake_prophet)
+    df = pd.DataFrame({"date": ["2025-01-15", "2025-02-15", "2025-03-15", "2025-03-20"],
+                       "category": ["Food", "Food", "Food", "New"], "amount": [10.0, 20.0, 30.0, 7.0]})
+    out = ml.forecast_by_category(df, periods=2, freq="MS", model_type="prophet", n_jobs=1)
+    assert fitted == [3]
+    assert out[out["category"] == "Food"]["yhat"].tolist() == [20.0, 20.0]
+    new = out[out["category"] == "New"]
+    assert new["yhat"].tolist() == [7.0, 7.0] and (new["yhat_lower"] <= new["yhat_upper"]).all()
+
+
+def test_holt_winters_learns_weekly_pattern():
+    import numpy as np
+    rng = np.random.default_rng(1)
+    ds = pd.date_range("2024-01-01", periods=400, freq="D")
+    y = 50 + 20 * (ds.dayofweek >= 5) + rng.normal(0, 2, len(ds))
+    artifact = ml.train_holt_winters(pd.DataFrame({"ds": ds, "y": y}), freq="D", model_name=None)
+    assert artifact["season_length"] == 7
+
+    fc = ml.predict_with_hw(artifact, periods=14, freq="D")
+    # only the horizon is returned, and weekends are forecast ~20 above weekdays
+    assert fc["ds"].iloc[0] == ds[-1] + pd.Timedelta(days=1) and len(fc) == 14
+    weekend = fc["ds"].dt.dayofweek >= 5
+    assert abs(fc.loc[weekend, "yhat"].mean() - fc.loc[~weekend, "yhat"].mean() - 20) < 3
+    width = (fc["yhat_upper"] - fc["yhat_lower"]).to_numpy()
+    assert (width > 0).all() and width[-1] >= width[0]
+
+
+def test_rolling_origin_backtest():
+    import numpy as np
+    from api.ml import backtest
+    assert backtest.rolling_origin_cutoffs(100, horizon=10, n_folds=4, min_train=30) == [30, 50, 70, 90]
+    assert backtest.rolling_origin_cutoffs(20, horizon=10, n_folds=4, min_train=30) == []
+
+    rng = np.random.default_rng(0)
+    ds = pd.date_range("2024-01-01", periods=200, freq="D")
+    df = pd.DataFrame({"date": ds, "amount": 60 + 25 * (ds.dayofweek >= 5) + rng.gamma(2.0, 5.0, len(ds))})
+    report = backtest.backtest(df, model_types=["lr", "hw"], horizon=7, n_folds=4, n_jobs=1)
+    assert len(report["cutoffs"]) == 4
+    hw, lr = report["models"]["hw"], report["models"]["lr"]
+    assert len(hw["by_horizon"]) == 7 and hw["fit_seconds"] > 0
+    # the seasonal model should beat a straight line on weekly-seasonal data
+    assert hw["mae"] < lr["mae"]
+
+
+def test_prophet_refit_warm_starts_from_registry(tmp_path):
+    pytest.importorskip("prophet")
+    from api.ml.registry import ModelRegistry
+    registry = ModelRegistry(root=str(tmp_path), max_age_hours=0, min_new_periods=7)
+    dates = pd.date_range("2024-01-01", periods=120, freq="D")
+    df = pd.DataFrame({"date": dates, "amount": 50 + 20 * (dates.dayofweek >= 5)})
+
+    _, first, _ = ml.get_or_train(df.iloc[:100], model_type="prophet", registry=registry)
+    _, second, _ = ml.get_or_train(df, model_type="prophet", registry=registry)
+    assert first["warm_start"] is False
+    assert second["version"] == 2 and second["warm_start"] is True